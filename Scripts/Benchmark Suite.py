@@ -0,0 +1,369 @@
+# End-to-end benchmark for the Capstone scripts.
+#
+# Runs the cleaning pipeline, EDA, both map scripts and the model training at several dataset sizes, each
+# size in its own project folder under Output/benchmarks/inputs (synthetic rows, or a sample of a real extract).
+# Every script runs in a fresh process with CAPSTONE_PROJECT_DIR pointed at that folder; its StepMetrics JSON
+# lines give per-step latency, throughput and peak RSS. Results are compared with Output/benchmarks/baseline.json
+# and steps that got slower (or scripts that got bigger) beyond the tolerance are flagged; the exit status is 1
+# when anything regressed. Scaling curves and a Markdown report are written to Output/benchmarks/report.
+#
+#   python "Benchmark Suite.py" --sizes 50000 100000 200000 --save-baseline
+#   python "Benchmark Suite.py" --sizes 50000 100000 200000
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from project_paths import CRIME_CSV, BENCHMARK_DIR
+from synthetic_crime import write_synthetic_project, copy_reference_files
+from step_metrics import StepMetrics
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUTS_DIR = os.path.join(BENCHMARK_DIR, "inputs")
+RUNS_DIR = os.path.join(BENCHMARK_DIR, "runs")
+REPORT_DIR = os.path.join(BENCHMARK_DIR, "report")
+BASELINE_JSON = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Stage name -> scripts, in run order (each stage reads what the cleaning stage wrote)
+STAGES = {
+    "cleaning": ["Data Cleaning and Curation Pipeline.py"],
+    "eda": ["EDA Pipeline.py"],
+    "maps": ["Crime Map.py", "map code.py"],
+    "model": ["Predictive Analysis.py"],
+}
+TOTAL_STEP = "(whole script)"
+
+metrics = StepMetrics("Benchmark Suite")
+
+
+# ------------------------ Inputs ------------------------ #
+def synthetic_input(rows, seed):
+    project_dir = os.path.join(INPUTS_DIR, f"synthetic-{rows}-seed{seed}")
+    done_marker = os.path.join(project_dir, "input.json")
+    if not os.path.exists(done_marker):
+        # Same rows and seed always give the same file, so a finished folder is reused
+        write_synthetic_project(project_dir, rows, seed)
+        with open(done_marker, "w", encoding="utf-8") as marker:
+            json.dump({"source": "synthetic", "rows": rows, "seed": seed}, marker)
+    return project_dir
+
+
+def sampled_input(source_df, source_csv, rows, seed):
+    project_dir = os.path.join(INPUTS_DIR, f"sample-{rows}-seed{seed}")
+    csv_path = copy_reference_files(project_dir)
+    source_df.sample(n=rows, random_state=seed).to_csv(csv_path, index=False)
+    with open(os.path.join(project_dir, "input.json"), "w", encoding="utf-8") as marker:
+        json.dump({"source": source_csv, "rows": rows, "seed": seed}, marker)
+    return project_dir
+
+
+# ------------------------ Running one script ------------------------ #
+def run_script(script, project_dir, rows, model_rows, log_path, metrics_path):
+    env = dict(os.environ, CAPSTONE_PROJECT_DIR=project_dir, CAPSTONE_METRICS_FILE=metrics_path,
+               CAPSTONE_SAMPLE_ROWS=str(model_rows), MPLBACKEND="Agg", CAPSTONE_FORCE_CHARTS="1")
+    env.pop("CAPSTONE_PROFILE_STEP", None)
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)
+
+    started = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, script)], cwd=SCRIPTS_DIR, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - started
+
+    steps = []
+    if os.path.exists(metrics_path):
+        with open(metrics_path, encoding="utf-8") as metrics_in:
+            steps = [json.loads(line) for line in metrics_in if line.strip()]
+    peaks = [step["peak_rss_mb"] for step in steps if step["peak_rss_mb"] is not None]
+
+    # One row per step plus one for the whole process (start-up and imports included)
+    measurements = [{
+        "step": step["step"], "wall_s": step["wall_s"], "cpu_s": step["cpu_s"],
+        "peak_rss_mb": step["peak_rss_mb"], "peak_rss_growth_mb": step["peak_rss_growth_mb"],
+        "step_rows": step["rows"],
+    } for step in steps]
+    measurements.append({
+        "step": TOTAL_STEP, "wall_s": round(wall, 4), "cpu_s": round(sum(step["cpu_s"] for step in steps), 4),
+        "peak_rss_mb": max(peaks) if peaks else None, "peak_rss_growth_mb": None, "step_rows": rows,
+    })
+    return result.returncode, measurements
+
+
+def median_run(runs):
+    """Collapse repeated runs of one script to the median of each number, step by step."""
+    by_step = {}
+    for measurements in runs:
+        for measurement in measurements:
+            by_step.setdefault(measurement["step"], []).append(measurement)
+    summary = []
+    for step, repeats in by_step.items():
+        row = {"step": step, "repeats": len(repeats)}
+        for field in ["wall_s", "cpu_s", "peak_rss_mb", "peak_rss_growth_mb", "step_rows"]:
+            values = [repeat[field] for repeat in repeats if repeat[field] is not None]
+            row[field] = statistics.median(values) if values else None
+        row["rows_per_s"] = round(row["step_rows"] / row["wall_s"]) if row["step_rows"] and row["wall_s"] else None
+        summary.append(row)
+    return summary
+
+
+# ------------------------ Baseline comparison ------------------------ #
+def compare_with_baseline(results, baseline, tolerance, memory_tolerance, min_seconds):
+    """Add baseline numbers to each result row and return the rows that regressed."""
+    base_rows = {(row["rows"], row["script"], row["step"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        base = base_rows.get((row["rows"], row["script"], row["step"]))
+        row["baseline_wall_s"] = base["wall_s"] if base else None
+        row["baseline_peak_rss_mb"] = base["peak_rss_mb"] if base else None
+        row["wall_change"] = None
+        row["regression"] = ""
+        if base is None:
+            continue
+        if row["status"] != "ok":
+            if base["status"] == "ok":
+                row["regression"] = "failed"
+                regressions.append(row)
+            continue
+        if row["wall_s"] is not None and base["wall_s"]:
+            row["wall_change"] = round(row["wall_s"] / base["wall_s"] - 1, 4)
+            # Ignore steps too short to time reliably
+            if row["wall_s"] - base["wall_s"] >= min_seconds and row["wall_change"] > tolerance:
+                row["regression"] = "slower"
+        # Peak RSS only means something for the whole process (it never goes down within one)
+        if row["step"] == TOTAL_STEP and row["peak_rss_mb"] and base["peak_rss_mb"]:
+            if row["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_tolerance):
+                row["regression"] = (row["regression"] + " bigger").strip()
+        if row["regression"]:
+            regressions.append(row)
+    return regressions
+
+
+def environment_info():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "pandas": pd.__version__}
+
+
+# ------------------------ Report ------------------------ #
+def plot_scaling_curves(results_df, report_dir, top_steps=6):
+    """One figure per script: wall time (log-log) for the slowest steps and peak RSS against rows."""
+    chart_paths = []
+    ok = results_df[results_df["status"] == "ok"]
+    for script, script_df in ok.groupby("script", sort=False):
+        largest = script_df[script_df["rows"] == script_df["rows"].max()]
+        slowest = largest[largest["step"] != TOTAL_STEP].nlargest(top_steps, "wall_s")["step"].tolist()
+
+        fig, (latency_ax, memory_ax) = plt.subplots(1, 2, figsize=(14, 5))
+        for step in [TOTAL_STEP] + slowest:
+            step_df = script_df[script_df["step"] == step].sort_values("rows")
+            latency_ax.plot(step_df["rows"], step_df["wall_s"], marker="o", label=step,
+                            linewidth=2.5 if step == TOTAL_STEP else 1.2)
+        latency_ax.set_xscale("log")
+        latency_ax.set_yscale("log")
+        latency_ax.set_title(f"{script}: Wall Time vs Rows")
+        latency_ax.set_xlabel("Input Rows")
+        latency_ax.set_ylabel("Seconds")
+        latency_ax.legend(fontsize=7)
+
+        total_df = script_df[script_df["step"] == TOTAL_STEP].sort_values("rows")
+        memory_ax.plot(total_df["rows"], total_df["peak_rss_mb"], marker="o", color="firebrick")
+        memory_ax.set_xscale("log")
+        memory_ax.set_title(f"{script}: Peak RSS vs Rows")
+        memory_ax.set_xlabel("Input Rows")
+        memory_ax.set_ylabel("MB")
+
+        plt.tight_layout()
+        chart_path = os.path.join(report_dir, f"scaling_{os.path.splitext(script)[0].replace(' ', '_')}.png")
+        plt.savefig(chart_path)
+        plt.close(fig)
+        chart_paths.append(chart_path)
+    return chart_paths
+
+
+def scaling_exponent(total_df):
+    """Slope of log(wall) against log(rows): ~1 is linear, >1 grows faster than the data."""
+    total_df = total_df[total_df["wall_s"] > 0]
+    if total_df["rows"].nunique() < 2:
+        return None
+    slope, _ = np.polyfit(np.log(total_df["rows"].astype(float)), np.log(total_df["wall_s"].astype(float)), 1)
+    return slope
+
+
+def write_report(results_df, regressions, baseline, settings, chart_paths, report_path):
+    lines = [f"# Benchmark Report ({settings['finished']})", ""]
+    lines.append(f"Sizes: {', '.join(f'{rows:,}' for rows in settings['sizes'])} rows ({settings['source']}), "
+                 f"{settings['repeat']} run(s) each, model sample {settings['model_fraction']:.0%} of the rows.")
+    if baseline is None:
+        lines.append("No baseline to compare with.")
+    else:
+        lines.append(f"Baseline: {baseline['settings']['finished']} on {baseline['environment']['platform']}; "
+                     f"tolerance {settings['tolerance']:.0%} wall time (steps over {settings['min_seconds']}s), "
+                     f"{settings['memory_tolerance']:.0%} peak RSS.")
+    lines += ["", f"**Regressions: {len(regressions)}**", ""]
+    for row in regressions:
+        lines.append(f"- {row['script']} / {row['step']} at {row['rows']:,} rows: {row['regression']}")
+
+    totals = results_df[results_df["step"] == TOTAL_STEP]
+    lines += ["", "## Scripts", "", "| Script | Rows | Status | Wall (s) | Rows/s | Peak RSS (MB) | vs Baseline |",
+              "|---|---:|---|---:|---:|---:|---:|"]
+    for _, row in totals.iterrows():
+        change = "" if pd.isna(row.get("wall_change")) else f"{row['wall_change']:+.0%}"
+        lines.append(f"| {row['script']} | {row['rows']:,} | {row['status']} | {row['wall_s']:.2f} | "
+                     f"{'' if pd.isna(row['rows_per_s']) else f'{row.rows_per_s:,.0f}'} | "
+                     f"{'' if pd.isna(row['peak_rss_mb']) else f'{row.peak_rss_mb:,.0f}'} | {change} |")
+
+    lines += ["", "## Scaling", "", "Exponent of wall time against rows (1.0 = linear).", ""]
+    for script, script_df in totals[totals["status"] == "ok"].groupby("script", sort=False):
+        exponent = scaling_exponent(script_df)
+        lines.append(f"- {script}: {'n/a' if exponent is None else f'{exponent:.2f}'}")
+
+    lines += ["", "## Steps", "", "| Script | Step | Rows | Wall (s) | Rows/s | Peak RSS growth (MB) | vs Baseline |",
+              "|---|---|---:|---:|---:|---:|---:|"]
+    steps = results_df[(results_df["step"] != TOTAL_STEP) & (results_df["status"] == "ok")]
+    for _, row in steps.iterrows():
+        change = "" if pd.isna(row.get("wall_change")) else f"{row['wall_change']:+.0%}"
+        flag = f" ⚠️ {row['regression']}" if row.get("regression") else ""
+        lines.append(f"| {row['script']} | {row['step']} | {row['rows']:,} | {row['wall_s']:.3f} | "
+                     f"{'' if pd.isna(row['rows_per_s']) else f'{row.rows_per_s:,.0f}'} | "
+                     f"{'' if pd.isna(row['peak_rss_growth_mb']) else f'{row.peak_rss_growth_mb:,.0f}'} | "
+                     f"{change}{flag} |")
+
+    lines += ["", "## Charts", ""] + [f"![{os.path.basename(path)}]({os.path.basename(path)})" for path in chart_paths]
+    with open(report_path, "w", encoding="utf-8") as report:
+        report.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Capstone scripts at several dataset sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 100_000, 200_000],
+                        help="Input rows per run (default 50000 100000 200000)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="Stages to run (default all; later stages need the cleaning output)")
+    parser.add_argument("--sample-from", metavar="CSV", nargs="?", const=CRIME_CSV,
+                        help="Sample the inputs from a real extract (default the project's crime CSV) "
+                             "instead of generating synthetic rows")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generated or sampled inputs")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per script and size; the median is kept")
+    parser.add_argument("--model-fraction", type=float, default=0.1,
+                        help="Share of the input rows Predictive Analysis trains on (CAPSTONE_SAMPLE_ROWS)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed wall-time increase (default 0.2)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed peak RSS increase")
+    parser.add_argument("--min-seconds", type=float, default=0.5,
+                        help="Ignore wall-time increases smaller than this (timer noise)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    settings = {"sizes": sorted(set(args.sizes)), "stages": args.stages, "seed": args.seed, "repeat": args.repeat,
+                "source": args.sample_from or "synthetic", "model_fraction": args.model_fraction,
+                "tolerance": args.tolerance, "memory_tolerance": args.memory_tolerance,
+                "min_seconds": args.min_seconds}
+    scripts = [script for stage in STAGES if stage in args.stages for script in STAGES[stage]]
+
+    # ------------------------ STEP 1: Prepare Inputs ------------------------ #
+    metrics.step("STEP 1: Prepare Inputs")
+    source_df = None
+    if args.sample_from:
+        source_df = pd.read_csv(args.sample_from, dtype=str, keep_default_na=False)
+        too_big = [rows for rows in settings["sizes"] if rows > len(source_df)]
+        if too_big:
+            parser.error(f"{args.sample_from} has only {len(source_df):,} rows; can't sample {too_big}")
+    project_dirs = {}
+    for rows in settings["sizes"]:
+        if source_df is not None:
+            project_dirs[rows] = sampled_input(source_df, args.sample_from, rows, args.seed)
+        else:
+            project_dirs[rows] = synthetic_input(rows, args.seed)
+        print(f" • {rows:,} rows: {project_dirs[rows]}")
+    del source_df
+
+    # ------------------------ STEP 2: Run Scripts ------------------------ #
+    metrics.step("STEP 2: Run Scripts")
+    run_dir = os.path.join(RUNS_DIR, f"{datetime.now():%Y%m%dT%H%M%S}")
+    os.makedirs(run_dir, exist_ok=True)
+    results = []
+    for rows in settings["sizes"]:
+        model_rows = max(1, int(rows * args.model_fraction))
+        for script in scripts:
+            name = os.path.splitext(script)[0].replace(" ", "_")
+            runs, status = [], "ok"
+            for repeat in range(args.repeat):
+                log_path = os.path.join(run_dir, f"{rows}-{name}-{repeat}.log")
+                returncode, measurements = run_script(script, project_dirs[rows], rows, model_rows, log_path,
+                                                      os.path.join(run_dir, f"{rows}-{name}-{repeat}.jsonl"))
+                if returncode != 0:
+                    status = f"failed ({returncode})"
+                    print(f" ➡️ {script} failed at {rows:,} rows, see {log_path}")
+                    break
+                runs.append(measurements)
+            summary = median_run(runs) if status == "ok" else [{
+                "step": TOTAL_STEP, "repeats": 0, "wall_s": None, "cpu_s": None, "peak_rss_mb": None,
+                "peak_rss_growth_mb": None, "step_rows": None, "rows_per_s": None}]
+            for row in summary:
+                results.append({"rows": rows, "script": script, "status": status, **row})
+            if status == "ok":
+                total = summary[-1]
+                print(f" • {script} @ {rows:,} rows: {total['wall_s']:.2f}s, "
+                      f"{total['rows_per_s'] or 0:,} rows/s, peak RSS {total['peak_rss_mb'] or 0:,.0f} MB")
+
+    # ------------------------ STEP 3: Compare With Baseline ------------------------ #
+    metrics.step("STEP 3: Compare With Baseline")
+    baseline = None
+    if os.path.exists(BASELINE_JSON):
+        with open(BASELINE_JSON, encoding="utf-8") as baseline_in:
+            baseline = json.load(baseline_in)
+    regressions = []
+    if baseline is not None:
+        if baseline["environment"] != environment_info():
+            print(" ➡️ Baseline was recorded in a different environment:", baseline["environment"])
+        regressions = compare_with_baseline(results, baseline, args.tolerance, args.memory_tolerance,
+                                            args.min_seconds)
+        for row in regressions:
+            change = "" if row["wall_change"] is None else f" ({row['wall_change']:+.0%} wall)"
+            print(f" ➡️ REGRESSION {row['script']} / {row['step']} at {row['rows']:,} rows: "
+                  f"{row['regression']}{change}")
+        if not regressions:
+            print("✅ No regressions against the baseline")
+    else:
+        print(" - No baseline yet; run with --save-baseline to store one")
+
+    # ------------------------ STEP 4: Save Results and Report ------------------------ #
+    metrics.step("STEP 4: Save Results and Report")
+    settings["finished"] = datetime.now().isoformat(timespec="seconds")
+    run_record = {"settings": settings, "environment": environment_info(), "results": results}
+    with open(os.path.join(run_dir, "results.json"), "w", encoding="utf-8") as results_out:
+        json.dump(run_record, results_out, indent=2)
+    results_df = pd.DataFrame(results)
+    results_df.to_csv(os.path.join(run_dir, "results.csv"), index=False)
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    for old_file in os.listdir(REPORT_DIR):
+        os.remove(os.path.join(REPORT_DIR, old_file))
+    chart_paths = plot_scaling_curves(results_df, REPORT_DIR)
+    report_path = os.path.join(REPORT_DIR, "report.md")
+    write_report(results_df, regressions, baseline, settings, chart_paths, report_path)
+    print(f"✅ Results saved to: {run_dir}")
+    print(f"✅ Report saved to: {report_path}")
+
+    if args.save_baseline:
+        with open(BASELINE_JSON, "w", encoding="utf-8") as baseline_out:
+            json.dump(run_record, baseline_out, indent=2)
+        print(f"✅ Baseline saved to: {BASELINE_JSON}")
+
+    metrics.finish()
+    if regressions and not args.save_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
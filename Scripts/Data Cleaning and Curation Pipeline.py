@@ -1,321 +1,506 @@
-import pandas as pd
-import os
-
-# ------------------------ STEP 1: Load Datasets ------------------------ #
-print("\n=== STEP 1: Load Datasets ===")
-
-crime_df = pd.read_csv(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Dataset\Crime_Data_from_2020_to_Present.csv")
-codes_df = pd.read_csv(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\MO Codes\Mo_Codes.csv")
-
-print(f" - Loaded crime dataset with {len(crime_df):,} rows and {crime_df.shape[1]} columns")
-print(f" - Loaded MO codes with {len(codes_df):,} entries")
-
-codes_df['Code'] = codes_df['Code'].astype(str).str.zfill(4)
-mo_code_mapping = dict(zip(codes_df['Code'], codes_df['Description']))
-
-# ------------------------ STEP 2: Clean Missing Values ------------------------ #
-print("\n=== STEP 2: Cleaning Missing and Blank Values ===")
-
-missing_counts = crime_df.isna().sum()
-missing_total = missing_counts.sum()
-print(f" - Total missing values before fill: {missing_total:,}")
-for col, count in missing_counts.items():
-    if count > 0:
-        print(f"   • {col}: {count:,} missing")
-
-for col in crime_df.columns:
-    if crime_df[col].dtype == 'object' or pd.api.types.is_string_dtype(crime_df[col]):
-        crime_df[col] = crime_df[col].replace(r'^\s*$', pd.NA, regex=True)
-        crime_df[col] = crime_df[col].fillna("Unknown")
-    else:
-        crime_df[col] = crime_df[col].fillna("Unknown").astype(str)
-
-print(f" - All missing and blank values filled. Remaining NAs: {crime_df.isna().sum().sum()}")
-
-# ------------------------ STEP 3: Drop Duplicates ------------------------ #
-print("\n=== STEP 3: Removing Duplicate Records by DR_NO ===")
-
-crime_df['DR_NO'] = crime_df['DR_NO'].astype(str)
-before_dupes = len(crime_df)
-crime_df.drop_duplicates(subset='DR_NO', inplace=True)
-after_dupes = len(crime_df)
-
-print(f" - Removed {before_dupes - after_dupes:,} duplicate records")
-
-# ------------------------ STEP 4: Parse and Format Dates ------------------------ #
-print("\n=== STEP 4: Parsing and Formatting Dates ===")
-
-crime_df['DATE OCC'] = pd.to_datetime(crime_df['DATE OCC'], errors='coerce')
-crime_df['Date Rptd'] = pd.to_datetime(crime_df['Date Rptd'], errors='coerce')
-
-crime_df['DayOfWeek'] = crime_df['DATE OCC'].dt.day_name().fillna("Unknown")
-crime_df['Month'] = crime_df['DATE OCC'].dt.strftime('%B').fillna("Unknown")
-
-crime_df['DATE OCC'] = crime_df['DATE OCC'].dt.strftime('%m/%d/%Y').fillna("Unknown")
-crime_df['Date Rptd'] = crime_df['Date Rptd'].dt.strftime('%m/%d/%Y').fillna("Unknown")
-
-print(" - Dates converted to MM/DD/YYYY format")
-print(" - Weekday and month extracted as text")
-print(crime_df[['Date Rptd', 'DATE OCC', 'DayOfWeek', 'Month']].head(10))
-
-# ------------------------ STEP 5: Convert TIME OCC ------------------------ #
-print("\n=== STEP 5: Converting TIME OCC to 12-Hour Format ===")
-
-def military_to_am_pm(military_str):
-    try:
-        military_str = str(military_str).zfill(4)
-        hour = int(military_str[:2])
-        minute = int(military_str[2:])
-        return pd.Timestamp(f'{hour:02}:{minute:02}').strftime('%I:%M %p')
-    except:
-        return "Unknown"
-
-crime_df['TIME OCC'] = crime_df['TIME OCC'].apply(military_to_am_pm)
-print(" - Converted TIME OCC to 12-hour format")
-print(crime_df[['TIME OCC']].head())
-
-# ------------------------ STEP 6: Clean Demographics ------------------------ #
-print("\n=== STEP 6: Cleaning Victim Age, Sex, and Descent ===")
-
-crime_df['Vict Age'] = crime_df['Vict Age'].astype(str)
-crime_df['Vict Age'] = crime_df['Vict Age'].replace(['0', 0], 'Unknown')
-
-crime_df['Vict Sex'] = crime_df['Vict Sex'].replace({'': 'Unknown', 'X': 'Unknown', 'M': 'Male', 'F': 'Female'})
-
-descent_mapping = {
-    'A': 'Other Asian', 'B': 'Black', 'C': 'Chinese', 'D': 'Cambodian',
-    'F': 'Filipino', 'G': 'Guamanian', 'H': 'Hispanic/Latin/Mexican',
-    'I': 'American Indian/Alaskan Native', 'J': 'Japanese', 'K': 'Korean',
-    'L': 'Laotian', 'O': 'Other', 'P': 'Pacific Islander', 'S': 'Samoan',
-    'U': 'Hawaiian', 'V': 'Vietnamese', 'W': 'White', 'X': 'Unknown',
-    'Z': 'Asian Indian'
-}
-crime_df['Vict Descent'] = crime_df['Vict Descent'].map(descent_mapping).fillna('Unknown')
-
-mask = (crime_df['Vict Sex'] == 'Unknown') & (crime_df['Vict Descent'] == 'Unknown')
-crime_df.loc[mask, 'Vict Age'] = 'Unknown'
-
-age_bins = [0, 12, 18, 25, 35, 50, 65, 100, 150]
-age_labels = ['Child (0-12)', 'Teen (13-18)', 'Young Adult (19-25)', 'Adult (26-35)',
-              'Middle Age (36-50)', 'Senior (51-65)', 'Elderly (66-100)', 'Super Elderly (100+)']
-
-crime_df['Vict Age Group'] = pd.to_numeric(crime_df['Vict Age'], errors='coerce')
-crime_df['Vict Age Group'] = pd.cut(crime_df['Vict Age Group'], bins=age_bins, labels=age_labels)
-crime_df['Vict Age Group'] = crime_df['Vict Age Group'].cat.add_categories(['Unknown']).fillna('Unknown')
-
-print("\n=== Victim Age Group Distribution ===")
-age_group_counts = crime_df['Vict Age Group'].value_counts().sort_index()
-for group, count in age_group_counts.items():
-    print(f" • {group}: {count:,} victims")
-
-
-# ------------------------ STEP 7: Expanding MO Codes into Descriptions ------------------------ #
-print("\n=== STEP 7: Expanding MO Codes into Descriptions ===")
-
-def expand_mocodes_to_descriptions(mocode_string):
-    if pd.isna(mocode_string) or mocode_string.strip() == "" or mocode_string.strip().lower() == "unknown":
-        return ["None"]
-    code_list = mocode_string.strip().split()
-    return [mo_code_mapping.get(code.zfill(4), "None") for code in code_list]
-
-crime_df["MO_Descriptions_List"] = crime_df["Mocodes"].apply(expand_mocodes_to_descriptions)
-max_mo_codes = crime_df["MO_Descriptions_List"].apply(len).max()
-mo_desc_columns = [f"MO_Desc_{i+1}" for i in range(max_mo_codes)]
-
-mo_desc_df = pd.DataFrame(crime_df["MO_Descriptions_List"].to_list(), columns=mo_desc_columns)
-mo_desc_df.fillna("None", inplace=True)
-
-crime_df = pd.concat([crime_df, mo_desc_df], axis=1)
-crime_df.drop(columns=["MO_Descriptions_List"], inplace=True)
-
-print(f" - Total MO Description columns created: {len(mo_desc_columns)}")
-print(f" - Sample MO Descriptions:")
-print(crime_df[["Mocodes"] + mo_desc_columns].head())
-
-# ------------------------ STEP 8: Crime Category Mapping ------------------------ #
-print("\n=== STEP 8: Creating Crime Severity Categories ===")
-def print_unique_crime_descriptions(df):
-    print("\n=== Unique Values in 'Crm Cd Desc' ===")
-    value_counts = df['Crm Cd Desc'].value_counts(dropna=False).sort_values(ascending=False)
-    print(f" - Total Unique Descriptions: {len(value_counts)}\n")
-    for desc, count in value_counts.items():
-        print(f" • {desc}: {count:,} occurrences")
-
-print_unique_crime_descriptions(crime_df)
-
-crime_category_mapping = {
-    # Violent Crimes
-    "BATTERY - SIMPLE ASSAULT": "Violent Crime",
-    "ASSAULT WITH DEADLY WEAPON, AGGRAVATED ASSAULT": "Violent Crime",
-    "INTIMATE PARTNER - SIMPLE ASSAULT": "Violent Crime",
-    "INTIMATE PARTNER - AGGRAVATED ASSAULT": "Violent Crime",
-    "BATTERY POLICE (SIMPLE)": "Violent Crime",
-    "BATTERY WITH SEXUAL CONTACT": "Violent Crime",
-    "ASSAULT WITH DEADLY WEAPON ON POLICE OFFICER": "Violent Crime",
-    "CRIMINAL THREATS - NO WEAPON DISPLAYED": "Violent Crime",
-    "CRIMINAL HOMICIDE": "Violent Crime",
-    "ATTEMPTED ROBBERY": "Violent Crime",
-    "ROBBERY": "Violent Crime",
-    "OTHER ASSAULT": "Violent Crime",
-    "KIDNAPPING": "Violent Crime",
-    "KIDNAPPING - GRAND ATTEMPT": "Violent Crime",
-    "CHILD ABUSE (PHYSICAL) - SIMPLE ASSAULT": "Violent Crime",
-    "CHILD ABUSE (PHYSICAL) - AGGRAVATED ASSAULT": "Violent Crime",
-    "CRM AGNST CHLD (13 OR UNDER) (14-15 & SUSP 10 YRS OLDER)": "Violent Crime",
-    "RESISTING ARREST": "Violent Crime",
-
-    # Property Crimes
-    "VEHICLE - STOLEN": "Property Crime",
-    "BURGLARY FROM VEHICLE": "Property Crime",
-    "BURGLARY": "Property Crime",
-    "THEFT PLAIN - PETTY ($950 & UNDER)": "Property Crime",
-    "THEFT FROM MOTOR VEHICLE - PETTY ($950 & UNDER)": "Property Crime",
-    "THEFT FROM MOTOR VEHICLE - GRAND ($950.01 AND OVER)": "Property Crime",
-    "THEFT-GRAND ($950.01 & OVER)EXCPT,GUNS,FOWL,LIVESTK,PROD": "Property Crime",
-    "SHOPLIFTING - PETTY THEFT ($950 & UNDER)": "Property Crime",
-    "SHOPLIFTING-GRAND THEFT ($950.01 & OVER)": "Property Crime",
-    "BURGLARY, ATTEMPTED": "Property Crime",
-    "VEHICLE - ATTEMPT STOLEN": "Property Crime",
-    "BIKE - STOLEN": "Property Crime",
-    "BIKE - ATTEMPTED STOLEN": "Property Crime",
-    "THEFT, PERSON": "Property Crime",
-    "BURGLARY FROM VEHICLE, ATTEMPTED": "Property Crime",
-    "THEFT FROM MOTOR VEHICLE - ATTEMPT": "Property Crime",
-    "BOAT - STOLEN": "Property Crime",
-    "PICKPOCKET": "Property Crime",
-    "PICKPOCKET, ATTEMPT": "Property Crime",
-    "PURSE SNATCHING": "Property Crime",
-    "PURSE SNATCHING - ATTEMPT": "Property Crime",
-    "TILL TAP - PETTY ($950 & UNDER)": "Property Crime",
-    "TILL TAP - GRAND THEFT ($950.01 & OVER)": "Property Crime",
-    "THEFT, COIN MACHINE - PETTY ($950 & UNDER)": "Property Crime",
-    "THEFT, COIN MACHINE - GRAND ($950.01 & OVER)": "Property Crime",
-    "THEFT, COIN MACHINE - ATTEMPT": "Property Crime",
-    "THEFT PLAIN - ATTEMPT": "Property Crime",
-    "SHOPLIFTING - ATTEMPT": "Property Crime",
-    "EMBEZZLEMENT, GRAND THEFT ($950.01 & OVER)": "Property Crime",
-    "EMBEZZLEMENT, PETTY THEFT ($950 & UNDER)": "Property Crime",
-    "DRIVING WITHOUT OWNER CONSENT (DWOC)": "Property Crime",
-    "ARSON": "Property Crime",
-
-    # Public Order Crimes
-    "VANDALISM - FELONY ($400 & OVER, ALL CHURCH VANDALISMS)": "Public Order Crime",
-    "VANDALISM - MISDEAMEANOR ($399 OR UNDER)": "Public Order Crime",
-    "TRESPASSING": "Public Order Crime",
-    "BRANDISH WEAPON": "Public Order Crime",
-    "DISTURBING THE PEACE": "Public Order Crime",
-    "DISCHARGE FIREARMS/SHOTS FIRED": "Public Order Crime",
-    "SHOTS FIRED AT INHABITED DWELLING": "Public Order Crime",
-    "SHOTS FIRED AT MOVING VEHICLE, TRAIN OR AIRCRAFT": "Public Order Crime",
-    "THROWING OBJECT AT MOVING VEHICLE": "Public Order Crime",
-    "ILLEGAL DUMPING": "Public Order Crime",
-    "BLOCKING DOOR INDUCTION CENTER": "Public Order Crime",
-    "FAILURE TO YIELD": "Public Order Crime",
-    "FAILURE TO DISPERSE": "Public Order Crime",
-    "PEEPING TOM": "Public Order Crime",
-    "PROWLER": "Public Order Crime",
-    "DISRUPT SCHOOL": "Public Order Crime",
-    "WEAPONS POSSESSION/BOMBING": "Public Order Crime",
-    "FIREARMS EMERGENCY PROTECTIVE ORDER (FIREARMS EPO)": "Public Order Crime",
-    "FIREARMS RESTRAINING ORDER (FIREARMS RO)": "Public Order Crime",
-
-    # Sexual Offenses
-    "RAPE, FORCIBLE": "Sexual Offense",
-    "RAPE, ATTEMPTED": "Sexual Offense",
-    "ORAL COPULATION": "Sexual Offense",
-    "SODOMY/SEXUAL CONTACT B/W PENIS OF ONE PERS TO ANUS OTH": "Sexual Offense",
-    "SEXUAL PENETRATION W/FOREIGN OBJECT": "Sexual Offense",
-    "SEX,UNLAWFUL(INC MUTUAL CONSENT, PENETRATION W/ FRGN OBJ": "Sexual Offense",
-    "LEWD/LASCIVIOUS ACTS WITH CHILD": "Sexual Offense",
-    "LEWD CONDUCT": "Sexual Offense",
-    "CHILD ANNOYING (17YRS & UNDER)": "Sexual Offense",
-    "INDECENT EXPOSURE": "Sexual Offense",
-    "INCEST (SEXUAL ACTS BETWEEN BLOOD RELATIVES)": "Sexual Offense",
-    "BEASTIALITY, CRIME AGAINST NATURE SEXUAL ASSLT WITH ANIM": "Sexual Offense",
-
-    # White Collar Crimes
-    "THEFT OF IDENTITY": "White Collar Crime",
-    "CREDIT CARDS, FRAUD USE ($950.01 & OVER)": "White Collar Crime",
-    "CREDIT CARDS, FRAUD USE ($950 & UNDER": "White Collar Crime",
-    "BUNCO, GRAND THEFT": "White Collar Crime",
-    "BUNCO, PETTY THEFT": "White Collar Crime",
-    "BUNCO, ATTEMPT": "White Collar Crime",
-    "DOCUMENT FORGERY / STOLEN FELONY": "White Collar Crime",
-    "DOCUMENT WORTHLESS ($200.01 & OVER)": "White Collar Crime",
-    "DOCUMENT WORTHLESS ($200 & UNDER)": "White Collar Crime",
-    "DISHONEST EMPLOYEE - GRAND THEFT": "White Collar Crime",
-    "DISHONEST EMPLOYEE - PETTY THEFT": "White Collar Crime",
-    "DISHONEST EMPLOYEE ATTEMPTED THEFT": "White Collar Crime",
-    "DEFRAUDING INNKEEPER/THEFT OF SERVICES, $950 & UNDER": "White Collar Crime",
-    "DEFRAUDING INNKEEPER/THEFT OF SERVICES, OVER $950.01": "White Collar Crime",
-    "EXTORTION": "White Collar Crime",
-    "EMBEZZLEMENT, GRAND THEFT ($950.01 & OVER)": "White Collar Crime",
-    "COUNTERFEIT": "White Collar Crime",
-    "FORGERY": "White Collar Crime",
-    "UNAUTHORIZED COMPUTER ACCESS": "White Collar Crime",
-    "GRAND THEFT / INSURANCE FRAUD": "White Collar Crime",
-
-    # Other / Miscellaneous
-    "OTHER MISCELLANEOUS CRIME": "Other",
-    "VIOLATION OF RESTRAINING ORDER": "Other",
-    "VIOLATION OF TEMPORARY RESTRAINING ORDER": "Other",
-    "VIOLATION OF COURT ORDER": "Other",
-    "SEX OFFENDER REGISTRANT OUT OF COMPLIANCE": "Other",
-    "CHILD NEGLECT (SEE 300 W.I.C.)": "Other",
-    "CHILD STEALING": "Other",
-    "CHILD ABANDONMENT": "Other",
-    "CHILD PORNOGRAPHY": "Other",
-    "FALSE IMPRISONMENT": "Other",
-    "FALSE POLICE REPORT": "Other",
-    "CONTEMPT OF COURT": "Other",
-    "THREATENING PHONE CALLS/LETTERS": "Other",
-    "LYNCHING": "Other",
-    "LYNCHING - ATTEMPTED": "Other",
-    "HUMAN TRAFFICKING - COMMERCIAL SEX ACTS": "Other",
-    "HUMAN TRAFFICKING - INVOLUNTARY SERVITUDE": "Other",
-    "PANDERING": "Other",
-    "PIMPING": "Other",
-    "CONSPIRACY": "Other",
-    "CONTRIBUTING": "Other",
-    "BIGAMY": "Other",
-    "BRIBERY": "Other",
-    "TRAIN WRECKING": "Other",
-    "DRUGS, TO A MINOR": "Other",
-    "REPLICA FIREARMS(SALE,DISPLAY,MANUFACTURE OR DISTRIBUTE)": "Other",
-    "SEX OFFENDER REGISTRANT OUT OF COMPLIANCE": "Other",
-    "DRUNK ROLL": "Other",
-    "DRUNK ROLL - ATTEMPT": "Other"
-}
-
-# Apply mapping
-crime_df['Crime_Category'] = crime_df['Crm Cd Desc'].map(crime_category_mapping).fillna("Other")
-
-# Summary
-print("\n=== Category Counts ===")
-category_counts = crime_df['Crime_Category'].value_counts()
-for category, count in category_counts.items():
-    print(f" • {category:<20}: {count:,}")
-
-
-# ------------------------ STEP 9: Export to CSV ------------------------ #
-print("\n=== STEP 9: Exporting Cleaned Data ===")
-
-output_dir = r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output"
-os.makedirs(output_dir, exist_ok=True)
-
-output_df = crime_df.head(5000)
-output_path = os.path.join(output_dir, "Output.csv")
-output_df.to_csv(output_path, index=False)
-
-print(f"\n✅ Exported first 5,000 records to:\n{output_path}")
-print(f" - Final dataset shape: {crime_df.shape}")
-print(" - Column Preview:", crime_df.columns.tolist())
-
-
-# ------------------------ STEP 10: Export to Pickle ------------------------ #
-print("\n=== STEP 10: Export to Pickle ===")
-# Save the cleaned dataframe
-crime_df.to_pickle(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\crime_df_cleaned.pkl")
-print("✅ DataFrame saved as Pickle file.")
-
-
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from project_paths import (
+    CRIME_CSV, MO_CODES_CSV, OUTPUT_DIR, CLEANED_PICKLE, CLEANED_MO_PICKLE, CLEANED_DATASET_DIR, CLEANED_MO_PARQUET,
+    RECORD_INDEX_PARQUET, STAGE_CACHE_DIR
+)
+from crime_cleaning import (
+    age_labels, load_mo_code_mapping, fill_missing_values, drop_duplicate_records, parse_dates,
+    convert_time_occ, clean_demographics, expand_mo_codes, map_crime_categories, scan_raw_chunks, clean_chunk,
+    mo_code_width, crime_code_pairs, compile_crime_code_lookup, unmapped_crime_codes, AMBIGUOUS_CODE
+)
+from mo_codes import build_mo_long, dr_no_keys
+from crime_parallel import start_worker_pool, clean_in_parallel
+from crime_stages import StageGraph, cleaning_stages
+from step_metrics import StepMetrics
+from crime_schema import (
+    apply_output_schema, data_category_columns, memory_mb, read_raw_crime_csv, iter_raw_crime_csv, RAW_COLUMN_NAMES
+)
+from crime_dataset import (
+    write_crime_dataset, compact_crime_dataset, write_mo_long, MoLongWriter, dataset_columns, dataset_is_typed,
+    record_hashes, build_record_index, write_record_index, load_record_index, find_delta, merge_into_crime_dataset,
+    merge_mo_long, load_crime_data
+)
+from crime_rollup import saved_crime_rollup, save_crime_rollup, SOURCE_COLUMNS as ROLLUP_COLUMNS
+
+PREVIEW_ROWS = 5000
+
+metrics = StepMetrics("Data Cleaning and Curation Pipeline")
+
+
+def print_missing_counts(missing_counts):
+    missing_total = missing_counts.sum()
+    print(f" - Total missing values before fill: {missing_total:,}")
+    for col, count in missing_counts.items():
+        if count > 0:
+            print(f"   • {col}: {count:,} missing")
+
+
+def print_age_group_counts(age_group_counts):
+    print("\n=== Victim Age Group Distribution ===")
+    for group, count in age_group_counts.items():
+        print(f" • {group}: {count:,} victims")
+
+
+def print_unique_crime_descriptions(value_counts):
+    print("\n=== Unique Values in 'Crm Cd Desc' ===")
+    value_counts = value_counts.sort_values(ascending=False)
+    print(f" - Total Unique Descriptions: {len(value_counts)}\n")
+    for desc, count in value_counts.items():
+        print(f" • {desc}: {count:,} occurrences")
+
+
+def print_category_counts(category_counts, multi_category):
+    print("\n=== Category Counts ===")
+    for category, count in category_counts.items():
+        print(f" • {category:<20}: {count:,}")
+    print(f" - Incidents whose Crm Cd 1-4 span more than one category (Crime_Category_Mask): {multi_category:,}")
+
+
+def multi_category_count(category_mask):
+    # More than one bit set
+    category_mask = np.asarray(category_mask)
+    return int(((category_mask & (category_mask - 1)) != 0).sum())
+
+
+def print_unmapped_crime_codes(primary_counts, secondary_counts):
+    print("\n=== Crime Codes Without a Category ===")
+    print(f" - Incidents whose Crm Cd Desc has no category mapping (counted as 'Other'): {primary_counts.sum():,}")
+    for (code, desc), count in primary_counts.sort_values(ascending=False).items():
+        print(f"   • {code} {desc}: {count:,} incidents")
+    print(f" - Crm Cd 1-4 codes with no single category (left out of Crime_Category_Mask): {secondary_counts.sum():,}")
+    for code, count in secondary_counts.sort_values(ascending=False).items():
+        print(f"   • {code}: {count:,} occurrences")
+
+
+def combine_counts(count_parts):
+    # Add up per-chunk value_counts (the index may be a MultiIndex)
+    counts = pd.concat(count_parts)
+    return counts.groupby(level=list(range(counts.index.nlevels))).sum()
+
+
+def print_code_lookup(code_lookup, unmapped_pairs):
+    print(f" - Compiled crime code lookup: {(code_lookup[:-1] >= 0).sum():,} codes, "
+          f"{len(unmapped_pairs):,} without a category mapping")
+    ambiguous = np.flatnonzero(code_lookup[:-1] == AMBIGUOUS_CODE)
+    if len(ambiguous):
+        print(f"   ⚠️ {len(ambiguous):,} codes seen with descriptions in different categories (categorised by each "
+              f"row's own description): {', '.join(str(code) for code in ambiguous)}")
+
+
+def clean_serial(crime_df, mo_code_mapping, code_lookup, engine, compact_mo):
+    # ------------------------ STEP 2: Clean Missing Values ------------------------ #
+    metrics.step("STEP 2: Cleaning Missing and Blank Values", rows=len(crime_df))
+
+    print_missing_counts(crime_df.isna().sum())
+    crime_df = fill_missing_values(crime_df)
+
+    print(f" - All missing and blank values filled. Remaining NAs: {crime_df.isna().sum().sum()}")
+
+    # ------------------------ STEP 3: Drop Duplicates ------------------------ #
+    metrics.step("STEP 3: Removing Duplicate Records by DR_NO", rows=len(crime_df))
+
+    before_dupes = len(crime_df)
+    crime_df = drop_duplicate_records(crime_df)
+    after_dupes = len(crime_df)
+
+    print(f" - Removed {before_dupes - after_dupes:,} duplicate records")
+
+    # ------------------------ STEP 4: Parse and Format Dates ------------------------ #
+    metrics.step("STEP 4: Parsing and Formatting Dates", rows=len(crime_df))
+
+    crime_df = parse_dates(crime_df)
+
+    print(" - Dates converted to MM/DD/YYYY format")
+    print(" - Weekday and month extracted as text")
+    print(crime_df[['Date Rptd', 'DATE OCC', 'DayOfWeek', 'Month']].head(10))
+
+    # ------------------------ STEP 5: Convert TIME OCC ------------------------ #
+    metrics.step("STEP 5: Converting TIME OCC to 12-Hour Format", rows=len(crime_df))
+
+    crime_df = convert_time_occ(crime_df, engine)
+    print(" - Converted TIME OCC to 12-hour format")
+    print(crime_df[['TIME OCC']].head())
+
+    # ------------------------ STEP 6: Clean Demographics ------------------------ #
+    metrics.step("STEP 6: Cleaning Victim Age, Sex, and Descent", rows=len(crime_df))
+
+    crime_df = clean_demographics(crime_df)
+    print_age_group_counts(crime_df['Vict Age Group'].value_counts().sort_index())
+
+    # ------------------------ STEP 7: Expanding MO Codes into Descriptions ------------------------ #
+    metrics.step("STEP 7: Expanding MO Codes into Descriptions", rows=len(crime_df))
+
+    mo_long = build_mo_long(crime_df, mo_code_mapping)
+    print(f" - Compact MO table: {len(mo_long):,} (DR_NO, position, code) rows")
+
+    if compact_mo:
+        print(" - Skipping wide MO_Desc columns (rebuild them with mo_codes.attach_mo_descriptions)")
+    else:
+        crime_df, mo_desc_columns = expand_mo_codes(crime_df, mo_code_mapping, engine=engine)
+
+        print(f" - Total MO Description columns created: {len(mo_desc_columns)}")
+        print(" - Sample MO Descriptions:")
+        print(crime_df[["Mocodes"] + mo_desc_columns].head())
+
+    # ------------------------ STEP 8: Crime Category Mapping ------------------------ #
+    metrics.step("STEP 8: Creating Crime Severity Categories", rows=len(crime_df))
+
+    print_unique_crime_descriptions(crime_df['Crm Cd Desc'].value_counts(dropna=False))
+    crime_df = map_crime_categories(crime_df, code_lookup)
+    print_category_counts(crime_df['Crime_Category'].value_counts(),
+                          multi_category_count(crime_df['Crime_Category_Mask']))
+    print_unmapped_crime_codes(*unmapped_crime_codes(crime_df, code_lookup))
+
+    return crime_df, mo_long
+
+
+def clean_parallel(crime_df, mo_code_mapping, code_lookup, engine, compact_mo, workers):
+    # Same STEP 2-8 as clean_serial, with the row-wise work spread over a process pool
+    metrics.step(f"STEP 2-8: Cleaning in Parallel ({workers} workers)", rows=len(crime_df))
+
+    print_missing_counts(crime_df.isna().sum())
+    before_dupes = len(crime_df)
+    max_mo_codes = mo_code_width(crime_df['Mocodes'])
+    with start_worker_pool(workers) as executor:
+        crime_df, mo_long = clean_in_parallel(crime_df, mo_code_mapping, max_mo_codes, executor, workers,
+                                              engine=engine, wide_mo=not compact_mo, code_lookup=code_lookup)
+
+    print(f" - Removed {before_dupes - len(crime_df):,} duplicate records")
+    print(f" - Compact MO table: {len(mo_long):,} (DR_NO, position, code) rows")
+    print_age_group_counts(crime_df['Vict Age Group'].value_counts().sort_index())
+    print_unique_crime_descriptions(crime_df['Crm Cd Desc'].value_counts(dropna=False))
+    print_category_counts(crime_df['Crime_Category'].value_counts(),
+                          multi_category_count(crime_df['Crime_Category_Mask']))
+    print_unmapped_crime_codes(*unmapped_crime_codes(crime_df, code_lookup))
+    return crime_df, mo_long
+
+
+def export_cleaned(crime_df, mo_long, raw_hashes, save_pickle):
+    # ------------------------ STEP 10: Export to CSV ------------------------ #
+    metrics.step("STEP 10: Exporting Cleaned Data", rows=len(crime_df))
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    output_df = crime_df.head(PREVIEW_ROWS)
+    output_path = os.path.join(OUTPUT_DIR, "Output.csv")
+    output_df.to_csv(output_path, index=False)
+
+    print(f"\n✅ Exported first {PREVIEW_ROWS:,} records to:\n{output_path}")
+    print(f" - Final dataset shape: {crime_df.shape}")
+    print(" - Column Preview:", crime_df.columns.tolist())
+
+    # ------------------------ STEP 11: Export to Parquet ------------------------ #
+    metrics.step("STEP 11: Export to Parquet Dataset", rows=len(crime_df))
+    # Save the cleaned dataframe, partitioned by year and AREA
+    write_crime_dataset(crime_df)
+    write_mo_long(mo_long)
+    write_record_index(build_record_index(crime_df, raw_hashes))
+    print(f"✅ DataFrame saved as Parquet dataset:\n{CLEANED_DATASET_DIR}")
+    print(f"✅ Compact MO codes saved to:\n{CLEANED_MO_PARQUET}")
+    print(f"✅ Record index saved to:\n{RECORD_INDEX_PARQUET}")
+
+    if save_pickle:
+        crime_df.to_pickle(CLEANED_PICKLE)
+        mo_long.to_pickle(CLEANED_MO_PICKLE)
+        print("✅ DataFrame also saved as Pickle file.")
+
+
+def run_in_memory(engine, compact_mo, save_pickle, legacy_strings, workers=1):
+    # ------------------------ STEP 1: Load Datasets ------------------------ #
+    metrics.step("STEP 1: Load Datasets")
+
+    # Column types come from crime_schema.RAW_COLUMNS (the Data Dictionary), not from inference
+    crime_df = read_raw_crime_csv(CRIME_CSV)
+    raw_hashes = record_hashes(crime_df)
+    mo_code_mapping = load_mo_code_mapping(MO_CODES_CSV)
+    code_lookup, unmapped_pairs = compile_crime_code_lookup(crime_code_pairs(crime_df))
+
+    metrics.rows(len(crime_df))
+    print(f" - Loaded crime dataset with {len(crime_df):,} rows and {crime_df.shape[1]} columns")
+    print(f" - Loaded MO codes with {len(mo_code_mapping):,} entries")
+    print_code_lookup(code_lookup, unmapped_pairs)
+
+    if workers > 1:
+        crime_df, mo_long = clean_parallel(crime_df, mo_code_mapping, code_lookup, engine, compact_mo, workers)
+    else:
+        crime_df, mo_long = clean_serial(crime_df, mo_code_mapping, code_lookup, engine, compact_mo)
+
+    # ------------------------ STEP 9: Typed Output Schema ------------------------ #
+    metrics.step("STEP 9: Applying Typed Output Schema", rows=len(crime_df))
+
+    if legacy_strings:
+        print(" - Skipped (--legacy-strings): every column stays text with 'Unknown' fillers")
+    else:
+        memory_before = memory_mb(crime_df)
+        crime_df = apply_output_schema(crime_df, crime_descriptions=unmapped_pairs['Crm Cd Desc'])
+        print(" - Numeric, date and categorical dtypes applied; 'Unknown' is now a missing value")
+        print(f" - In-memory size: {memory_before:,.1f} MB -> {memory_mb(crime_df):,.1f} MB")
+
+    export_cleaned(crime_df, mo_long, raw_hashes, save_pickle)
+
+
+def run_cached(engine, compact_mo, save_pickle, legacy_strings):
+    # STEP 1-9 as a DAG of cached stages (crime_stages.py): only stages whose code, parameters or
+    # inputs changed since the last run are recomputed, the rest come from Output/stage_cache
+    metrics.step("STEP 1-9: Cleaning with Cached Stages")
+
+    graph = StageGraph(cleaning_stages(engine, compact_mo, legacy_strings))
+    crime_df, mo_long = graph.get('output')
+    raw_hashes = graph.get('hashes')
+    code_lookup, _ = graph.get('code_lookup')
+    metrics.rows(len(crime_df))
+
+    for name, status, seconds in graph.report:
+        print(f" • {name:<13}: {status} ({seconds:.2f}s)")
+    print(f" - Stage cache: {STAGE_CACHE_DIR}")
+    print_unmapped_crime_codes(*unmapped_crime_codes(crime_df, code_lookup))
+
+    export_cleaned(crime_df, mo_long, raw_hashes, save_pickle)
+
+
+def run_streaming(chunk_size, engine, compact_mo, legacy_strings, workers=1):
+    # Same STEP 2-9 as run_in_memory, but only one chunk of the CSV is held at a time.
+    # Summaries are accumulated across chunks and every cleaned chunk is appended to the Parquet dataset.
+
+    # ------------------------ STEP 1: Scan Datasets ------------------------ #
+    metrics.step(f"STEP 1: Scan Datasets (streaming, {chunk_size:,} rows per chunk)")
+
+    scan_chunks = iter_raw_crime_csv(CRIME_CSV, chunk_size, columns=['Mocodes', 'Crm Cd', 'Crm Cd Desc'])
+    max_mo_codes, total_rows, code_pairs = scan_raw_chunks(scan_chunks)
+    mo_code_mapping = load_mo_code_mapping(MO_CODES_CSV)
+    code_lookup, unmapped_pairs = compile_crime_code_lookup(code_pairs)
+
+    metrics.rows(total_rows)
+    print(f" - Crime dataset has {total_rows:,} rows and {len(RAW_COLUMN_NAMES)} columns")
+    print(f" - Loaded MO codes with {len(mo_code_mapping):,} entries")
+    print(f" - MO Description columns per chunk: {max_mo_codes}")
+    print_code_lookup(code_lookup, unmapped_pairs)
+
+    # ------------------------ STEP 2-9: Clean Each Chunk ------------------------ #
+    metrics.step("STEP 2-9: Cleaning Chunks")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    preview_path = os.path.join(OUTPUT_DIR, "Output.csv")
+
+    mo_writer = MoLongWriter()
+    executor = start_worker_pool(workers) if workers > 1 else None
+    index_parts = []
+    seen_dr_nos = set()
+    missing_counts = pd.Series(0, index=RAW_COLUMN_NAMES, dtype='int64')
+    age_group_counts = pd.Series(0, index=age_labels + ['Unknown'], dtype='int64')
+    crime_desc_counts = pd.Series(dtype='int64')
+    category_counts = pd.Series(dtype='int64')
+    unmapped_parts = []
+    category_values = {}
+    multi_category = 0
+    rows_read = 0
+    rows_written = 0
+    columns = None
+
+    reader = iter_raw_crime_csv(CRIME_CSV, chunk_size)
+    for chunk_number, chunk in enumerate(reader, start=1):
+        rows_read += len(chunk)
+        missing_counts = missing_counts.add(chunk.isna().sum(), fill_value=0).astype('int64')
+        raw_hashes = record_hashes(chunk)
+
+        if executor is None:
+            chunk = clean_chunk(chunk, mo_code_mapping, max_mo_codes, seen_dr_nos, engine, wide_mo=not compact_mo,
+                                code_lookup=code_lookup)
+            mo_long = build_mo_long(chunk, mo_code_mapping)
+        else:
+            chunk, mo_long = clean_in_parallel(chunk, mo_code_mapping, max_mo_codes, executor, workers, seen_dr_nos,
+                                               engine, wide_mo=not compact_mo, code_lookup=code_lookup)
+
+        age_group_counts += chunk['Vict Age Group'].value_counts().reindex(age_group_counts.index, fill_value=0)
+        crime_desc_counts = crime_desc_counts.add(chunk['Crm Cd Desc'].value_counts(dropna=False), fill_value=0).astype('int64')
+        category_counts = category_counts.add(chunk['Crime_Category'].value_counts(), fill_value=0).astype('int64')
+        unmapped_parts.append(unmapped_crime_codes(chunk, code_lookup))
+        multi_category += multi_category_count(chunk['Crime_Category_Mask'])
+
+        if not legacy_strings:
+            # Same Crm Cd Desc categories in every chunk as in an in-memory run
+            chunk = apply_output_schema(chunk, crime_descriptions=unmapped_pairs['Crm Cd Desc'])
+            for col in data_category_columns(chunk.columns):
+                category_values.setdefault(col, set()).update(chunk[col].cat.categories)
+
+        first_chunk = columns is None
+        columns = chunk.columns.tolist()
+        write_crime_dataset(chunk, part_name=f"chunk{chunk_number:05d}", overwrite=first_chunk)
+        mo_writer.write(mo_long)
+        index_parts.append(build_record_index(chunk, raw_hashes))
+        if rows_written < PREVIEW_ROWS:
+            chunk.head(PREVIEW_ROWS - rows_written).to_csv(preview_path, mode='w' if first_chunk else 'a',
+                                                          header=first_chunk, index=False)
+        rows_written += len(chunk)
+
+        print(f" - Chunk {chunk_number}: {rows_read:,}/{total_rows:,} rows read, {rows_written:,} kept")
+
+    metrics.rows(rows_read)
+    mo_writer.close()
+    if executor is not None:
+        executor.shutdown()
+    # Every partition gets the categories of the whole run, not those of the chunks it was written from
+    compact_crime_dataset(categories=category_values)
+    write_record_index(pd.concat(index_parts, ignore_index=True))
+
+    # ------------------------ Summaries ------------------------ #
+    metrics.close()
+    print("\n=== STEP 2: Missing and Blank Values ===")
+    print_missing_counts(missing_counts)
+
+    print("\n=== STEP 3: Removing Duplicate Records by DR_NO ===")
+    print(f" - Removed {rows_read - rows_written:,} duplicate records")
+
+    print("\n=== STEP 6: Cleaning Victim Age, Sex, and Descent ===")
+    print_age_group_counts(age_group_counts)
+
+    print("\n=== STEP 8: Creating Crime Severity Categories ===")
+    print_unique_crime_descriptions(crime_desc_counts)
+    print_category_counts(category_counts.sort_values(ascending=False), multi_category)
+    if unmapped_parts:
+        primary_parts, secondary_parts = zip(*unmapped_parts)
+        print_unmapped_crime_codes(combine_counts(primary_parts), combine_counts(secondary_parts))
+
+    # ------------------------ STEP 10: Export to CSV ------------------------ #
+    print("\n=== STEP 10: Exporting Cleaned Data ===")
+    print(f"\n✅ Exported first {min(PREVIEW_ROWS, rows_written):,} records to:\n{preview_path}")
+    print(f"✅ Streamed full cleaned dataset to:\n{CLEANED_DATASET_DIR}")
+    print(f"✅ Streamed compact MO codes to:\n{CLEANED_MO_PARQUET}")
+    print(f"✅ Record index saved to:\n{RECORD_INDEX_PARQUET}")
+    print(f" - Final dataset shape: ({rows_written}, {len(columns or [])})")
+    print(" - Column Preview:", columns)
+
+
+def run_incremental(engine, workers=1):
+    # Only clean the rows that are new or changed since the last run (by DR_NO and a hash of the raw row)
+    # and merge them into the partitions of the existing dataset. Falls back to a full run when there is
+    # nothing to merge into yet.
+
+    # ------------------------ STEP 1: Load Datasets and Record Index ------------------------ #
+    metrics.step("STEP 1: Load Datasets and Record Index (incremental)")
+
+    record_index = load_record_index()
+    if record_index is None or not os.path.exists(CLEANED_DATASET_DIR) or not dataset_is_typed():
+        print(" - No typed dataset and record index from an earlier run; doing a full rebuild instead")
+        return run_in_memory(engine, compact_mo=False, save_pickle=False, legacy_strings=False, workers=workers)
+
+    existing_columns = dataset_columns()
+    mo_width = sum(col.startswith('MO_Desc_') for col in existing_columns)
+    raw_df = read_raw_crime_csv(CRIME_CSV)
+    mo_code_mapping = load_mo_code_mapping(MO_CODES_CSV)
+    # Compiled from the whole extract, so the delta's secondary codes are classified as in a full run
+    code_lookup, unmapped_pairs = compile_crime_code_lookup(crime_code_pairs(raw_df))
+
+    metrics.rows(len(raw_df))
+    print(f" - Loaded crime dataset with {len(raw_df):,} rows")
+    print(f" - Record index holds {len(record_index):,} curated records")
+    print_code_lookup(code_lookup, unmapped_pairs)
+
+    # ------------------------ STEP 2: Find New and Changed Records ------------------------ #
+    metrics.step("STEP 2: Finding New and Changed Records", rows=len(raw_df))
+
+    raw_df = raw_df.drop_duplicates(subset='DR_NO')
+    raw_hashes = record_hashes(raw_df)
+    is_new, is_changed = find_delta(raw_df, raw_hashes, record_index)
+    delta_df = raw_df[is_new | is_changed].copy()
+
+    print(f" - New records: {is_new.sum():,}")
+    print(f" - Changed records: {is_changed.sum():,}")
+    print(f" - Unchanged records skipped: {len(raw_df) - len(delta_df):,}")
+
+    if delta_df.empty:
+        print("\n✅ Dataset is already up to date")
+        return
+    if mo_width and mo_code_width(delta_df['Mocodes']) > mo_width:
+        print(f" - New records need more than {mo_width} MO_Desc columns; doing a full rebuild instead")
+        return run_in_memory(engine, compact_mo=False, save_pickle=False, legacy_strings=False, workers=workers)
+
+    # ------------------------ STEP 3-9: Clean the Delta ------------------------ #
+    metrics.step("STEP 3-9: Cleaning New and Changed Records", rows=len(delta_df))
+
+    delta_hashes = raw_hashes.loc[delta_df.index]
+    if workers > 1:
+        with start_worker_pool(workers) as executor:
+            delta_df, delta_mo_long = clean_in_parallel(delta_df, mo_code_mapping, mo_width, executor, workers,
+                                                        engine=engine, wide_mo=bool(mo_width), code_lookup=code_lookup)
+    else:
+        delta_df = clean_chunk(delta_df, mo_code_mapping, mo_width, engine=engine, wide_mo=bool(mo_width),
+                               code_lookup=code_lookup)
+        delta_mo_long = build_mo_long(delta_df, mo_code_mapping)
+    delta_df = apply_output_schema(delta_df, crime_descriptions=unmapped_pairs['Crm Cd Desc'])[existing_columns]
+
+    print(f" - Cleaned {len(delta_df):,} records")
+
+    # ------------------------ STEP 10: Merge into Parquet Dataset ------------------------ #
+    metrics.step("STEP 10: Merging into Parquet Dataset", rows=len(delta_df))
+
+    delta_index = build_record_index(delta_df, delta_hashes)
+    replaced = record_index[record_index['DR_NO'].isin(delta_index['DR_NO'])]
+
+    # The temporal rollup is patched rather than rebuilt: read the versions of the changed records that
+    # are about to be replaced, so their counts can be taken out again
+    rollup = saved_crime_rollup()
+    if rollup is not None and not replaced.empty:
+        replaced_rows = load_crime_data(columns=['DR_NO'] + ROLLUP_COLUMNS, years=replaced['year'].dropna().unique(),
+                                        areas=replaced['area'].unique())
+        replaced_rows = replaced_rows[np.isin(dr_no_keys(replaced_rows['DR_NO']), replaced['DR_NO'].to_numpy())]
+    else:
+        replaced_rows = None
+
+    partitions_rewritten = merge_into_crime_dataset(delta_df, zip(replaced['year'], replaced['area']))
+    merge_mo_long(delta_mo_long, delta_df['DR_NO'])
+
+    record_index = record_index[~record_index['DR_NO'].isin(delta_index['DR_NO'])]
+    write_record_index(pd.concat([record_index, delta_index], ignore_index=True))
+
+    print(f"✅ Rewrote {partitions_rewritten:,} partitions of:\n{CLEANED_DATASET_DIR}")
+    print("✅ Updated compact MO codes and record index")
+    if rollup is not None:
+        save_crime_rollup(rollup.update(added=delta_df, removed=replaced_rows))
+        removed_count = 0 if replaced_rows is None else len(replaced_rows)
+        print(f"✅ Updated temporal rollup: +{len(delta_df):,} / -{removed_count:,} incidents")
+    print(f" - Curated records: {len(record_index) + len(delta_index):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean and curate the LAPD crime dataset.")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows instead of loading it all at once")
+    parser.add_argument("--engine", choices=["vectorized", "apply"], default="vectorized",
+                        help="TIME OCC / Mocodes conversion: vectorized (default) or the original row-wise apply")
+    parser.add_argument("--compact-mo", action="store_true",
+                        help="Leave out the wide MO_Desc_N columns; the compact MO table is always written")
+    parser.add_argument("--pickle", action="store_true",
+                        help="Also write the legacy crime_df_cleaned.pkl (in-memory mode only)")
+    parser.add_argument("--legacy-strings", action="store_true",
+                        help="Keep every column as text with 'Unknown' fillers instead of the typed schema")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Clean with this many worker processes (default 1 = single process)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Run the cleaning steps as cached stages; only stages whose inputs or code changed rerun")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only clean new/changed records and merge them into the existing dataset")
+    args = parser.parse_args()
+
+    if args.cache:
+        if args.chunk_size or args.incremental or args.workers > 1:
+            parser.error("--cache runs in memory and can't be combined with --chunk-size, --incremental or --workers")
+        run_cached(args.engine, args.compact_mo, args.pickle, args.legacy_strings)
+    elif args.incremental:
+        if args.legacy_strings or args.chunk_size:
+            parser.error("--incremental works on the typed dataset and can't be combined with "
+                         "--legacy-strings or --chunk-size")
+        run_incremental(args.engine, args.workers)
+    elif args.chunk_size:
+        run_streaming(args.chunk_size, args.engine, args.compact_mo, args.legacy_strings, args.workers)
+    else:
+        run_in_memory(args.engine, args.compact_mo, args.pickle, args.legacy_strings, args.workers)
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
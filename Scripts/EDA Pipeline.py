@@ -1,272 +1,241 @@
-import pandas as pd
-import os
-import matplotlib
-matplotlib.use('TkAgg')  # or 'QtAgg' or 'Agg'
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker  # <-- add this to format the numbers
-import seaborn as sns
-
-# ------------------------ STEP 1: Load Pickle File ------------------------ #
-print("\n=== STEP 1: Load Pickle File ===")
-# Load the cleaned dataframe
-crime_df = pd.read_pickle(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\crime_df_cleaned.pkl")
-print("✅ DataFrame loaded from Pickle file.")
-
-print("\n=== Dataset Overview ===")
-
-# Print shape
-rows, cols = crime_df.shape
-print(f"\n➡️ The dataset contains {rows:,} rows and {cols:,} columns.")
-
-# Print info (types and missing values overview)
-print("\n➡️ Data Types and Non-Null Counts:")
-crime_df.info()
-
-# Print first few rows
-print("\n➡️ First 5 Rows of the Dataset:")
-print(crime_df.head())
-
-# Print basic descriptive statistics
-print("\n➡️ Descriptive Statistics (including all columns):")
-with pd.option_context('display.max_columns', None):  # Show all columns without truncation
-    print(crime_df.describe(include='all'))
-
-# Print missing values
-print("\n➡️ Missing Values per Column:")
-missing_values = crime_df.isnull().sum()
-missing_values = missing_values[missing_values > 0].sort_values(ascending=False)
-
-if not missing_values.empty:
-    print(missing_values.apply(lambda x: f"{x:,} missing"))
-else:
-    print("✅ No missing values detected.")
-
-print("\n=== Statistical Summary ===")
-
-# -------------------- Numerical Features -------------------- #
-print("\n➡️ Descriptive Statistics for Numerical Variables:")
-
-# Select numerical columns only
-numerical_cols = crime_df.select_dtypes(include=['number']).columns.tolist()
-
-# If there are numerical columns
-if numerical_cols:
-    num_summary = crime_df[numerical_cols].describe()
-    with pd.option_context('display.float_format', '{:,.2f}'.format):  # Format numbers nicely
-        print(num_summary)
-else:
-    print("⚠️ No numerical columns found.")
-
-# -------------------- Categorical Features -------------------- #
-print("\n➡️ Value Counts for Categorical Variables:")
-
-# Select categorical columns only
-categorical_cols = crime_df.select_dtypes(include=['object', 'category']).columns.tolist()
-
-# If there are categorical columns
-if categorical_cols:
-    for col in categorical_cols:
-        print(f"\n🔹 {col} (Top 5 most frequent values):")
-        value_counts = crime_df[col].value_counts(dropna=False).head(5)
-        print(value_counts.apply(lambda x: f"{x:,} occurrences"))
-else:
-    print("⚠️ No categorical columns found.")
-
-print("\n=== Feature Distributions ===")
-
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-import os
-
-# Save directory
-save_dir = r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts"
-os.makedirs(save_dir, exist_ok=True)
-
-print("\n=== Step 2: Feature Distributions for Key Variables ===")
-
-# Function to save and show plots
-def save_and_show_plot(filename):
-    plt.tight_layout()
-    plt.savefig(os.path.join(save_dir, filename))
-    plt.show()
-
-# ----------------- 1. DR_NO ----------------- #
-print("\n➡️ DR_NO: No plot needed (unique identifier).")
-
-# ----------------- 2. DATE OCC ----------------- #
-print("\n➡️ DATE OCC: Distribution of crime occurrences over time.")
-plt.figure(figsize=(10,5))
-crime_df['DATE OCC'] = pd.to_datetime(crime_df['DATE OCC'], errors='coerce')  # ensure datetime
-crime_df['DATE OCC'].dt.to_period('M').value_counts().sort_index().plot(kind='line')
-plt.title('Number of Crimes Over Time (Date of Occurrence)')
-plt.xlabel('Month')
-plt.ylabel('Number of Crimes')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Date_Occurrence_Distribution.png")
-plt.show()
-
-# ----------------- 6. Crm Cd Desc ----------------- #
-print("\n➡️ Crm Cd Desc: Top Crime Descriptions.")
-plt.figure(figsize=(10,6))
-order = crime_df['Crm Cd Desc'].value_counts().head(10).index
-sns.countplot(data=crime_df, y='Crm Cd Desc', order=order)
-plt.title('Top 10 Crime Descriptions')
-plt.xlabel('Number of Crimes')
-plt.ylabel('Crime Description')
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Crime_Description_Distribution.png")
-plt.show()
-
-# ----------------- 8. Vict Age ----------------- #
-print("\n➡️ Vict Age: Distribution of Victim Ages.")
-plt.figure(figsize=(8,5))
-sns.histplot(crime_df['Vict Age'].dropna(), bins=30, kde=True)
-plt.title('Distribution of Victim Ages')
-plt.xlabel('Age')
-plt.ylabel('Number of Victims')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Victim_Age_Distribution.png")
-plt.show()
-
-# ----------------- 9. Vict Age Group ----------------- #
-print("\n➡️ Vict Age Group: Distribution.")
-plt.figure(figsize=(8,6))
-order = crime_df['Vict Age Group'].value_counts().index
-sns.countplot(data=crime_df, x='Vict Age Group', order=order)
-plt.title('Victim Age Group Distribution')
-plt.xlabel('Age Group')
-plt.ylabel('Number of Victims')
-plt.xticks(rotation=45)
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Victim_Age_Group_Distribution.png")
-plt.show()
-
-# ----------------- 10. Vict Sex ----------------- #
-print("\n➡️ Vict Sex: Gender distribution of victims.")
-plt.figure(figsize=(6,5))
-order = crime_df['Vict Sex'].value_counts().index
-sns.countplot(data=crime_df, x='Vict Sex', order=order)
-plt.title('Victim Gender Distribution')
-plt.xlabel('Gender')
-plt.ylabel('Number of Victims')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Victim_Sex_Distribution.png")
-plt.show()
-
-# ------------------------ STEP 2: Univariate Analysis on Crime Category------------------------ #
-print("\n=== STEP 2: Univariate Analysis on Crime Category ===")
-plt.figure(figsize=(10,6))
-sns.countplot(data=crime_df, x='Crime_Category', order=crime_df['Crime_Category'].value_counts().index)
-plt.title('Overall Crime Category Distribution')
-plt.xlabel('Crime Category')
-plt.ylabel('Number of Crimes')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Crime_Category.png")
-plt.show()
-
-
-# ------------------------ STEP 2: Univariate Analysis Area Name------------------------ #
-print("\n=== STEP 3: Univariate Analysis on Area Name ===")
-# Top 5 Areas for Crime in LA
-top_areas = crime_df['AREA NAME'].value_counts().head(5)
-
-plt.figure(figsize=(8,6))
-sns.barplot(x=top_areas.index, y=top_areas.values)  # <-- swap x and y
-plt.title('Top 5 LAPD Areas by Number of Crimes')
-plt.ylabel('Number of Crimes')
-plt.xlabel('LAPD Area Name')
-plt.xticks(rotation=45)  # Tilt x labels so they don't overlap
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Top_5_Areas.png")
-plt.show()
-
-# ------------------------ STEP 4: Univariate Analysis DayOfWeek------------------------ #
-print("\n=== STEP 4: Univariate Analysis on DayOfWeek ===")
-# Plot number of crimes per day of the week
-crime_df['DayOfWeek'].value_counts().reindex([
-    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday', 'Unknown'
-]).plot(kind='bar', figsize=(10,6))
-plt.title('Crimes by Day of the Week')
-plt.xlabel('Day')
-plt.ylabel('Number of Crimes')
-plt.xticks(rotation=45)
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\DayOfWeek.png")
-plt.show()
-
-# ------------------------ STEP 5: Multivariate Analysis on Crime Categories Across Victim Age Groups------------------------ #
-print("\n=== STEP 5: Multivariate Analysis on Crime Categories Across Victim Age Groups ===")
-# Count plot of Age Group vs Crime Category
-plt.figure(figsize=(10,6))
-sns.countplot(x='Vict Age Group', hue='Crime_Category', data=crime_df)
-plt.title('Crime Categories Across Victim Age Groups')
-plt.xlabel('Victim Age Group')
-plt.ylabel('Number of Crimes')
-plt.xticks(rotation=45)
-plt.legend(title='Crime Category')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Crime_Categories_Across_Victim_Age_Groups.png")
-plt.show()
-
-# ------------------------ STEP 6: Bivariate Analysis: Area vs Crime Category (Bar Plot)------------------------ #
-print("\n=== STEP 6: Bivariate Analysis: Area vs Crime Category ===")
-plt.figure(figsize=(14,8))
-sns.countplot(x='AREA NAME', hue='Crime_Category', data=crime_df,
-              order=crime_df['AREA NAME'].value_counts().index[:10])  # Top 10 areas if you want to limit
-
-plt.title('Crime Category Distribution Across LAPD Areas')
-plt.xlabel('LAPD Area Name')
-plt.ylabel('Number of Crimes')
-plt.xticks(rotation=45, ha='right')  # Tilt x-labels
-plt.legend(title='Crime Category')
-plt.gca().yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Crime_Category_AreaName.png")
-plt.show()
-
-print("\n=== STEP 7: Yearly Crime Count with Year-over-Year Variance ===")
-
-# Ensure 'DATE OCC' is in datetime format
-crime_df['DATE OCC'] = pd.to_datetime(crime_df['DATE OCC'], errors='coerce')
-
-# Extract Year
-crime_df['Year'] = crime_df['DATE OCC'].dt.year
-
-# Group by Year
-yearly_counts = crime_df['Year'].value_counts().sort_index()
-
-# Calculate year-over-year percentage change
-yearly_pct_change = yearly_counts.pct_change() * 100  # Multiply by 100 to get %
-
-# Plot
-fig, ax1 = plt.subplots(figsize=(12,7))
-
-# Bar plot for number of crimes
-color = 'tab:blue'
-ax1.set_xlabel('Year')
-ax1.set_ylabel('Number of Crimes', color=color)
-bars = ax1.bar(yearly_counts.index, yearly_counts.values, color=color, alpha=0.7)
-ax1.tick_params(axis='y', labelcolor=color)
-ax1.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: format(int(x), ',')))
-
-# Instantiate a second y-axis that shares the same x-axis
-ax2 = ax1.twinx()
-
-# Line plot for % change
-color = 'tab:red'
-ax2.set_ylabel('Year-over-Year Change (%)', color=color)
-line = ax2.plot(yearly_pct_change.index, yearly_pct_change.values, color=color, marker='o', linestyle='--')
-ax2.tick_params(axis='y', labelcolor=color)
-ax2.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:.1f}%"))
-
-# Title and layout
-plt.title('Yearly Crime Counts and Year-over-Year Percentage Change')
-fig.tight_layout()
-
-# Save and show
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\Charts\Yearly_Crime_Variance.png")
-plt.show()
+import argparse
+import pandas as pd
+import os
+import matplotlib
+
+from project_paths import CHARTS_DIR, CRIME_PROFILE_JSON
+from crime_dataset import peek_crime_data
+from crime_profile import load_crime_profile
+from crime_cube import load_crime_cube, cube_counts
+from crime_rollup import load_crime_rollup
+from chart_render import (
+    ChartSpec, render_charts, show_charts, line_chart, bar_chart, histogram, grouped_bar_chart, yearly_change_chart
+)
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("EDA Pipeline")
+
+
+def print_profile(crime_profile):
+    profile_summary = crime_profile.summary()
+
+    metrics.step("Dataset Overview")
+
+    # Print shape
+    rows, cols = crime_profile.rows, len(crime_profile.columns)
+    print(f"\n➡️ The dataset contains {rows:,} rows and {cols:,} columns.")
+
+    # Print types and missing values overview
+    print("\n➡️ Data Types and Non-Null Counts:")
+    print(profile_summary[['dtype', 'count']].rename(columns={'count': 'non-null'}))
+
+    # Print first few rows
+    print("\n➡️ First 5 Rows of the Dataset:")
+    print(peek_crime_data())
+
+    # Print basic descriptive statistics (distinct counts are ~1% estimates)
+    print("\n➡️ Descriptive Statistics (including all columns):")
+    with pd.option_context('display.max_columns', None):  # Show all columns without truncation
+        print(profile_summary.drop(columns=['dtype', 'null_rate', 'unknown_rate']))
+
+    # Print missing values
+    print("\n➡️ Missing Values per Column:")
+    missing_values = (profile_summary['nulls'] + profile_summary['unknown']).astype(int)
+    missing_values = missing_values[missing_values > 0].sort_values(ascending=False)
+
+    if not missing_values.empty:
+        print(missing_values.apply(lambda x: f"{x:,} missing ({x / rows:.1%})"))
+    else:
+        print("✅ No missing values detected.")
+
+    metrics.step("Statistical Summary")
+
+    # -------------------- Numerical Features -------------------- #
+    print("\n➡️ Descriptive Statistics for Numerical Variables:")
+
+    # Select numerical columns only
+    numerical_cols = [name for name, column in crime_profile.columns.items() if column.kind == "number"]
+
+    # If there are numerical columns
+    if numerical_cols:
+        num_summary = profile_summary.loc[numerical_cols, ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']]
+        with pd.option_context('display.float_format', '{:,.2f}'.format):  # Format numbers nicely
+            print(num_summary.T.astype(float))
+    else:
+        print("⚠️ No numerical columns found.")
+
+    # -------------------- Categorical Features -------------------- #
+    print("\n➡️ Value Counts for Categorical Variables:")
+
+    # Select categorical columns only
+    categorical_cols = [name for name, column in crime_profile.columns.items() if column.kind == "text"]
+
+    # If there are categorical columns
+    if categorical_cols:
+        for col in categorical_cols:
+            print(f"\n🔹 {col} (Top 5 most frequent values):")
+            value_counts = crime_profile.top_values(col)
+            # Counts are exact unless the column has more distinct values than the sketch keeps
+            at_least = "at least " if crime_profile.columns[col].top.error else ""
+            print(value_counts.apply(lambda x: f"{at_least}{x:,} occurrences"))
+    else:
+        print("⚠️ No categorical columns found.")
+
+
+def build_charts(crime_cube, victim_age_counts, crime_rollup):
+    """Chart specs for every EDA figure, each fed from a slice of a count cube or the temporal rollup."""
+    charts = []
+
+    metrics.step("Step 2: Feature Distributions for Key Variables")
+
+    # ----------------- 1. DR_NO ----------------- #
+    print("\n➡️ DR_NO: No plot needed (unique identifier).")
+
+    # ----------------- 2. DATE OCC ----------------- #
+    print("\n➡️ DATE OCC: Distribution of crime occurrences over time.")
+    monthly_counts = crime_rollup.series('month')
+    monthly_counts.index = monthly_counts.index.to_period('M')
+    charts.append(ChartSpec("Date_Occurrence_Distribution.png", line_chart, monthly_counts,
+                            figsize=(10, 5), title='Number of Crimes Over Time (Date of Occurrence)',
+                            xlabel='Month', ylabel='Number of Crimes'))
+
+    # ----------------- 6. Crm Cd Desc ----------------- #
+    print("\n➡️ Crm Cd Desc: Top Crime Descriptions.")
+    top_descriptions = cube_counts(crime_cube, 'Crm Cd Desc').nlargest(10)
+    charts.append(ChartSpec("Crime_Description_Distribution.png", bar_chart, top_descriptions, figsize=(10, 6),
+                            horizontal=True, title='Top 10 Crime Descriptions', xlabel='Number of Crimes',
+                            ylabel='Crime Description'))
+
+    # ----------------- 8. Vict Age ----------------- #
+    print("\n➡️ Vict Age: Distribution of Victim Ages.")
+    known_ages = victim_age_counts.dropna(subset=['Vict Age'])
+    charts.append(ChartSpec("Victim_Age_Distribution.png", histogram, known_ages, figsize=(8, 5), x='Vict Age',
+                            weights='count', bins=30, kde=True, title='Distribution of Victim Ages', xlabel='Age',
+                            ylabel='Number of Victims'))
+
+    # ----------------- 9. Vict Age Group ----------------- #
+    print("\n➡️ Vict Age Group: Distribution.")
+    age_group_counts = cube_counts(crime_cube, 'Vict Age Group').sort_values(ascending=False)
+    charts.append(ChartSpec("Victim_Age_Group_Distribution.png", bar_chart, age_group_counts, figsize=(8, 6),
+                            title='Victim Age Group Distribution', xlabel='Age Group', ylabel='Number of Victims',
+                            rotation=45, thousands=True))
+
+    # ----------------- 10. Vict Sex ----------------- #
+    print("\n➡️ Vict Sex: Gender distribution of victims.")
+    sex_counts = cube_counts(crime_cube, 'Vict Sex').sort_values(ascending=False)
+    charts.append(ChartSpec("Victim_Sex_Distribution.png", bar_chart, sex_counts, figsize=(6, 5),
+                            title='Victim Gender Distribution', xlabel='Gender', ylabel='Number of Victims',
+                            thousands=True))
+
+    # ------------------------ STEP 2: Univariate Analysis on Crime Category------------------------ #
+    metrics.step("STEP 2: Univariate Analysis on Crime Category")
+    category_counts = cube_counts(crime_cube, 'Crime_Category').sort_values(ascending=False)
+    charts.append(ChartSpec("Crime_Category.png", bar_chart, category_counts, figsize=(10, 6),
+                            title='Overall Crime Category Distribution', xlabel='Crime Category',
+                            ylabel='Number of Crimes', thousands=True))
+
+    # ------------------------ STEP 2: Univariate Analysis Area Name------------------------ #
+    metrics.step("STEP 3: Univariate Analysis on Area Name")
+    # Top 5 Areas for Crime in LA
+    area_counts = cube_counts(crime_cube, 'AREA NAME').sort_values(ascending=False)
+    top_areas = area_counts.head(5)
+    # Tilt x labels so they don't overlap
+    charts.append(ChartSpec("Top_5_Areas.png", bar_chart, top_areas, figsize=(8, 6),
+                            title='Top 5 LAPD Areas by Number of Crimes', xlabel='LAPD Area Name',
+                            ylabel='Number of Crimes', rotation=45, thousands=True))
+
+    # ------------------------ STEP 4: Univariate Analysis DayOfWeek------------------------ #
+    metrics.step("STEP 4: Univariate Analysis on DayOfWeek")
+    # Plot number of crimes per day of the week
+    day_counts = cube_counts(crime_cube, 'DayOfWeek').reindex([
+        'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
+    ])
+    charts.append(ChartSpec("DayOfWeek.png", bar_chart, day_counts, figsize=(10, 6), single_color=True,
+                            title='Crimes by Day of the Week', xlabel='Day', ylabel='Number of Crimes', rotation=45,
+                            thousands=True))
+
+    # ------------------------ STEP 5: Multivariate Analysis on Crime Categories Across Victim Age Groups------------------------ #
+    metrics.step("STEP 5: Multivariate Analysis on Crime Categories Across Victim Age Groups")
+    # Bar plot of Age Group vs Crime Category counts
+    age_category_counts = cube_counts(crime_cube, ['Vict Age Group', 'Crime_Category']).reset_index()
+    charts.append(ChartSpec("Crime_Categories_Across_Victim_Age_Groups.png", grouped_bar_chart, age_category_counts,
+                            figsize=(10, 6), x='Vict Age Group', y='count', hue='Crime_Category',
+                            title='Crime Categories Across Victim Age Groups', xlabel='Victim Age Group',
+                            ylabel='Number of Crimes', legend_title='Crime Category', rotation=45))
+
+    # ------------------------ STEP 6: Bivariate Analysis: Area vs Crime Category (Bar Plot)------------------------ #
+    metrics.step("STEP 6: Bivariate Analysis: Area vs Crime Category")
+    top_area_names = area_counts.index[:10].astype(str).tolist()  # Top 10 areas if you want to limit
+    area_category_counts = cube_counts(crime_cube, ['AREA NAME', 'Crime_Category'],
+                                       where={'AREA NAME': top_area_names}).reset_index()
+    area_category_counts['AREA NAME'] = area_category_counts['AREA NAME'].astype(str)
+    charts.append(ChartSpec("Crime_Category_AreaName.png", grouped_bar_chart, area_category_counts, figsize=(14, 8),
+                            x='AREA NAME', y='count', hue='Crime_Category', order=top_area_names,
+                            title='Crime Category Distribution Across LAPD Areas', xlabel='LAPD Area Name',
+                            ylabel='Number of Crimes', legend_title='Crime Category', rotation=45, ha='right'))
+
+    metrics.step("STEP 7: Yearly Crime Count with Year-over-Year Variance")
+
+    # Yearly counts from the rollup; the chart adds the year-over-year percentage change on a second axis
+    yearly_counts = crime_rollup.series('year')
+    yearly_counts.index = yearly_counts.index.year
+    charts.append(ChartSpec("Yearly_Crime_Variance.png", yearly_change_chart, yearly_counts, figsize=(12, 7),
+                            title='Yearly Crime Counts and Year-over-Year Percentage Change'))
+    return charts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exploratory data analysis of the cleaned LAPD crime dataset.")
+    parser.add_argument("--headless", action="store_true",
+                        help="Save the charts with the Agg backend in a process pool instead of showing them "
+                             "(the default when MPLBACKEND=Agg); charts whose data hasn't changed are skipped")
+    parser.add_argument("--chart-workers", type=int, default=None,
+                        help="Processes for headless rendering (default: one per CPU)")
+    parser.add_argument("--force-charts", action="store_true",
+                        help="Redraw every chart in headless mode, even if its data hasn't changed")
+    args = parser.parse_args()
+    headless = args.headless or os.environ.get('MPLBACKEND', '').lower() == 'agg'
+    if not headless:
+        matplotlib.use(os.environ.get('MPLBACKEND', 'TkAgg'))  # or 'QtAgg'
+
+    # ------------------------ STEP 1: Profile Cleaned Dataset ------------------------ #
+    metrics.step("STEP 1: Profile Cleaned Dataset")
+    # One streaming pass of mergeable sketches per column (reused until the dataset changes)
+    crime_profile, profile_rebuilt = load_crime_profile()
+    metrics.rows(crime_profile.rows)
+    print(f"✅ Profile {'built' if profile_rebuilt else 'loaded'} ({crime_profile.chunks} chunks): {CRIME_PROFILE_JSON}")
+
+    metrics.step("Load Count Cube")
+    # Every chart below is drawn from slices of the count cubes; they are only rebuilt when the dataset changed
+    crime_cube, victim_age_counts, cube_rebuilt = load_crime_cube()
+    metrics.rows(sum(len(cube) for cube in crime_cube.values()))
+    print(f"✅ Count cubes {'rebuilt' if cube_rebuilt else 'loaded'} "
+          f"({', '.join(f'{name} {len(cube):,} cells' for name, cube in crime_cube.items())}), "
+          f"{crime_cube['incident']['count'].sum():,} incidents.")
+
+    metrics.step("Load Temporal Rollup")
+    # Hour/day/week/month/year counts per area and category; patched by incremental cleaning runs
+    crime_rollup, rollup_rebuilt = load_crime_rollup()
+    metrics.rows(len(crime_rollup.tables['hour']))
+    years = crime_rollup.series('year').index
+    print(f"✅ Temporal rollup {'rebuilt' if rollup_rebuilt else 'loaded'}: {crime_rollup.count():,} dated incidents"
+          + (f", {years.min():%Y} to {years.max():%Y}." if len(years) else "."))
+
+    print_profile(crime_profile)
+    charts = build_charts(crime_cube, victim_age_counts, crime_rollup)
+
+    metrics.step("STEP 8: Render Charts")
+    if headless:
+        results = render_charts(charts, CHARTS_DIR, workers=args.chart_workers, force=args.force_charts)
+        for filename, status in results:
+            print(f" • {filename}: {status}")
+        rendered = sum(status == "rendered" for _, status in results)
+        print(f"✅ {rendered} of {len(results)} charts redrawn in: {CHARTS_DIR}")
+    else:
+        show_charts(charts, CHARTS_DIR)
+        print(f"✅ {len(charts)} charts saved to: {CHARTS_DIR}")
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from project_paths import MODEL_BUNDLE_PATH, COMPACT_MODEL_BUNDLE_PATH
+from crime_forest import CompactForest
+from crime_model import ModelBundle, load_model_bundle, save_model_bundle, load_model_frame
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Export Compact Model")
+BATCH_SIZES = [1, 64, 1000]  # plus the whole check sample
+
+
+def timed_load(path):
+    started = time.perf_counter()
+    bundle = load_model_bundle(path, quiet=True)
+    return bundle, time.perf_counter() - started
+
+
+def rows_per_second(model, X, batch_size, min_seconds=1.0):
+    # Repeats small batches until min_seconds have passed, so one-row latencies aren't lost in timer noise
+    calls, rows = 0, 0
+    started = time.perf_counter()
+    while True:
+        model.predict_proba(X[calls * batch_size % X.shape[0]:][:batch_size])
+        calls += 1
+        rows += min(batch_size, X.shape[0])
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds or batch_size >= X.shape[0]:
+            return rows / elapsed, elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the crime model's Random Forest as a compact array forest.")
+    parser.add_argument("--bundle", default=MODEL_BUNDLE_PATH, help="Model bundle saved by Predictive Analysis.py")
+    parser.add_argument("--output", default=COMPACT_MODEL_BUNDLE_PATH,
+                        help="Compact bundle to write (default: Models/crime_model_compact.joblib)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Prune: nodes this deep become leaves (default: keep the full depth)")
+    parser.add_argument("--min-samples-split", type=int, default=None,
+                        help="Prune: nodes trained on fewer bootstrap samples become leaves (default: none)")
+    parser.add_argument("--check-rows", type=int, default=20_000,
+                        help="Cleaned records used to compare and time the two forests (default 20,000)")
+    args = parser.parse_args()
+
+    # ------------------------ STEP 1: Load Model Bundle ------------------------ #
+    metrics.step("STEP 1: Load Model Bundle")
+
+    bundle, forest_load_s = timed_load(args.bundle)
+    forest = bundle.model
+    if not isinstance(forest, RandomForestClassifier):
+        parser.error(f"{args.bundle} holds a {type(forest).__name__}; only Random Forest bundles can be compacted")
+    nodes = sum(estimator.tree_.node_count for estimator in forest.estimators_)
+    print(f" - Model {bundle.model_id}: {len(forest.estimators_)} trees, {nodes:,} nodes over "
+          f"{forest.n_features_in_:,} features, loaded in {forest_load_s:.2f}s")
+
+    # ------------------------ STEP 2: Compact Forest ------------------------ #
+    metrics.step("STEP 2: Compact Forest")
+
+    compact = CompactForest.from_forest(forest, max_depth=args.max_depth, min_samples_split=args.min_samples_split)
+    pruned = args.max_depth is not None or args.min_samples_split is not None
+    print(f" - {len(compact.feature):,} split nodes and {compact.n_leaves:,} leaves over "
+          f"{len(compact.used_features):,} used features: {compact.nbytes / 1e6:,.1f} MB of arrays"
+          + (f" (pruned: max depth {args.max_depth}, min samples split {args.min_samples_split})" if pruned else ""))
+
+    # ------------------------ STEP 3: Check Predictions ------------------------ #
+    metrics.step("STEP 3: Check Predictions")
+
+    crime_df, _ = load_model_frame(bundle.features, bundle.target)
+    if args.check_rows and args.check_rows < len(crime_df):
+        crime_df = crime_df.sample(n=args.check_rows, random_state=42)
+    X = bundle.encode(crime_df)
+    metrics.rows(X.shape[0])
+    forest.n_jobs = compact.n_jobs = 1  # compare one core against one core
+    forest_proba = forest.predict_proba(X)
+    compact_proba = compact.predict_proba(X)
+    agreement = float((forest_proba.argmax(axis=1) == compact_proba.argmax(axis=1)).mean())
+    max_difference = float(np.abs(forest_proba - compact_proba).max()) if X.shape[0] else 0.0
+    print(f" - {X.shape[0]:,} records: same category for {agreement:.2%}, largest probability difference "
+          f"{max_difference:.2e}")
+    if not pruned and agreement < 1:
+        print("⚠️ The unpruned compact forest should predict exactly like the original")
+
+    # ------------------------ STEP 4: Benchmark ------------------------ #
+    metrics.step("STEP 4: Benchmark Prediction", rows=X.shape[0])
+
+    print("\n=== Rows per Second (one core) ===")
+    for batch_size in BATCH_SIZES + [X.shape[0]]:
+        forest_rate, forest_latency = rows_per_second(forest, X, batch_size)
+        compact_rate, compact_latency = rows_per_second(compact, X, batch_size)
+        print(f" • {batch_size:>7,} rows per call: forest {forest_rate:>9,.0f} rows/s "
+              f"({forest_latency * 1000:.1f} ms), compact {compact_rate:>9,.0f} rows/s "
+              f"({compact_latency * 1000:.1f} ms)")
+
+    # ------------------------ STEP 5: Save Compact Bundle ------------------------ #
+    metrics.step("STEP 5: Save Compact Bundle")
+
+    compact.n_jobs = None
+    info = {key: value for key, value in bundle.info.items() if key not in ("model_id", "sklearn_version")}
+    info.update(compacted_from=bundle.model_id, compact={"max_depth": args.max_depth,
+                                                         "min_samples_split": args.min_samples_split,
+                                                         "agreement": agreement})
+    compact_bundle = ModelBundle(compact, bundle.features, bundle.classes, encoder=bundle.encoder,
+                                 dense_columns=bundle.dense_columns, target=bundle.target, info=info)
+    save_model_bundle(compact_bundle, args.output)
+    _, compact_load_s = timed_load(args.output)
+
+    print(f"\n✅ Compact bundle {compact_bundle.model_id} saved to:\n{args.output}")
+    print(f" - File size: {os.path.getsize(args.bundle) / 1e6:,.1f} MB → "
+          f"{os.path.getsize(args.output) / 1e6:,.1f} MB")
+    print(f" - Load time: {forest_load_s:.2f}s → {compact_load_s:.2f}s")
+    print(" - Score with it: --bundle for Score Crime Records.py and Prediction Service.py")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
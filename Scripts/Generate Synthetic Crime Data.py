@@ -0,0 +1,51 @@
+import argparse
+import os
+
+from project_paths import PROJECT_DIR, CRIME_CSV
+from synthetic_crime import write_synthetic_csv, copy_reference_files
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Generate Synthetic Crime Data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic LAPD-shaped crime CSV for benchmarking.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to write, duplicates included")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed and rows = same file)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.005,
+                        help="Share of rows that repeat an earlier DR_NO (default 0.005)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="CSV file to write")
+    target.add_argument("--project", help="Project folder to create: the CSV plus copies of the MO codes and "
+                                          "LAPD Divisions files (then set CAPSTONE_PROJECT_DIR to it)")
+    args = parser.parse_args()
+
+    # ------------------------ STEP 1: Prepare Output ------------------------ #
+    metrics.step("STEP 1: Prepare Output")
+    if args.project and os.path.abspath(args.project) != os.path.abspath(PROJECT_DIR):
+        # Same layout as PROJECT_DIR, so CAPSTONE_PROJECT_DIR=args.project works for every script
+        csv_path = copy_reference_files(args.project)
+        print(f" - Copied the MO codes and LAPD Divisions files to {args.project}")
+    elif args.output and os.path.abspath(args.output) != os.path.abspath(CRIME_CSV):
+        csv_path = args.output
+    else:
+        parser.error(f"Refusing to overwrite the real crime extract: {CRIME_CSV}")
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+
+    # ------------------------ STEP 2: Generate Rows ------------------------ #
+    metrics.step(f"STEP 2: Generating {args.rows:,} Rows (seed {args.seed})", rows=args.rows)
+
+    def progress(written):
+        print(f" - {written:,}/{args.rows:,} rows written")
+
+    write_synthetic_csv(csv_path, args.rows, args.seed, args.duplicate_rate, progress=progress)
+    print(f"\n✅ Synthetic crime data saved to:\n{csv_path}")
+    print(f" - Size: {os.path.getsize(csv_path) / 1024 ** 2:,.1f} MB")
+    if args.project:
+        print(f" - Run the other scripts on it with CAPSTONE_PROJECT_DIR={args.project}")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
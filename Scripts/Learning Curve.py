@@ -0,0 +1,218 @@
+# Learning-curve and scaling benchmark for the crime category model.
+#
+# Trains the model of Predictive Analysis.py (same features, categories, encoders and backends) on
+# growing samples up to the whole dataset, scores every size on one held-out test set and reports where
+# macro-F1 stops improving against what each size costs: fit time, peak memory and prediction throughput.
+# Sizes are fitted in parallel processes while their estimated memory fits the budget (see crime_learning.py).
+# The table, a Markdown report and the charts are written to Output/benchmarks/learning_curve.
+#
+#   python "Learning Curve.py"
+#   python "Learning Curve.py" --model gradient-boosting --sizes 10000 100000 1000000 full --workers 2
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from project_paths import LEARNING_CURVE_DIR
+from crime_learning import learning_curve, saturation_point
+from crime_model import load_model_frame, MODEL_CHOICES, MODEL_FEATURES, MODEL_TARGET
+from chart_render import ChartSpec, render_charts, bar_chart, heatmap, learning_curve_chart
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Learning Curve")
+DEFAULT_SIZES = ["5000", "10000", "20000", "50000", "100000", "200000", "500000", "full"]
+
+
+def training_sizes(values):
+    # "full" is the whole training pool (sizes above it are capped by learning_curve)
+    sizes = []
+    for value in values:
+        if value == "full":
+            sizes.append(np.iinfo(np.int64).max)
+        else:
+            try:
+                sizes.append(int(value))
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"not a row count or 'full': {value}")
+    return sizes
+
+
+def timing(row):
+    # How a size's fit time and throughput were measured: alone, or sharing the CPUs with other sizes
+    if row["concurrent"] <= 1:
+        return "alone (re-timed)" if row["retimed"] else "alone"
+    return f"with {row['concurrent'] - 1:.0f} other size(s)"
+
+
+def write_report(curve, classes, saturation, settings, chart_files, report_path):
+    largest = curve.iloc[-1]
+    lines = [f"# Learning Curve: {settings['model']} ({settings['finished']})", ""]
+    lines.append(f"{settings['dataset_rows']:,} labelled rows: {settings['test_rows']:,} held out for testing, "
+                 f"training samples of {', '.join(f'{rows:,}' for rows in curve['rows'])} rows drawn from the rest "
+                 f"(each sample contains the smaller ones). Up to {settings['workers']} size(s) fitted at a time.")
+    lines += ["", "## Saturation", ""]
+    lines.append(f"Macro-F1 is within {settings['tolerance']} of its best ({curve['macro_f1'].max():.3f}) from "
+                 f"**{saturation['rows']:,.0f} rows** ({saturation['macro_f1']:.3f}).")
+    if saturation["rows"] < largest["rows"]:
+        lines.append(f"Training on {largest['rows']:,.0f} rows instead costs "
+                     f"{largest['fit_s'] / saturation['fit_s']:.1f}x the fit time "
+                     f"({saturation['fit_s']:.1f}s → {largest['fit_s']:.1f}s) and "
+                     f"{largest['peak_rss_mb'] / saturation['peak_rss_mb']:.1f}x the peak memory "
+                     f"({saturation['peak_rss_mb']:,.0f} → {largest['peak_rss_mb']:,.0f} MB) for "
+                     f"{largest['macro_f1'] - saturation['macro_f1']:+.3f} macro-F1.")
+        if saturation["concurrent"] > 1 or largest["concurrent"] > 1:
+            lines.append(f"⚠️ These timings are not like for like: {saturation['rows']:,.0f} rows ran "
+                         f"{timing(saturation)} and {largest['rows']:,.0f} rows {timing(largest)}.")
+    else:
+        lines.append("The largest sample is still improving: more data would likely help.")
+
+    lines += ["", "## Sizes", "",
+              "| Training rows | Fit (s) | Peak RSS (MB) | RSS growth (MB) | Predict (rows/s) | Timed | Accuracy | "
+              "Macro-F1 | Gain per extra fit-second |",
+              "|---:|---:|---:|---:|---:|---|---:|---:|---:|"]
+    previous = None
+    for _, row in curve.iterrows():
+        gain = ""
+        if previous is not None and row["fit_s"] > previous["fit_s"]:
+            if row["concurrent"] > 1 or previous["concurrent"] > 1:
+                gain = "—"  # one of the two shared the CPUs, so the extra seconds aren't comparable
+            else:
+                gain = f"{(row['macro_f1'] - previous['macro_f1']) / (row['fit_s'] - previous['fit_s']):+.4f}"
+        marker = " ◀" if row["rows"] == saturation["rows"] else ""
+        lines.append(f"| {row['rows']:,.0f}{marker} | {row['fit_s']:.2f} | {row['peak_rss_mb']:,.0f} | "
+                     f"{row['rss_growth_mb']:,.0f} | {row['predict_rows_per_s']:,.0f} | {timing(row)} | "
+                     f"{row['accuracy']:.3f} | {row['macro_f1']:.3f} | {gain} |")
+        previous = row
+    if curve["boosting_rounds"].notna().any():
+        rounds = ", ".join(f"{rows:,} rows: {n_iter:.0f}"
+                           for rows, n_iter in zip(curve["rows"], curve["boosting_rounds"]))
+        lines += ["", f"Boosting rounds ({rounds}). scikit-learn only stops early above 10,000 training rows, so "
+                      f"smaller sizes fit every round and can take longer than larger ones."]
+    if (curve["concurrent"] > 1).any():
+        lines += ["", "Sizes timed alongside others shared the CPUs: their fit times are longer and their "
+                      "throughput lower than they would be alone. The saturation point, its neighbours and the "
+                      "largest size are re-timed alone unless --no-retime was given."]
+
+    lines += ["", "## F1 by Crime Category", "", f"| Category | {curve.iloc[0]['rows']:,.0f} rows | "
+              f"{saturation['rows']:,.0f} rows (saturation) | {largest['rows']:,.0f} rows |", "|---|---:|---:|---:|"]
+    for label in classes:
+        lines.append(f"| {label} | {curve.iloc[0][f'f1_{label}']:.3f} | {saturation[f'f1_{label}']:.3f} | "
+                     f"{largest[f'f1_{label}']:.3f} |")
+
+    lines += ["", "## Charts", ""] + [f"![{filename}]({filename})" for filename in chart_files]
+    with open(report_path, "w", encoding="utf-8") as report:
+        report.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the crime category model on growing samples and report "
+                                                 "where accuracy saturates against the cost.")
+    parser.add_argument("--model", choices=MODEL_CHOICES, default="random-forest",
+                        help="Backend, as for Predictive Analysis.py (default random-forest)")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="Training rows per fit, or 'full' for every training row (default 5000 10000 20000 "
+                             "50000 100000 200000 500000 full)")
+    parser.add_argument("--test-rows", type=int, default=50_000,
+                        help="Held-out test rows shared by every size (at most 30%% of the data; default 50,000)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Sizes fitted at once, sharing the CPUs (default: one per CPU)")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Memory the parallel fits may use together (default: 70%% of the available memory)")
+    parser.add_argument("--no-retime", action="store_true",
+                        help="Keep the timings of sizes that shared the CPUs instead of fitting the saturation "
+                             "point, its neighbours and the largest size again on their own")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="Macro-F1 this close to the best counts as saturated (default 0.005)")
+    parser.add_argument("--min-category-count", type=int, default=20,
+                        help="Values seen fewer times share one rare column or code per feature (default 20)")
+    parser.add_argument("--gb-max-iter", type=int, default=200,
+                        help="Gradient boosting: most boosting rounds (default 200)")
+    parser.add_argument("--chart-workers", type=int, default=None,
+                        help="Processes for rendering the charts (default: one per CPU)")
+    parser.add_argument("--force-charts", action="store_true",
+                        help="Redraw every chart, even if its data hasn't changed since the last run")
+    args = parser.parse_args()
+    try:
+        sizes = training_sizes(args.sizes)
+    except argparse.ArgumentTypeError as error:
+        parser.error(f"--sizes: {error}")
+    params = {"max_iter": args.gb_max_iter} if args.model == "gradient-boosting" else {}
+
+    # ------------------------ STEP 1: Load Cleaned Dataset ------------------------ #
+    metrics.step("STEP 1: Load Cleaned Dataset")
+
+    crime_df, _ = load_model_frame(MODEL_FEATURES, MODEL_TARGET)
+    crime_df = crime_df[crime_df[MODEL_TARGET].notna()].reset_index(drop=True)
+    metrics.rows(len(crime_df))
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(crime_df[MODEL_TARGET])
+    classes = label_encoder.classes_
+    print(f" - {len(crime_df):,} labelled incidents, {len(classes)} categories")
+
+    # ------------------------ STEP 2: Fit Training Sizes ------------------------ #
+    metrics.step("STEP 2: Fit Training Sizes", rows=len(crime_df))
+
+    curve = learning_curve(crime_df[MODEL_FEATURES], y, classes, sizes, args.model, params=params,
+                           min_count=args.min_category_count, test_rows=args.test_rows, workers=args.workers,
+                           memory_budget_mb=args.memory_budget_mb, tolerance=args.tolerance,
+                           retime=not args.no_retime)
+    if curve.empty:
+        print("⚠️ No training size finished; nothing to report")
+        metrics.finish()
+        return
+
+    # ------------------------ STEP 3: Report ------------------------ #
+    metrics.step("STEP 3: Write Report")
+
+    saturation = saturation_point(curve, tolerance=args.tolerance)
+    print("\n=== Learning Curve ===")
+    for _, row in curve.iterrows():
+        print(f" • {row['rows']:>9,.0f} rows | macro-F1 {row['macro_f1']:.3f} | accuracy {row['accuracy']:.3f} | "
+              f"fit {row['fit_s']:7.1f}s | peak {row['peak_rss_mb']:7,.0f} MB | "
+              f"predict {row['predict_rows_per_s']:9,.0f} rows/s | {timing(row)}"
+              + (" ◀ saturated" if row["rows"] == saturation["rows"] else ""))
+    print(f"➡️ Macro-F1 saturates at {saturation['rows']:,.0f} rows (within {args.tolerance} of the best)")
+
+    os.makedirs(LEARNING_CURVE_DIR, exist_ok=True)
+    prefix = args.model.replace("-", "_")
+    csv_path = os.path.join(LEARNING_CURVE_DIR, f"{prefix}_learning_curve.csv")
+    curve.to_csv(csv_path, index=False)
+
+    by_rows = curve.set_index("rows")
+    size_labels = [f"{rows:,}" for rows in by_rows.index]
+    class_f1 = pd.DataFrame(by_rows[[f"f1_{label}" for label in classes]].to_numpy().T, index=classes,
+                            columns=size_labels)
+    charts = [
+        ChartSpec(f"{prefix}_learning_curve.png", learning_curve_chart, by_rows, figsize=(10, 8),
+                  title='Learning Curve: Score and Cost by Training Rows',
+                  scores={'macro_f1': 'Macro-F1', 'accuracy': 'Accuracy'},
+                  costs={'fit_s': 'Fit Time (s)', 'peak_rss_mb': 'Peak RSS (MB)'}, marker=int(saturation['rows'])),
+        ChartSpec(f"{prefix}_f1_by_training_rows.png", heatmap, class_f1, figsize=(12, 6), fmt='.2f',
+                  cmap='YlGnBu', title='F1-Score by Crime Category and Training Rows', xlabel='Training Rows',
+                  ylabel='Crime Categories'),
+        ChartSpec(f"{prefix}_f1_score_by_category.png", bar_chart,
+                  pd.Series([saturation[f"f1_{label}"] for label in classes], index=classes,
+                            name='f1-score').sort_values(),
+                  figsize=(10, 6), horizontal=True, single_color=True,
+                  title=f"F1-Score by Crime Category ({saturation['rows']:,.0f} Training Rows)", xlabel='F1-Score'),
+    ]
+    for filename, status in render_charts(charts, LEARNING_CURVE_DIR, workers=args.chart_workers,
+                                          force=args.force_charts):
+        print(f"Chart '{filename}': {status}")
+
+    report_path = os.path.join(LEARNING_CURVE_DIR, f"{prefix}_report.md")
+    settings = {"model": args.model, "finished": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "dataset_rows": len(crime_df), "test_rows": min(args.test_rows, int(len(crime_df) * 0.3)),
+                "workers": args.workers or os.cpu_count() or 1, "tolerance": args.tolerance}
+    write_report(curve, classes, saturation, settings, [spec.filename for spec in charts], report_path)
+    print(f"\n✅ Learning curve saved to: {csv_path}")
+    print(f"✅ Report saved to: {report_path}")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
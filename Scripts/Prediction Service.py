@@ -0,0 +1,57 @@
+import argparse
+
+from project_paths import MO_CODES_CSV, MODEL_BUNDLE_PATH
+from crime_cleaning import load_mo_code_mapping
+from crime_model import load_model_bundle
+from crime_service import start_prediction_server
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Prediction Service")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Crime_Category predictions over local HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: this machine only)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default 8765)")
+    parser.add_argument("--bundle", default=MODEL_BUNDLE_PATH, help="Model bundle saved by Predictive Analysis.py")
+    parser.add_argument("--max-batch", type=int, default=64,
+                        help="A micro-batch stops waiting once it holds this many incidents (default 64)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long a micro-batch waits for more requests before scoring (default 5 ms)")
+    parser.add_argument("--model-jobs", type=int, default=1,
+                        help="Threads the forest predicts with; 1 is fastest for small batches (default 1)")
+    args = parser.parse_args()
+
+    # ------------------------ STEP 1: Load Model Bundle ------------------------ #
+    metrics.step("STEP 1: Load Model Bundle")
+
+    bundle = load_model_bundle(args.bundle)
+    bundle.model.n_jobs = args.model_jobs
+    mo_code_mapping = load_mo_code_mapping(MO_CODES_CSV)
+    print(f" - Model {bundle.model_id}: {len(bundle.features)} features ({bundle.encoding} encoding), "
+          f"{len(bundle.classes)} categories")
+
+    # ------------------------ STEP 2: Serve ------------------------ #
+    metrics.step("STEP 2: Serve Predictions")
+
+    server, stats = start_prediction_server(bundle, mo_code_mapping, args.host, args.port, args.max_batch,
+                                            args.max_wait_ms / 1000)
+    print(f"✅ Listening on http://{args.host}:{server.server_address[1]}  (POST /predict, GET /health, GET /metrics)")
+    print(f" - Micro-batches wait {args.max_wait_ms:g} ms or until they hold {args.max_batch} incidents; "
+          f"Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    summary = stats.snapshot()
+    metrics.rows(summary["incidents"])
+    print(f"\n - Served {summary['requests']:,} requests ({summary['incidents']:,} incidents) "
+          f"in {summary['batches']:,} micro-batches")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
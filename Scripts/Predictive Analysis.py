@@ -1,186 +1,290 @@
-# ================================
-# STEP 1: Load Libraries
-# ================================
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-
-# ================================
-# STEP 1: Load Pickle File
-# ================================
-print("\n=== STEP 1: Load Pickle File ===")
-
-# Load the cleaned dataframe
-crime_df = pd.read_pickle(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Output\crime_df_cleaned.pkl")
-print("DataFrame loaded from Pickle file.")
-print(f"Original Dataset Shape: {crime_df.shape}")
-
-# ================================
-# STEP 2: Sample 100,000 Rows
-# ================================
-print("\n=== STEP 2: Sample 100,000 Rows ===")
-
-# Randomly sample 100,000 rows
-crime_df_sampled = crime_df.sample(n=100000, random_state=42)
-print(f"Sampled Dataset Shape: {crime_df_sampled.shape}")
-
-# ================================
-# STEP 3: Feature and Target Selection
-# ================================
-print("\n=== STEP 3: Feature and Target Selection ===")
-
-features = [
-    'TIME OCC', 'AREA NAME', 'Vict Age', 'Vict Sex', 'Vict Descent', 'Premis Desc', 'Weapon Desc',
-    'DayOfWeek', 'Month', 'MO_Desc_1', 'MO_Desc_2', 'MO_Desc_3', 'MO_Desc_4', 'MO_Desc_5', 'MO_Desc_6',
-    'MO_Desc_7', 'MO_Desc_8', 'MO_Desc_9', 'MO_Desc_10'
-]
-
-target = 'Crime_Category'
-
-# Features (X) and Target (y)
-X = pd.get_dummies(crime_df_sampled[features])
-
-label_encoder = LabelEncoder()
-y = label_encoder.fit_transform(crime_df_sampled[target])
-
-print(f"Features and target prepared. Feature matrix shape: {X.shape}")
-
-# ================================
-# STEP 4: Train-Test Split
-# ================================
-print("\n=== STEP 4: Train-Test Split ===")
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-print(f"Data split into training set {X_train.shape} and testing set {X_test.shape}")
-
-# ================================
-# STEP 5: Model Training
-# ================================
-print("\n=== STEP 5: Model Training ===")
-
-rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-rf_model.fit(X_train, y_train)
-
-print("Random Forest model trained.")
-
-# ================================
-# STEP 6: Model Prediction
-# ================================
-print("\n=== STEP 6: Model Prediction ===")
-
-y_pred = rf_model.predict(X_test)
-
-# ================================
-# STEP 7: Model Evaluation
-# ================================
-print("\n=== STEP 7: Model Evaluation ===")
-
-# Classification Report
-print("\n=== Classification Report ===")
-print(classification_report(y_test, y_pred, target_names=label_encoder.classes_))
-
-# Accuracy
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\n=== Accuracy: {accuracy*100:.2f}% ===")
-
-# Confusion Matrix
-print("\n=== Confusion Matrix ===")
-conf_matrix = confusion_matrix(y_test, y_pred)
-
-plt.figure(figsize=(10,7))
-sns.heatmap(conf_matrix, annot=True, fmt='d', cmap='Blues',
-            xticklabels=label_encoder.classes_, yticklabels=label_encoder.classes_)
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Confusion Matrix')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\confusion_matrix.png")
-plt.close()
-print("Confusion Matrix plot saved as 'confusion_matrix.png'")
-
-# Generate classification report as a dictionary
-report = classification_report(y_test, y_pred, target_names=label_encoder.classes_, output_dict=True)
-
-# Convert to DataFrame
-report_df = pd.DataFrame(report).transpose()
-
-# Plot heatmap (only precision, recall, and f1-score)
-plt.figure(figsize=(10, 6))
-sns.heatmap(report_df.iloc[:-1, :3], annot=True, cmap='YlGnBu')
-plt.title('Classification Report Heatmap')
-plt.xlabel('Metrics')
-plt.ylabel('Crime Categories')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\classification_report_heatmap.png")
-plt.close()
-print("Classification Report Heatmap saved as 'classification_report_heatmap.png'")
-
-# Normalize the confusion matrix
-conf_matrix_norm = conf_matrix.astype('float') / conf_matrix.sum(axis=1)[:, np.newaxis]
-
-# Plot normalized confusion matrix
-plt.figure(figsize=(10, 7))
-sns.heatmap(conf_matrix_norm, annot=True, fmt=".2f", cmap='Blues',
-            xticklabels=label_encoder.classes_, yticklabels=label_encoder.classes_)
-plt.xlabel('Predicted')
-plt.ylabel('Actual')
-plt.title('Normalized Confusion Matrix')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\normalized_confusion_matrix.png")
-plt.close()
-print("Normalized Confusion Matrix plot saved as 'normalized_confusion_matrix.png'")
-
-# ================================
-# STEP 9: Other Charts
-# ================================
-print("\n=== STEP 9: Create More Charts ===")
-# F1-score bar plot
-f1_scores = report_df.loc[label_encoder.classes_, 'f1-score']
-f1_scores.sort_values().plot(kind='barh', figsize=(10,6), title='F1-Score by Crime Category')
-plt.xlabel('F1-Score')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\f1_score_by_category.png")
-plt.close()
-
-
-importances = rf_model.feature_importances_
-feat_names = X.columns
-feat_importance_df = pd.Series(importances, index=feat_names).sort_values(ascending=False).head(5)
-
-plt.figure(figsize=(10, 6))
-sns.barplot(x=feat_importance_df, y=feat_importance_df.index)
-plt.title('Top 5 Feature Importances in Crime Prediction')
-plt.xlabel('Importance Score')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\feature_importance.png")
-plt.close()
-
-
-area_counts = crime_df_sampled['AREA NAME'].value_counts()
-area_counts.plot(kind='barh', figsize=(10,6), title='Crime Reports by LAPD Area')
-plt.xlabel('Number of Incidents')
-plt.tight_layout()
-plt.savefig(r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\crime_by_area.png.png")
-plt.close()
-
-
-# ================================
-# STEP 10: Save Model
-# ================================
-import joblib
-
-print("\n=== STEP 10: Save Trained Model ===")
-
-# Save the Random Forest model
-model_save_path = r"C:\Users\Josiah Randleman\Documents\_Capstone Project\Models\random_forest_model.pkl"
-joblib.dump(rf_model, model_save_path)
-
-print(f"Random Forest model saved as 'random_forest_model.pkl'")
-
-
-
+# ================================
+# STEP 1: Load Libraries
+# ================================
+import argparse
+import json
+import os
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
+import numpy as np
+
+from project_paths import MODELS_DIR, FEATURE_ENCODER_JSON, MODEL_BUNDLE_PATH, TUNING_DIR
+from crime_dataset import dataset_fingerprint
+from crime_features import save_encoder
+from crime_model import (
+    ModelBundle, save_model_bundle, load_model_frame, make_feature_encoder, make_classifier, MODEL_CHOICES,
+    MODEL_FEATURES, MODEL_TARGET
+)
+from crime_tuning import FitCache, parameter_grid, successive_halving
+from chart_render import ChartSpec, render_charts, bar_chart, heatmap
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Predictive Analysis")
+
+# Rows sampled for training and testing (CAPSTONE_SAMPLE_ROWS or --sample-rows overrides, 0 = every row).
+# A fully grown forest's trees grow with the training rows, so every row isn't the default until the
+# learning curve (Learning Curve.py) shows it is worth the memory
+SAMPLE_ROWS = int(os.environ.get("CAPSTONE_SAMPLE_ROWS", 100_000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the crime category model.")
+    parser.add_argument("--model", choices=MODEL_CHOICES, default="random-forest",
+                        help="Random Forest on one-hot features (default) or histogram gradient boosting on "
+                             "integer-coded categories (no one-hot matrix; --encoding is ignored)")
+    parser.add_argument("--sample-rows", type=int, default=SAMPLE_ROWS,
+                        help="Train and test on a random sample of this many rows (default 100,000; 0 = every row)")
+    parser.add_argument("--encoding", choices=["sparse", "dense"], default="sparse",
+                        help="One-hot encode into a sparse CSR matrix (default) or the original dense "
+                             "get_dummies frame")
+    parser.add_argument("--min-category-count", type=int, default=20,
+                        help="Sparse encoding: values seen fewer times share one rare column per feature")
+    parser.add_argument("--gb-max-iter", type=int, default=200,
+                        help="Gradient boosting: most boosting rounds; stops earlier once the validation loss "
+                             "stops improving (default 200)")
+    parser.add_argument("--tune", action="store_true",
+                        help="Pick the forest's settings with a successive-halving search before training")
+    parser.add_argument("--tune-min-rows", type=int, default=2000, help="--tune: sample size of the first rung")
+    parser.add_argument("--tune-min-trees", type=int, default=25, help="--tune: trees per forest in the first rung")
+    parser.add_argument("--tune-max-trees", type=int, default=200, help="--tune: most trees per forest")
+    parser.add_argument("--tune-factor", type=int, default=3,
+                        help="--tune: keep the best 1/factor of the configs per rung and grow rows and trees by it")
+    parser.add_argument("--tune-folds", type=int, default=3, help="--tune: stratified cross-validation folds")
+    parser.add_argument("--tune-workers", type=int, default=None,
+                        help="--tune: processes fitting in parallel (default: one per CPU)")
+    parser.add_argument("--chart-workers", type=int, default=None,
+                        help="Processes for rendering the evaluation charts (default: one per CPU)")
+    parser.add_argument("--force-charts", action="store_true",
+                        help="Redraw every chart, even if its data hasn't changed since the last run")
+    args = parser.parse_args()
+    if args.tune and args.model != "random-forest":
+        parser.error("--tune searches Random Forest settings only")
+    os.makedirs(MODELS_DIR, exist_ok=True)
+
+    # ================================
+    # STEP 1: Load Cleaned Dataset
+    # ================================
+    metrics.step("STEP 1: Load Cleaned Dataset")
+
+    features = MODEL_FEATURES
+    target = MODEL_TARGET
+
+    # Load only the model columns (a pipeline run with --compact-mo gets its MO_Desc columns rebuilt
+    # from the compact MO table)
+    crime_df, compact_mo = load_model_frame(features, target)
+    metrics.rows(len(crime_df))
+    print("DataFrame loaded from Parquet dataset.")
+    if compact_mo:
+        print("MO_Desc columns rebuilt from compact MO table.")
+    print(f"Original Dataset Shape: {crime_df.shape}")
+
+    # ================================
+    # STEP 2: Sample Rows (--sample-rows / CAPSTONE_SAMPLE_ROWS, default 100,000)
+    # ================================
+    metrics.step("STEP 2: Sample Rows")
+
+    # Randomly sample the requested rows (or the whole dataset if it is smaller); 0 uses every row as is
+    # (train_test_split shuffles it)
+    if args.sample_rows and args.sample_rows < len(crime_df):
+        crime_df_sampled = crime_df.sample(n=args.sample_rows, random_state=42)
+    else:
+        crime_df_sampled = crime_df
+    metrics.rows(len(crime_df_sampled))
+    print(f"Sampled Dataset Shape: {crime_df_sampled.shape}")
+
+    # ================================
+    # STEP 3: Feature and Target Selection
+    # ================================
+    metrics.step("STEP 3: Feature and Target Selection", rows=len(crime_df_sampled))
+
+    # Features (X) and Target (y)
+    label_encoder = LabelEncoder()
+    y = label_encoder.fit_transform(crime_df_sampled[target])
+
+    # The rows are split first, so the encoder's vocabularies and rare cut-offs only see the training rows,
+    # like the records the saved model will score later
+    train_rows, test_rows = train_test_split(np.arange(len(crime_df_sampled)), test_size=0.3, random_state=42)
+    train_df = crime_df_sampled.iloc[train_rows]
+    test_df = crime_df_sampled.iloc[test_rows]
+
+    # Categorical columns are one-hot encoded; missing numeric values (e.g. unknown Vict Age) become -1.
+    # The sparse encoding stores only the non-zero cells and keeps its vocabularies for encoding new records.
+    # Gradient boosting gets one column of integer codes per feature instead and splits the categories natively.
+    if args.model == "gradient-boosting" or args.encoding == "sparse":
+        feature_encoder = make_feature_encoder(args.model, min_count=args.min_category_count)
+        X_train = feature_encoder.fit_transform(train_df[features])
+        X_test = feature_encoder.transform(test_df[features])
+        feature_names = feature_encoder.feature_names
+    else:
+        feature_encoder = None
+        X_train = pd.get_dummies(train_df[features]).fillna(-1)
+        X_test = pd.get_dummies(test_df[features]).reindex(columns=X_train.columns, fill_value=0).fillna(-1)
+        feature_names = X_train.columns
+
+    print(f"Features and target prepared. Feature matrix shape: "
+          f"{(X_train.shape[0] + X_test.shape[0], X_train.shape[1])}")
+
+    # ================================
+    # STEP 4: Train-Test Split
+    # ================================
+    metrics.step("STEP 4: Train-Test Split", rows=len(crime_df_sampled))
+
+    y_train, y_test = y[train_rows], y[test_rows]
+    print(f"Data split into training set {X_train.shape} and testing set {X_test.shape}")
+
+    model_params = {"max_iter": args.gb_max_iter} if args.model == "gradient-boosting" else {"n_estimators": 100}
+    if args.tune:
+        # ================================
+        # STEP 4b: Hyperparameter Search (--tune)
+        # ================================
+        metrics.step("STEP 4b: Hyperparameter Search", rows=X_train.shape[0])
+
+        # Cross-validated on the training split only; finished fits are reused by later searches
+        leaderboard = successive_halving(X_train, y_train, label_encoder.classes_, parameter_grid(),
+                                         FitCache(os.path.join(TUNING_DIR, "fit_cache.jsonl")),
+                                         min_rows=args.tune_min_rows, min_trees=args.tune_min_trees,
+                                         max_trees=args.tune_max_trees, factor=args.tune_factor,
+                                         folds=args.tune_folds, workers=args.tune_workers)
+        os.makedirs(TUNING_DIR, exist_ok=True)
+        leaderboard.to_csv(os.path.join(TUNING_DIR, "leaderboard.csv"), index=False)
+
+        print("\n=== Tuning Leaderboard (best first) ===")
+        for _, row in leaderboard.head(10).iterrows():
+            print(f" • rung {row['rung']} | {row['rows']:,} rows, {row['trees']} trees | "
+                  f"macro-F1 {row['macro_f1']:.3f} ± {row['macro_f1_std']:.3f} | fit {row['fit_s']:.2f}s | "
+                  f"predict {row['predict_ms_per_1k']:.1f} ms/1k rows | {row['config']}")
+        print(f" - Full leaderboard saved to: {os.path.join(TUNING_DIR, 'leaderboard.csv')}")
+
+        # The search ends once its ranking leaves one config; STEP 5 is the winner's one fit on all training rows
+        best = leaderboard.iloc[0]
+        model_params = {**json.loads(best['params']), "n_estimators": args.tune_max_trees}
+        print(f" - Best config: {best['config']}; training it with {args.tune_max_trees} trees")
+
+    # ================================
+    # STEP 5: Model Training
+    # ================================
+    metrics.step("STEP 5: Model Training", rows=X_train.shape[0])
+
+    model = make_classifier(args.model, model_params, feature_encoder)
+    model.fit(X_train, y_train)
+    if args.model == "gradient-boosting":
+        print(f"Gradient boosting model trained ({model.n_iter_} boosting rounds).")
+    else:
+        print("Random Forest model trained.")
+
+    # ================================
+    # STEP 6: Model Prediction
+    # ================================
+    metrics.step("STEP 6: Model Prediction", rows=X_test.shape[0])
+
+    y_pred = model.predict(X_test)
+
+    # ================================
+    # STEP 7: Model Evaluation
+    # ================================
+    metrics.step("STEP 7: Model Evaluation")
+    charts = []
+    classes = label_encoder.classes_
+
+    # Classification Report
+    print("\n=== Classification Report ===")
+    print(classification_report(y_test, y_pred, target_names=classes))
+
+    # Accuracy
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"\n=== Accuracy: {accuracy*100:.2f}% ===")
+
+    # Confusion Matrix (rows: actual, columns: predicted)
+    print("\n=== Confusion Matrix ===")
+    conf_matrix = confusion_matrix(y_test, y_pred)
+    charts.append(ChartSpec("confusion_matrix.png", heatmap, pd.DataFrame(conf_matrix, index=classes, columns=classes),
+                            figsize=(10, 7), fmt='d', cmap='Blues', title='Confusion Matrix', xlabel='Predicted',
+                            ylabel='Actual'))
+
+    # Generate classification report as a dictionary
+    report = classification_report(y_test, y_pred, target_names=classes, output_dict=True)
+
+    # Convert to DataFrame
+    report_df = pd.DataFrame(report).transpose()
+
+    # Heatmap of precision, recall, and f1-score only
+    charts.append(ChartSpec("classification_report_heatmap.png", heatmap, report_df.iloc[:-1, :3], figsize=(10, 6),
+                            cmap='YlGnBu', title='Classification Report Heatmap', xlabel='Metrics',
+                            ylabel='Crime Categories'))
+
+    # Normalize the confusion matrix
+    conf_matrix_norm = conf_matrix.astype('float') / conf_matrix.sum(axis=1)[:, np.newaxis]
+    charts.append(ChartSpec("normalized_confusion_matrix.png", heatmap,
+                            pd.DataFrame(conf_matrix_norm, index=classes, columns=classes), figsize=(10, 7),
+                            fmt=".2f", cmap='Blues', title='Normalized Confusion Matrix', xlabel='Predicted',
+                            ylabel='Actual'))
+
+    # ================================
+    # STEP 9: Other Charts
+    # ================================
+    metrics.step("STEP 9: Create More Charts")
+    # F1-score bar plot
+    f1_scores = report_df.loc[classes, 'f1-score']
+    charts.append(ChartSpec("f1_score_by_category.png", bar_chart, f1_scores.sort_values(), figsize=(10, 6),
+                            horizontal=True, single_color=True, title='F1-Score by Crime Category',
+                            xlabel='F1-Score'))
+
+    # Gradient boosting has no impurity-based importances
+    if hasattr(model, "feature_importances_"):
+        importances = model.feature_importances_
+        feat_importance_df = pd.Series(importances, index=feature_names).sort_values(ascending=False).head(5)
+        charts.append(ChartSpec("feature_importance.png", bar_chart, feat_importance_df, figsize=(10, 6),
+                                horizontal=True, title='Top 5 Feature Importances in Crime Prediction',
+                                xlabel='Importance Score'))
+
+    area_counts = crime_df_sampled['AREA NAME'].value_counts()
+    charts.append(ChartSpec("crime_by_area.png.png", bar_chart, area_counts, figsize=(10, 6), horizontal=True,
+                            single_color=True, title='Crime Reports by LAPD Area', xlabel='Number of Incidents'))
+
+    # Drawn with the Agg backend in a process pool; charts whose data is unchanged since the last run are skipped
+    for filename, status in render_charts(charts, MODELS_DIR, workers=args.chart_workers, force=args.force_charts):
+        print(f"Chart '{filename}': {status}")
+
+    # ================================
+    # STEP 10: Save Model
+    # ================================
+    import joblib
+
+    metrics.step("STEP 10: Save Trained Model")
+
+    # Save the trained model
+    model_file = "gradient_boosting_model.pkl" if args.model == "gradient-boosting" else "random_forest_model.pkl"
+    model_save_path = os.path.join(MODELS_DIR, model_file)
+    joblib.dump(model, model_save_path)
+
+    print(f"{'Gradient boosting' if args.model == 'gradient-boosting' else 'Random Forest'} model saved as "
+          f"'{model_file}'")
+
+    # The vocabularies the model's feature columns were built from
+    if feature_encoder is not None:
+        save_encoder(feature_encoder, FEATURE_ENCODER_JSON)
+        print(f"Feature encoder saved as '{os.path.basename(FEATURE_ENCODER_JSON)}'")
+
+    # Category mix of the training rows and how often their feature values fell in the rare columns
+    class_shares = np.bincount(y_train, minlength=len(classes)) / len(y_train)
+    rare_shares = feature_encoder.rare_shares(train_df) if feature_encoder is not None else None
+
+    # Everything needed to score new records: encoder (or dense column layout), feature list, labels and model
+    bundle = ModelBundle(model, features, classes, encoder=feature_encoder,
+                         dense_columns=None if feature_encoder is not None else list(X_train.columns),
+                         target=target, info={"training_rows": int(X_train.shape[0]), "accuracy": float(accuracy),
+                                              "macro_f1": float(f1_score(y_test, y_pred, average='macro')),
+                                              "params": model_params, "source": dataset_fingerprint(),
+                                              # Baselines Update Crime Model.py measures drift against
+                                              "class_shares": dict(zip(classes.tolist(), class_shares.tolist())),
+                                              "rare_shares": rare_shares})
+    save_model_bundle(bundle, MODEL_BUNDLE_PATH)
+    print(f"Model bundle {bundle.model_id} saved as '{os.path.basename(MODEL_BUNDLE_PATH)}'")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from project_paths import CRIME_CSV, MO_CODES_CSV, MODEL_BUNDLE_PATH, PREDICTIONS_DIR
+from crime_cleaning import load_mo_code_mapping
+from crime_model import load_model_bundle, score_raw_chunks, PREDICTED_COLUMN
+from crime_schema import iter_raw_crime_csv
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Score Crime Records")
+
+
+class PredictionWriter:
+    """Appends score chunks to a .parquet or .csv file, written under a temporary name until closed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = path + ".tmp"
+        self.parquet = path.lower().endswith(".parquet")
+        self.writer = None
+        self.started = False
+
+    def write(self, scores):
+        if scores.empty:
+            return
+        if self.parquet:
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.temp_path, table.schema, compression="zstd")
+            self.writer.write_table(table.cast(self.writer.schema))
+        else:
+            scores.to_csv(self.temp_path, mode="a" if self.started else "w", header=not self.started, index=False)
+        self.started = True
+
+    def close(self, keep=True):
+        if self.writer is not None:
+            self.writer.close()
+        if self.started:
+            # A failed run leaves the previous predictions file alone
+            if keep:
+                os.replace(self.temp_path, self.path)
+            else:
+                os.remove(self.temp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score new crime records with the saved model bundle.")
+    parser.add_argument("--input", default=CRIME_CSV,
+                        help="Crime CSV in the Data Dictionary layout (default: the project's crime extract)")
+    parser.add_argument("--output", default=os.path.join(PREDICTIONS_DIR, "crime_predictions.parquet"),
+                        help="Predictions file, .parquet or .csv "
+                             "(default: Output/predictions/crime_predictions.parquet)")
+    parser.add_argument("--bundle", default=MODEL_BUNDLE_PATH, help="Model bundle saved by Predictive Analysis.py")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Records read and scored per chunk")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes scoring chunks in parallel (default: one per CPU)")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    # ------------------------ STEP 1: Load Model Bundle ------------------------ #
+    metrics.step("STEP 1: Load Model Bundle")
+
+    bundle = load_model_bundle(args.bundle)
+    mo_code_mapping = load_mo_code_mapping(MO_CODES_CSV)
+    print(f" - Model {bundle.model_id}: {len(bundle.features)} features ({bundle.encoding} encoding), "
+          f"{len(bundle.classes)} categories, trained on {bundle.info.get('training_rows', 0):,} rows")
+
+    # ------------------------ STEP 2: Score Records ------------------------ #
+    metrics.step(f"STEP 2: Scoring Records ({workers} workers, {args.chunk_size:,} per chunk)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    writer = PredictionWriter(args.output)
+    category_counts = []
+    scored = 0
+    started = time.perf_counter()
+    try:
+        raw_chunks = iter_raw_crime_csv(args.input, args.chunk_size)
+        for scores in score_raw_chunks(raw_chunks, mo_code_mapping, args.bundle, workers):
+            writer.write(scores)
+            category_counts.append(scores[PREDICTED_COLUMN].value_counts())
+            scored += len(scores)
+            print(f" • {scored:,} records scored ({scored / (time.perf_counter() - started):,.0f} rows/s)")
+    except BaseException:
+        writer.close(keep=False)
+        raise
+    writer.close()
+    elapsed = time.perf_counter() - started
+    metrics.rows(scored)
+
+    # ------------------------ STEP 3: Summary ------------------------ #
+    metrics.step("STEP 3: Summary")
+
+    print(f"\n✅ {scored:,} predictions saved to:\n{args.output}")
+    print(f" - Throughput: {scored / elapsed if elapsed else 0:,.0f} rows/s ({elapsed:.2f}s)")
+    if category_counts:
+        print("\n=== Predicted Categories ===")
+        totals = pd.concat(category_counts).groupby(level=0).sum().sort_values(ascending=False)
+        for category, count in totals.items():
+            print(f" • {category:<20}: {count:,}")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+from project_paths import CRIME_CSV, BENCHMARK_DIR
+from crime_model import INCIDENT_COLUMNS
+from crime_schema import iter_raw_crime_csv, RAW_DATE_FORMAT
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Service Load Test")
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Prediction Service.py")
+
+
+def sample_incidents(csv_path, rows):
+    """The first `rows` records of a crime CSV as JSON-ready incident dicts."""
+    crime_df = next(iter_raw_crime_csv(csv_path, rows, columns=INCIDENT_COLUMNS))
+    crime_df['DATE OCC'] = crime_df['DATE OCC'].dt.strftime(RAW_DATE_FORMAT)
+    crime_df = crime_df.astype(object).where(crime_df.notna(), None)
+    return crime_df.to_dict('records')
+
+
+def get_json(host, port, path, timeout=5):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def wait_for_service(host, port, timeout):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return get_json(host, port, "/health")
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.25)
+
+
+def run_load(host, port, incidents, total_requests, concurrency, batch_size):
+    """Send total_requests POST /predict requests from `concurrency` keep-alive clients.
+
+    Returns (latencies in seconds, failed request count, wall seconds).
+    """
+    lock = threading.Lock()
+    next_request = [0]
+    latencies, failures = [], [0]
+
+    def client():
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        own_latencies, own_failures = [], 0
+        while True:
+            with lock:
+                request = next_request[0]
+                next_request[0] += 1
+            if request >= total_requests:
+                break
+            start = request * batch_size % len(incidents)
+            batch = [incidents[(start + offset) % len(incidents)] for offset in range(batch_size)]
+            body = json.dumps(batch[0] if batch_size == 1 else batch)
+            sent = time.perf_counter()
+            try:
+                connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+                ok = False
+            own_latencies.append(time.perf_counter() - sent)
+            own_failures += not ok
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            failures[0] += own_failures
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), failures[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local crime prediction service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="Service to test (default: local port 8765)")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Start Prediction Service.py for the test (on --url's port) and stop it afterwards")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests to send (default 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients sending at once (default 16)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Incidents per request (default 1)")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests sent before measuring (default 50)")
+    parser.add_argument("--sample-from", default=CRIME_CSV,
+                        help="Crime CSV the test incidents are taken from (default: the project's crime extract)")
+    parser.add_argument("--sample-rows", type=int, default=5000, help="Distinct incidents to cycle through")
+    args = parser.parse_args()
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+
+    # ------------------------ STEP 1: Load Sample Incidents ------------------------ #
+    metrics.step("STEP 1: Load Sample Incidents")
+
+    incidents = sample_incidents(args.sample_from, args.sample_rows)
+    metrics.rows(len(incidents))
+    print(f" - {len(incidents):,} incidents from {args.sample_from}")
+
+    # ------------------------ STEP 2: Connect to Service ------------------------ #
+    metrics.step("STEP 2: Connect to Service")
+
+    service = None
+    if args.spawn:
+        service = subprocess.Popen([sys.executable, SERVICE_SCRIPT, "--host", host, "--port", str(port)],
+                                   stdout=subprocess.DEVNULL, env={**os.environ, "CAPSTONE_METRICS_FILE": os.devnull})
+    try:
+        health = wait_for_service(host, port, timeout=120 if service else 5)
+        print(f" - Service at {args.url} is up with model {health['model_id']}")
+
+        # ------------------------ STEP 3: Load Test ------------------------ #
+        metrics.step(f"STEP 3: Load Test ({args.requests:,} requests, {args.concurrency} clients, "
+                     f"{args.batch_size} per request)")
+
+        if args.warmup:
+            run_load(host, port, incidents, args.warmup, min(args.concurrency, args.warmup), args.batch_size)
+        server_before = get_json(host, port, "/metrics")
+        latencies, failures, elapsed = run_load(host, port, incidents, args.requests, args.concurrency,
+                                                args.batch_size)
+        server_after = get_json(host, port, "/metrics")
+        metrics.rows(args.requests * args.batch_size)
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+    # ------------------------ STEP 4: Results ------------------------ #
+    metrics.step("STEP 4: Results")
+
+    latency_ms = latencies * 1000
+    p50, p90, p99 = np.percentile(latency_ms, [50, 90, 99])
+    batches = server_after["batches"] - server_before["batches"]
+    served = server_after["incidents"] - server_before["incidents"]
+    report = {
+        "url": args.url,
+        "model_id": health["model_id"],
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "failed": failures,
+        "wall_s": round(elapsed, 3),
+        "requests_per_s": round(args.requests / elapsed, 1),
+        "incidents_per_s": round(args.requests * args.batch_size / elapsed, 1),
+        "latency_ms": {"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2),
+                       "max": round(latency_ms.max(), 2)},
+        "mean_micro_batch": round(served / batches, 1) if batches else None,
+    }
+    print("\n=== Load Test Results ===")
+    print(f" • Requests: {args.requests:,} ({failures:,} failed) in {elapsed:.2f}s")
+    print(f" • Throughput: {report['requests_per_s']:,.0f} requests/s, {report['incidents_per_s']:,.0f} incidents/s")
+    print(f" • Latency: p50 {p50:.1f} ms, p90 {p90:.1f} ms, p99 {p99:.1f} ms, max {latency_ms.max():.1f} ms")
+    if batches:
+        print(f" • Server micro-batches: {batches:,}, {report['mean_micro_batch']} incidents each on average")
+
+    report_dir = os.path.join(BENCHMARK_DIR, "service")
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, f"load_test_{datetime.now():%Y%m%dT%H%M%S}.json")
+    with open(report_path, "w", encoding="utf-8") as report_out:
+        json.dump(report, report_out, indent=2)
+    print(f"\n✅ Report saved to:\n{report_path}")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
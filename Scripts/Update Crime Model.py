@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+from project_paths import MODEL_BUNDLE_PATH, MODEL_UPDATES_LOG
+from crime_model import (
+    ModelBundle, load_model_bundle, save_model_bundle, load_model_frame, label_codes, drift_report, add_trees,
+    training_class_weight
+)
+from step_metrics import StepMetrics
+
+metrics = StepMetrics("Update Crime Model")
+
+
+def month_range(month):
+    start = pd.Timestamp(f"{month}-01")
+    return start, start + pd.offsets.MonthBegin(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a new month of incidents for drift and warm-start the "
+                                                 "crime category model on it.")
+    parser.add_argument("--month", required=True, help="Month of DATE OCC to update with, e.g. 2024-07")
+    parser.add_argument("--trees", type=int, default=20, help="Trees fitted on the new month (default 20)")
+    parser.add_argument("--max-trees", type=int, default=None,
+                        help="Keep at most this many trees, dropping the oldest first (default: keep them all)")
+    parser.add_argument("--eval-fraction", type=float, default=0.2,
+                        help="Share of the month held out to compare the model before and after (default 0.2)")
+    parser.add_argument("--bundle", default=MODEL_BUNDLE_PATH, help="Model bundle to update (saved in place)")
+    parser.add_argument("--dry-run", action="store_true", help="Report drift and the update, but don't save it")
+    args = parser.parse_args()
+    occurred = month_range(args.month)
+
+    # ------------------------ STEP 1: Load Model Bundle ------------------------ #
+    metrics.step("STEP 1: Load Model Bundle")
+
+    bundle = load_model_bundle(args.bundle)
+    if not isinstance(bundle.model, RandomForestClassifier):
+        parser.error(f"{args.bundle} holds a {type(bundle.model).__name__}, which can't grow trees; update the "
+                     f"full Random Forest bundle (and export it again)")
+    try:
+        training_class_weight(bundle)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f" - Model {bundle.model_id}: {len(bundle.model.estimators_)} trees, {len(bundle.classes)} categories, "
+          f"{bundle.info.get('training_rows', 0):,} training rows")
+
+    # ------------------------ STEP 2: Load New Month ------------------------ #
+    metrics.step(f"STEP 2: Load {args.month} Incidents")
+
+    crime_df, _ = load_model_frame(bundle.features, bundle.target, occurred=occurred)
+    crime_df = crime_df[crime_df[bundle.target].notna()].reset_index(drop=True)
+    metrics.rows(len(crime_df))
+    if crime_df.empty:
+        print(f"⚠️ No labelled incidents occurred in {args.month}; nothing to update")
+        metrics.finish()
+        return
+    print(f" - {len(crime_df):,} labelled incidents from {occurred[0]:%Y-%m-%d} to {occurred[1]:%Y-%m-%d}")
+
+    # ------------------------ STEP 3: Drift Check ------------------------ #
+    metrics.step("STEP 3: Drift Check", rows=len(crime_df))
+
+    drift = drift_report(bundle, crime_df)
+    print("\n=== Drift Report ===")
+    holdout_accuracy = drift["holdout_accuracy"]
+    print(f" • Accuracy: {drift['accuracy']*100:.2f}%"
+          + (f" (holdout {holdout_accuracy*100:.2f}%)" if holdout_accuracy is not None else ""))
+    holdout_f1 = drift["holdout_macro_f1"]
+    print(f" • Macro-F1: {drift['macro_f1']:.3f}"
+          + (f" (holdout {holdout_f1:.3f})" if holdout_f1 is not None else ""))
+    if "category_psi" in drift:
+        print(f" • Category mix PSI: {drift['category_psi']:.3f}"
+              + (" ⚠️ shifted" if drift["category_psi"] > 0.25 else ""))
+    for label, recall in drift["recall"].items():
+        print(f" • Recall {label:<20}: {recall:.3f}")
+    for column, shares in drift.get("rare_shares", {}).items():
+        if shares["training"] is not None and shares["new"] > shares["training"] + 0.05:
+            print(f" ⚠️ {column}: {shares['new']:.1%} of values unseen in training (was {shares['training']:.1%})")
+    if drift["unknown_categories"]:
+        print(f" ⚠️ Categories the model can't predict (left out of the update): {drift['unknown_categories']}")
+
+    # ------------------------ STEP 4: Warm-Start Update ------------------------ #
+    metrics.step(f"STEP 4: Add {args.trees} Trees", rows=len(crime_df))
+
+    # The new trees see the training part of the month; the held-out part compares old and new models
+    codes = label_codes(bundle, crime_df[bundle.target])
+    known = crime_df[codes >= 0].reset_index(drop=True)
+    codes = codes[codes >= 0]
+    if len(known) < 10:
+        print(f"⚠️ Only {len(known)} incidents of known categories; too few to update with")
+        metrics.finish()
+        return
+    try:
+        train_df, eval_df, y_train, y_eval = train_test_split(known, codes, test_size=args.eval_fraction,
+                                                              stratify=codes, random_state=42)
+    except ValueError:  # a category too rare to split proportionally
+        train_df, eval_df, y_train, y_eval = train_test_split(known, codes, test_size=args.eval_fraction,
+                                                              random_state=42)
+    accuracy_before = accuracy_score(y_eval, bundle.model.predict(bundle.encode(eval_df)))
+    trees_before = len(bundle.model.estimators_)
+
+    started = time.perf_counter()
+    add_trees(bundle, bundle.encode(train_df), np.asarray(y_train), args.trees, args.max_trees)
+    update_s = time.perf_counter() - started
+    accuracy_after = accuracy_score(y_eval, bundle.model.predict(bundle.encode(eval_df)))
+    print(f" - {trees_before} → {len(bundle.model.estimators_)} trees, fitted on {len(train_df):,} rows "
+          f"in {update_s:.2f}s")
+    print(f" - Held-out {args.month} accuracy: {accuracy_before*100:.2f}% before, {accuracy_after*100:.2f}% after "
+          f"({len(eval_df):,} rows)")
+
+    # ------------------------ STEP 5: Save Updated Bundle ------------------------ #
+    metrics.step("STEP 5: Save Updated Bundle")
+
+    update = {"month": args.month, "rows": len(train_df), "eval_rows": len(eval_df), "trees_added": args.trees,
+              "trees": len(bundle.model.estimators_), "accuracy_before": float(accuracy_before),
+              "accuracy_after": float(accuracy_after), "update_s": round(update_s, 3)}
+    # Holdout figures and training baselines stay those of the full training run
+    info = {key: value for key, value in bundle.info.items() if key not in ("model_id", "sklearn_version")}
+    info.update(parent_model_id=bundle.model_id, updates=bundle.info.get("updates", []) + [update],
+                training_rows=bundle.info.get("training_rows", 0) + len(train_df))
+    updated = ModelBundle(bundle.model, bundle.features, bundle.classes, encoder=bundle.encoder,
+                          dense_columns=bundle.dense_columns, target=bundle.target, info=info)
+
+    log_entry = {"updated_at": datetime.now().isoformat(timespec="seconds"), "bundle": os.path.abspath(args.bundle),
+                 "parent_model_id": bundle.model_id, "model_id": None if args.dry_run else updated.model_id,
+                 "dry_run": args.dry_run, **update, "drift": drift}
+    if args.dry_run:
+        print(" - Dry run: bundle left unchanged")
+    else:
+        save_model_bundle(updated, args.bundle)
+        print(f"✅ Model bundle {updated.model_id} (from {bundle.model_id}) saved as "
+              f"'{os.path.basename(args.bundle)}'")
+    os.makedirs(os.path.dirname(MODEL_UPDATES_LOG) or ".", exist_ok=True)
+    with open(MODEL_UPDATES_LOG, "a", encoding="utf-8") as log_out:
+        log_out.write(json.dumps(log_entry) + "\n")
+    print(f" - Update logged to: {MODEL_UPDATES_LOG}")
+
+    metrics.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# Headless chart rendering for the Capstone scripts.
+#
+# A chart is described by a ChartSpec: the PNG file name, a draw function from this module and the
+# (already aggregated) data it plots, e.g.
+#
+#   ChartSpec("Crime_Category.png", bar_chart, category_counts, figsize=(10, 6),
+#             title='Overall Crime Category Distribution', xlabel='Crime Category', ylabel='Number of Crimes')
+#
+# render_charts draws a list of specs with the Agg backend in a process pool and saves them to a folder.
+# Each spec is hashed (its data, options and the drawing code in this module); the hashes of the last
+# render are kept in chart_manifest.json next to the PNGs, so a chart whose hash hasn't changed is
+# skipped. --force-charts on the scripts (or CAPSTONE_FORCE_CHARTS=1) redraws everything.
+# show_charts is the interactive version: it draws the specs one by one on screen with pyplot.
+import hashlib
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.ticker as mticker
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.figure import Figure
+
+MANIFEST_NAME = "chart_manifest.json"
+FORCE_RENDER = os.environ.get("CAPSTONE_FORCE_CHARTS") == "1"
+
+
+class ChartSpec:
+    def __init__(self, filename, draw, data, figsize=(10, 6), **options):
+        """draw(figure, data, **options) draws the chart on an empty figure of size figsize."""
+        self.filename = filename
+        self.draw = draw
+        self.data = data
+        self.figsize = tuple(figsize)
+        self.options = options
+
+    def digest(self):
+        key_parts = [_module_source(), self.draw.__name__, self.figsize, repr(sorted(self.options.items())),
+                     _data_digest(self.data)]
+        return hashlib.sha256(repr(key_parts).encode('utf-8')).hexdigest()
+
+
+_source = None
+
+
+def _module_source():
+    # Any change to the drawing code redraws every chart
+    global _source
+    if _source is None:
+        _source = inspect.getsource(sys.modules[__name__])
+    return _source
+
+
+def _data_digest(data):
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        labels = [data.name] if isinstance(data, pd.Series) else list(data.columns)
+        values = pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()
+        return [repr(labels), repr(list(data.index.names)), str(data.dtypes), hashlib.sha256(values).hexdigest()]
+    if isinstance(data, np.ndarray):
+        return [str(data.dtype), data.shape, hashlib.sha256(np.ascontiguousarray(data).tobytes()).hexdigest()]
+    return repr(data)
+
+
+# ------------------------ Drawing functions ------------------------ #
+def _thousands(value, _):
+    return format(int(value), ',')
+
+
+def _labels(ax, title, xlabel, ylabel):
+    ax.set_title(title)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+
+
+def _tilt(ax, rotation, ha):
+    if rotation:
+        for label in ax.get_xticklabels():
+            label.set_rotation(rotation)
+            if ha:
+                label.set_horizontalalignment(ha)
+
+
+def line_chart(figure, data, title, xlabel=None, ylabel=None):
+    ax = figure.subplots()
+    data.plot(kind='line', ax=ax)
+    _labels(ax, title, xlabel, ylabel)
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(_thousands))
+
+
+def bar_chart(figure, data, title, xlabel=None, ylabel=None, horizontal=False, single_color=False,
+              thousands=False, rotation=None, ha=None):
+    """Bars of a Series: one seaborn-coloured bar per index value, or plain pandas bars (single_color)."""
+    ax = figure.subplots()
+    if single_color:
+        data.plot(kind='barh' if horizontal else 'bar', ax=ax)
+    elif horizontal:
+        sns.barplot(x=data.to_numpy(), y=data.index.astype(str).to_numpy(), ax=ax)
+    else:
+        sns.barplot(x=data.index.astype(str).to_numpy(), y=data.to_numpy(), ax=ax)
+    _labels(ax, title, xlabel, ylabel)
+    _tilt(ax, rotation, ha)
+    if thousands:
+        (ax.xaxis if horizontal else ax.yaxis).set_major_formatter(mticker.FuncFormatter(_thousands))
+
+
+def histogram(figure, data, x, weights, title, xlabel=None, ylabel=None, bins=30, kde=True):
+    """Histogram of pre-counted values: data[x] weighted by data[weights]."""
+    ax = figure.subplots()
+    sns.histplot(x=data[x].astype(float), weights=data[weights], bins=bins, kde=kde, ax=ax)
+    _labels(ax, title, xlabel, ylabel)
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(_thousands))
+
+
+def grouped_bar_chart(figure, data, x, y, hue, title, xlabel=None, ylabel=None, legend_title=None, order=None,
+                      rotation=None, ha=None):
+    ax = figure.subplots()
+    sns.barplot(x=x, y=y, hue=hue, data=data, order=order, ax=ax)
+    _labels(ax, title, xlabel, ylabel)
+    _tilt(ax, rotation, ha)
+    ax.legend(title=legend_title or hue)
+    ax.yaxis.set_major_formatter(mticker.FuncFormatter(_thousands))
+
+
+def yearly_change_chart(figure, data, title):
+    """Bars of yearly counts with the year-over-year percentage change as a line on a second axis."""
+    pct_change = data.pct_change() * 100
+    years = data.index.astype(int)
+    ax1 = figure.subplots()
+
+    color = 'tab:blue'
+    ax1.set_xlabel('Year')
+    ax1.set_ylabel('Number of Crimes', color=color)
+    ax1.bar(years, data.to_numpy(), color=color, alpha=0.7)
+    ax1.tick_params(axis='y', labelcolor=color)
+    ax1.yaxis.set_major_formatter(mticker.FuncFormatter(_thousands))
+
+    ax2 = ax1.twinx()
+    color = 'tab:red'
+    ax2.set_ylabel('Year-over-Year Change (%)', color=color)
+    ax2.plot(years, pct_change.to_numpy(), color=color, marker='o', linestyle='--')
+    ax2.tick_params(axis='y', labelcolor=color)
+    ax2.yaxis.set_major_formatter(mticker.FuncFormatter(lambda value, _: f"{value:.1f}%"))
+    ax1.set_title(title)
+
+
+def learning_curve_chart(figure, data, title, scores, costs, marker=None):
+    """Scores (top) and costs (bottom, one axis each) against the training rows in data's index, log scale.
+
+    scores, costs -- {column: label}; marker -- training rows to draw a dotted line at (e.g. the saturation point)
+    """
+    ax1, ax2 = figure.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 2]})
+    rows = data.index.to_numpy()
+    for column, label in scores.items():
+        ax1.plot(rows, data[column].to_numpy(), marker='o', label=label)
+    ax1.set_ylabel('Score')
+    ax1.legend()
+    ax1.set_title(title)
+
+    cost_axes = [ax2, ax2.twinx()][:len(costs)]
+    for (column, label), ax, color in zip(costs.items(), cost_axes, ['tab:blue', 'tab:red']):
+        ax.plot(rows, data[column].to_numpy(), color=color, marker='s', linestyle='--')
+        ax.set_ylabel(label, color=color)
+        ax.tick_params(axis='y', labelcolor=color)
+    ax2.set_xscale('log')
+    ax2.set_xlabel('Training Rows')
+    ax2.xaxis.set_major_formatter(mticker.FuncFormatter(_thousands))
+    if marker is not None:
+        for ax in (ax1, ax2):
+            ax.axvline(marker, color='grey', linestyle=':')
+
+
+def heatmap(figure, data, title, xlabel=None, ylabel=None, fmt='.2g', cmap='Blues'):
+    """Annotated heatmap of a DataFrame; its index and columns label the rows and columns."""
+    ax = figure.subplots()
+    sns.heatmap(data, annot=True, fmt=fmt, cmap=cmap, ax=ax)
+    _labels(ax, title, xlabel, ylabel)
+
+
+# ------------------------ Rendering ------------------------ #
+def _use_agg():
+    matplotlib.use('Agg')
+
+
+def _draw(spec, figure, path):
+    spec.draw(figure, spec.data, **spec.options)
+    figure.tight_layout()
+    figure.savefig(path)
+
+
+def _render(spec, path):
+    _draw(spec, Figure(figsize=spec.figsize), path)
+
+
+def _load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as manifest_in:
+        return json.load(manifest_in)
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding='utf-8') as manifest_out:
+        json.dump(manifest, manifest_out, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def render_charts(specs, out_dir, workers=None, force=False):
+    """Save every spec as out_dir/<filename> with the Agg backend, skipping charts that haven't changed.
+
+    workers -- processes to draw with (default: one per CPU, at most one per chart; 1 draws in this process)
+    Returns [(filename, "rendered" or "unchanged")] in the order of specs.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    digests = {spec.filename: spec.digest() for spec in specs}
+    pending = [spec for spec in specs
+               if force or FORCE_RENDER or manifest.get(spec.filename) != digests[spec.filename]
+               or not os.path.exists(os.path.join(out_dir, spec.filename))]
+    paths = [os.path.join(out_dir, spec.filename) for spec in pending]
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as executor:
+            list(executor.map(_render, pending, paths))
+    else:
+        for spec, path in zip(pending, paths):
+            _render(spec, path)
+
+    manifest.update({spec.filename: digests[spec.filename] for spec in pending})
+    _save_manifest(out_dir, manifest)
+    rendered = {spec.filename for spec in pending}
+    return [(spec.filename, "rendered" if spec.filename in rendered else "unchanged") for spec in specs]
+
+
+def show_charts(specs, out_dir):
+    """Draw the specs one at a time with pyplot (interactive backend), saving each before it is shown."""
+    import matplotlib.pyplot as plt
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    for spec in specs:
+        figure = plt.figure(figsize=spec.figsize)
+        _draw(spec, figure, os.path.join(out_dir, spec.filename))
+        plt.show()
+        plt.close(figure)
+        manifest[spec.filename] = spec.digest()
+    _save_manifest(out_dir, manifest)
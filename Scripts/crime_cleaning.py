@@ -0,0 +1,500 @@
+# Row-level cleaning steps shared by the Data Cleaning and Curation Pipeline.
+# Each function takes a crime DataFrame (the whole file or one chunk of it) and
+# returns the cleaned frame, so the same code runs in-memory and in streaming mode.
+import numpy as np
+import pandas as pd
+
+descent_mapping = {
+    'A': 'Other Asian', 'B': 'Black', 'C': 'Chinese', 'D': 'Cambodian',
+    'F': 'Filipino', 'G': 'Guamanian', 'H': 'Hispanic/Latin/Mexican',
+    'I': 'American Indian/Alaskan Native', 'J': 'Japanese', 'K': 'Korean',
+    'L': 'Laotian', 'O': 'Other', 'P': 'Pacific Islander', 'S': 'Samoan',
+    'U': 'Hawaiian', 'V': 'Vietnamese', 'W': 'White', 'X': 'Unknown',
+    'Z': 'Asian Indian'
+}
+
+age_bins = [0, 12, 18, 25, 35, 50, 65, 100, 150]
+age_labels = ['Child (0-12)', 'Teen (13-18)', 'Young Adult (19-25)', 'Adult (26-35)',
+              'Middle Age (36-50)', 'Senior (51-65)', 'Elderly (66-100)', 'Super Elderly (100+)']
+
+crime_category_mapping = {
+    # Violent Crimes
+    "BATTERY - SIMPLE ASSAULT": "Violent Crime",
+    "ASSAULT WITH DEADLY WEAPON, AGGRAVATED ASSAULT": "Violent Crime",
+    "INTIMATE PARTNER - SIMPLE ASSAULT": "Violent Crime",
+    "INTIMATE PARTNER - AGGRAVATED ASSAULT": "Violent Crime",
+    "BATTERY POLICE (SIMPLE)": "Violent Crime",
+    "BATTERY WITH SEXUAL CONTACT": "Violent Crime",
+    "ASSAULT WITH DEADLY WEAPON ON POLICE OFFICER": "Violent Crime",
+    "CRIMINAL THREATS - NO WEAPON DISPLAYED": "Violent Crime",
+    "CRIMINAL HOMICIDE": "Violent Crime",
+    "ATTEMPTED ROBBERY": "Violent Crime",
+    "ROBBERY": "Violent Crime",
+    "OTHER ASSAULT": "Violent Crime",
+    "KIDNAPPING": "Violent Crime",
+    "KIDNAPPING - GRAND ATTEMPT": "Violent Crime",
+    "CHILD ABUSE (PHYSICAL) - SIMPLE ASSAULT": "Violent Crime",
+    "CHILD ABUSE (PHYSICAL) - AGGRAVATED ASSAULT": "Violent Crime",
+    "CRM AGNST CHLD (13 OR UNDER) (14-15 & SUSP 10 YRS OLDER)": "Violent Crime",
+    "RESISTING ARREST": "Violent Crime",
+
+    # Property Crimes
+    "VEHICLE - STOLEN": "Property Crime",
+    "BURGLARY FROM VEHICLE": "Property Crime",
+    "BURGLARY": "Property Crime",
+    "THEFT PLAIN - PETTY ($950 & UNDER)": "Property Crime",
+    "THEFT FROM MOTOR VEHICLE - PETTY ($950 & UNDER)": "Property Crime",
+    "THEFT FROM MOTOR VEHICLE - GRAND ($950.01 AND OVER)": "Property Crime",
+    "THEFT-GRAND ($950.01 & OVER)EXCPT,GUNS,FOWL,LIVESTK,PROD": "Property Crime",
+    "SHOPLIFTING - PETTY THEFT ($950 & UNDER)": "Property Crime",
+    "SHOPLIFTING-GRAND THEFT ($950.01 & OVER)": "Property Crime",
+    "BURGLARY, ATTEMPTED": "Property Crime",
+    "VEHICLE - ATTEMPT STOLEN": "Property Crime",
+    "BIKE - STOLEN": "Property Crime",
+    "BIKE - ATTEMPTED STOLEN": "Property Crime",
+    "THEFT, PERSON": "Property Crime",
+    "BURGLARY FROM VEHICLE, ATTEMPTED": "Property Crime",
+    "THEFT FROM MOTOR VEHICLE - ATTEMPT": "Property Crime",
+    "BOAT - STOLEN": "Property Crime",
+    "PICKPOCKET": "Property Crime",
+    "PICKPOCKET, ATTEMPT": "Property Crime",
+    "PURSE SNATCHING": "Property Crime",
+    "PURSE SNATCHING - ATTEMPT": "Property Crime",
+    "TILL TAP - PETTY ($950 & UNDER)": "Property Crime",
+    "TILL TAP - GRAND THEFT ($950.01 & OVER)": "Property Crime",
+    "THEFT, COIN MACHINE - PETTY ($950 & UNDER)": "Property Crime",
+    "THEFT, COIN MACHINE - GRAND ($950.01 & OVER)": "Property Crime",
+    "THEFT, COIN MACHINE - ATTEMPT": "Property Crime",
+    "THEFT PLAIN - ATTEMPT": "Property Crime",
+    "SHOPLIFTING - ATTEMPT": "Property Crime",
+    "EMBEZZLEMENT, PETTY THEFT ($950 & UNDER)": "Property Crime",
+    "DRIVING WITHOUT OWNER CONSENT (DWOC)": "Property Crime",
+    "ARSON": "Property Crime",
+
+    # Public Order Crimes
+    "VANDALISM - FELONY ($400 & OVER, ALL CHURCH VANDALISMS)": "Public Order Crime",
+    "VANDALISM - MISDEAMEANOR ($399 OR UNDER)": "Public Order Crime",
+    "TRESPASSING": "Public Order Crime",
+    "BRANDISH WEAPON": "Public Order Crime",
+    "DISTURBING THE PEACE": "Public Order Crime",
+    "DISCHARGE FIREARMS/SHOTS FIRED": "Public Order Crime",
+    "SHOTS FIRED AT INHABITED DWELLING": "Public Order Crime",
+    "SHOTS FIRED AT MOVING VEHICLE, TRAIN OR AIRCRAFT": "Public Order Crime",
+    "THROWING OBJECT AT MOVING VEHICLE": "Public Order Crime",
+    "ILLEGAL DUMPING": "Public Order Crime",
+    "BLOCKING DOOR INDUCTION CENTER": "Public Order Crime",
+    "FAILURE TO YIELD": "Public Order Crime",
+    "FAILURE TO DISPERSE": "Public Order Crime",
+    "PEEPING TOM": "Public Order Crime",
+    "PROWLER": "Public Order Crime",
+    "DISRUPT SCHOOL": "Public Order Crime",
+    "WEAPONS POSSESSION/BOMBING": "Public Order Crime",
+    "FIREARMS EMERGENCY PROTECTIVE ORDER (FIREARMS EPO)": "Public Order Crime",
+    "FIREARMS RESTRAINING ORDER (FIREARMS RO)": "Public Order Crime",
+
+    # Sexual Offenses
+    "RAPE, FORCIBLE": "Sexual Offense",
+    "RAPE, ATTEMPTED": "Sexual Offense",
+    "ORAL COPULATION": "Sexual Offense",
+    "SODOMY/SEXUAL CONTACT B/W PENIS OF ONE PERS TO ANUS OTH": "Sexual Offense",
+    "SEXUAL PENETRATION W/FOREIGN OBJECT": "Sexual Offense",
+    "SEX,UNLAWFUL(INC MUTUAL CONSENT, PENETRATION W/ FRGN OBJ": "Sexual Offense",
+    "LEWD/LASCIVIOUS ACTS WITH CHILD": "Sexual Offense",
+    "LEWD CONDUCT": "Sexual Offense",
+    "CHILD ANNOYING (17YRS & UNDER)": "Sexual Offense",
+    "INDECENT EXPOSURE": "Sexual Offense",
+    "INCEST (SEXUAL ACTS BETWEEN BLOOD RELATIVES)": "Sexual Offense",
+    "BEASTIALITY, CRIME AGAINST NATURE SEXUAL ASSLT WITH ANIM": "Sexual Offense",
+
+    # White Collar Crimes
+    "THEFT OF IDENTITY": "White Collar Crime",
+    "CREDIT CARDS, FRAUD USE ($950.01 & OVER)": "White Collar Crime",
+    "CREDIT CARDS, FRAUD USE ($950 & UNDER": "White Collar Crime",
+    "BUNCO, GRAND THEFT": "White Collar Crime",
+    "BUNCO, PETTY THEFT": "White Collar Crime",
+    "BUNCO, ATTEMPT": "White Collar Crime",
+    "DOCUMENT FORGERY / STOLEN FELONY": "White Collar Crime",
+    "DOCUMENT WORTHLESS ($200.01 & OVER)": "White Collar Crime",
+    "DOCUMENT WORTHLESS ($200 & UNDER)": "White Collar Crime",
+    "DISHONEST EMPLOYEE - GRAND THEFT": "White Collar Crime",
+    "DISHONEST EMPLOYEE - PETTY THEFT": "White Collar Crime",
+    "DISHONEST EMPLOYEE ATTEMPTED THEFT": "White Collar Crime",
+    "DEFRAUDING INNKEEPER/THEFT OF SERVICES, $950 & UNDER": "White Collar Crime",
+    "DEFRAUDING INNKEEPER/THEFT OF SERVICES, OVER $950.01": "White Collar Crime",
+    "EXTORTION": "White Collar Crime",
+    "EMBEZZLEMENT, GRAND THEFT ($950.01 & OVER)": "White Collar Crime",
+    "COUNTERFEIT": "White Collar Crime",
+    "FORGERY": "White Collar Crime",
+    "UNAUTHORIZED COMPUTER ACCESS": "White Collar Crime",
+    "GRAND THEFT / INSURANCE FRAUD": "White Collar Crime",
+
+    # Other / Miscellaneous
+    "OTHER MISCELLANEOUS CRIME": "Other",
+    "VIOLATION OF RESTRAINING ORDER": "Other",
+    "VIOLATION OF TEMPORARY RESTRAINING ORDER": "Other",
+    "VIOLATION OF COURT ORDER": "Other",
+    "SEX OFFENDER REGISTRANT OUT OF COMPLIANCE": "Other",
+    "CHILD NEGLECT (SEE 300 W.I.C.)": "Other",
+    "CHILD STEALING": "Other",
+    "CHILD ABANDONMENT": "Other",
+    "CHILD PORNOGRAPHY": "Other",
+    "FALSE IMPRISONMENT": "Other",
+    "FALSE POLICE REPORT": "Other",
+    "CONTEMPT OF COURT": "Other",
+    "THREATENING PHONE CALLS/LETTERS": "Other",
+    "LYNCHING": "Other",
+    "LYNCHING - ATTEMPTED": "Other",
+    "HUMAN TRAFFICKING - COMMERCIAL SEX ACTS": "Other",
+    "HUMAN TRAFFICKING - INVOLUNTARY SERVITUDE": "Other",
+    "PANDERING": "Other",
+    "PIMPING": "Other",
+    "CONSPIRACY": "Other",
+    "CONTRIBUTING": "Other",
+    "BIGAMY": "Other",
+    "BRIBERY": "Other",
+    "TRAIN WRECKING": "Other",
+    "DRUGS, TO A MINOR": "Other",
+    "REPLICA FIREARMS(SALE,DISPLAY,MANUFACTURE OR DISTRIBUTE)": "Other",
+    "DRUNK ROLL": "Other",
+    "DRUNK ROLL - ATTEMPT": "Other"
+}
+
+
+def load_mo_code_mapping(mo_codes_path):
+    codes_df = pd.read_csv(mo_codes_path)
+    codes_df['Code'] = codes_df['Code'].astype(str).str.zfill(4)
+    return dict(zip(codes_df['Code'], codes_df['Description']))
+
+
+# ------------------------ STEP 2: Clean Missing Values ------------------------ #
+def fill_missing_values(crime_df):
+    for col in crime_df.columns:
+        if crime_df[col].dtype == 'object' or pd.api.types.is_string_dtype(crime_df[col]):
+            crime_df[col] = crime_df[col].replace(r'^\s*$', pd.NA, regex=True)
+            crime_df[col] = crime_df[col].fillna("Unknown")
+        elif pd.api.types.is_datetime64_any_dtype(crime_df[col]):
+            # Dates read with the raw schema stay datetimes; STEP 4 turns NaT into "Unknown"
+            continue
+        elif pd.api.types.is_extension_array_dtype(crime_df[col]):
+            # Nullable integers (Int16 etc.) can't hold "Unknown", so go through object first
+            crime_df[col] = crime_df[col].astype(object).where(crime_df[col].notna(), "Unknown").astype(str)
+        else:
+            crime_df[col] = crime_df[col].fillna("Unknown").astype(str)
+    return crime_df
+
+
+# ------------------------ STEP 3: Drop Duplicates ------------------------ #
+def drop_duplicate_records(crime_df, seen_dr_nos=None):
+    # seen_dr_nos carries the DR_NOs kept from earlier chunks, so streaming
+    # mode drops the same rows as a single drop_duplicates over the whole file
+    crime_df['DR_NO'] = crime_df['DR_NO'].astype(str)
+    crime_df = crime_df.drop_duplicates(subset='DR_NO')
+    if seen_dr_nos is not None:
+        already_seen = np.fromiter((dr_no in seen_dr_nos for dr_no in crime_df['DR_NO']),
+                                   dtype=bool, count=len(crime_df))
+        crime_df = crime_df[~already_seen].copy()
+        seen_dr_nos.update(crime_df['DR_NO'])
+    return crime_df
+
+
+# ------------------------ STEP 4: Parse and Format Dates ------------------------ #
+def parse_dates(crime_df):
+    crime_df['DATE OCC'] = pd.to_datetime(crime_df['DATE OCC'], errors='coerce')
+    crime_df['Date Rptd'] = pd.to_datetime(crime_df['Date Rptd'], errors='coerce')
+
+    crime_df['DayOfWeek'] = crime_df['DATE OCC'].dt.day_name().fillna("Unknown")
+    crime_df['Month'] = crime_df['DATE OCC'].dt.strftime('%B').fillna("Unknown")
+
+    crime_df['DATE OCC'] = crime_df['DATE OCC'].dt.strftime('%m/%d/%Y').fillna("Unknown")
+    crime_df['Date Rptd'] = crime_df['Date Rptd'].dt.strftime('%m/%d/%Y').fillna("Unknown")
+    return crime_df
+
+
+# ------------------------ STEP 5: Convert TIME OCC ------------------------ #
+def military_to_am_pm(military_str):
+    try:
+        military_str = str(military_str).zfill(4)
+        hour = int(military_str[:2])
+        minute = int(military_str[2:])
+        return pd.Timestamp(f'{hour:02}:{minute:02}').strftime('%I:%M %p')
+    except:
+        return "Unknown"
+
+
+def _build_time_occ_table():
+    # 12-hour label for every 4-digit military time 0000-9999; out-of-range hours/minutes stay "Unknown"
+    table = np.full(10000, "Unknown", dtype=object)
+    for hour in range(24):
+        for minute in range(60):
+            table[hour * 100 + minute] = f"{hour % 12 or 12:02}:{minute:02} {'AM' if hour < 12 else 'PM'}"
+    return table
+
+
+TIME_OCC_TABLE = _build_time_occ_table()
+
+
+def military_to_am_pm_vectorized(time_occ):
+    # Same output as time_occ.apply(military_to_am_pm), but each distinct value is converted once.
+    # Plain 4-digit values go through integer arithmetic and TIME_OCC_TABLE; anything
+    # else (decimals, signs, padding) falls back to military_to_am_pm so the result is identical.
+    codes, uniques = pd.factorize(time_occ)
+    padded = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.zfill(4)
+    is_plain = padded.str.fullmatch(r'[0-9]{4}').fillna(False).to_numpy(dtype=bool)
+
+    labels = np.empty(len(uniques) + 1, dtype=object)
+    labels[:-1][is_plain] = TIME_OCC_TABLE[padded[is_plain].astype(np.int64).to_numpy()]
+    labels[:-1][~is_plain] = [military_to_am_pm(value) for value in np.asarray(uniques, dtype=object)[~is_plain]]
+    labels[-1] = military_to_am_pm(np.nan)  # factorize codes missing values as -1
+    return pd.Series(labels[codes], index=time_occ.index, name=time_occ.name)
+
+
+def convert_time_occ(crime_df, engine="vectorized"):
+    if engine == "apply":
+        crime_df['TIME OCC'] = crime_df['TIME OCC'].apply(military_to_am_pm)
+    else:
+        crime_df['TIME OCC'] = military_to_am_pm_vectorized(crime_df['TIME OCC'])
+    return crime_df
+
+
+# ------------------------ STEP 6: Clean Demographics ------------------------ #
+def clean_demographics(crime_df):
+    crime_df['Vict Age'] = crime_df['Vict Age'].astype(str)
+    crime_df['Vict Age'] = crime_df['Vict Age'].replace(['0', 0], 'Unknown')
+
+    crime_df['Vict Sex'] = crime_df['Vict Sex'].replace({'': 'Unknown', 'X': 'Unknown', 'M': 'Male', 'F': 'Female'})
+
+    crime_df['Vict Descent'] = crime_df['Vict Descent'].map(descent_mapping).fillna('Unknown')
+
+    mask = (crime_df['Vict Sex'] == 'Unknown') & (crime_df['Vict Descent'] == 'Unknown')
+    crime_df.loc[mask, 'Vict Age'] = 'Unknown'
+
+    crime_df['Vict Age Group'] = pd.to_numeric(crime_df['Vict Age'], errors='coerce')
+    crime_df['Vict Age Group'] = pd.cut(crime_df['Vict Age Group'], bins=age_bins, labels=age_labels)
+    crime_df['Vict Age Group'] = crime_df['Vict Age Group'].cat.add_categories(['Unknown']).fillna('Unknown')
+    return crime_df
+
+
+# ------------------------ STEP 7: Expanding MO Codes into Descriptions ------------------------ #
+def expand_mocodes_to_descriptions(mocode_string, mo_code_mapping):
+    if pd.isna(mocode_string) or mocode_string.strip() == "" or mocode_string.strip().lower() == "unknown":
+        return ["None"]
+    code_list = mocode_string.strip().split()
+    return [mo_code_mapping.get(code.zfill(4), "None") for code in code_list]
+
+
+def mo_code_width(mocodes):
+    # Number of MO_Desc_N columns a Mocodes column needs (blank/unknown rows still take one slot)
+    if len(mocodes) == 0:
+        return 1
+    token_counts = mocodes.dropna().astype(str).str.split().str.len()
+    return max(int(token_counts.max()) if len(token_counts) else 0, 1)
+
+
+MO_ROW_SEPARATOR = "|"
+
+
+def split_mocodes(mocodes):
+    """Tokenize the distinct strings of a Mocodes column in one pass.
+
+    Returns (row_codes, unique_count, token_rows, positions, token_codes, unique_tokens):
+    row_codes maps each incident to its distinct Mocodes string (-1 for missing), and
+    token_rows/positions/token_codes list every code of every distinct string in order.
+    Strings that mean "no codes" (blank or "unknown") contribute no tokens.
+    """
+    row_codes, unique_mocodes = pd.factorize(mocodes)
+    unique_mocodes = unique_mocodes.tolist()
+
+    # One split over all distinct strings joined by a separator token is much cheaper than a split
+    # per row. If a row already contains the separator as a token, fall back to splitting each row.
+    tokens = f" {MO_ROW_SEPARATOR} ".join(unique_mocodes).split()
+    token_codes, unique_tokens = pd.factorize(np.array(tokens, dtype=object))
+    separator_code = [i for i, token in enumerate(unique_tokens) if token == MO_ROW_SEPARATOR]
+    is_separator = token_codes == separator_code[0] if separator_code else np.zeros(len(tokens), dtype=bool)
+    if is_separator.sum() != max(len(unique_mocodes) - 1, 0):
+        split_rows = [mocode_string.split() for mocode_string in unique_mocodes]
+        token_codes, unique_tokens = pd.factorize(np.array([t for row in split_rows for t in row], dtype=object))
+        token_rows = np.repeat(np.arange(len(split_rows)), [len(row) for row in split_rows])
+    else:
+        token_rows = np.cumsum(is_separator)[~is_separator]
+        token_codes = token_codes[~is_separator]
+
+    # "Unknown" on its own means no codes at all
+    codes_per_row = np.bincount(token_rows, minlength=len(unique_mocodes))
+    unknown_tokens = np.array([str(token).lower() == "unknown" for token in unique_tokens], dtype=bool)
+    if len(token_codes):
+        keep = ~(unknown_tokens[token_codes] & (codes_per_row[token_rows] == 1))
+        token_rows, token_codes = token_rows[keep], token_codes[keep]
+        codes_per_row = np.bincount(token_rows, minlength=len(unique_mocodes))
+
+    positions = np.arange(len(token_rows)) - np.repeat(np.cumsum(codes_per_row) - codes_per_row, codes_per_row)
+    return row_codes, len(unique_mocodes), token_rows, positions, token_codes, unique_tokens
+
+
+def expand_mocodes_vectorized(mocodes, mo_code_mapping):
+    """Split/explode/merge version of expand_mocodes_to_descriptions over a whole column.
+
+    Returns a 2-D object array of descriptions (one row per incident, padded with "None")
+    that matches applying expand_mocodes_to_descriptions row by row.
+    """
+    row_codes, unique_count, token_rows, positions, token_codes, unique_tokens = split_mocodes(mocodes)
+
+    # Merge the distinct codes against mo_code_mapping once
+    token_descriptions = pd.Series(unique_tokens, dtype=object).str.zfill(4).map(mo_code_mapping).fillna("None")
+    token_descriptions = token_descriptions.to_numpy(dtype=object)
+
+    width = max(int(positions.max()) + 1 if len(positions) else 0, 1)
+
+    # Last row is the all-"None" row that missing values (code -1) pick up
+    unique_descriptions = np.full((unique_count + 1, width), "None", dtype=object)
+    unique_descriptions[token_rows, positions] = token_descriptions[token_codes]
+    return unique_descriptions[row_codes]
+
+
+def expand_mo_codes(crime_df, mo_code_mapping, max_mo_codes=None, engine="vectorized"):
+    # max_mo_codes pins the column count so every streamed chunk has the same layout
+    if engine == "apply":
+        mo_descriptions = crime_df["Mocodes"].apply(expand_mocodes_to_descriptions, args=(mo_code_mapping,))
+        width = mo_descriptions.apply(len).max() if len(mo_descriptions) else 1
+        padded = [descs + ["None"] * (width - len(descs)) for descs in mo_descriptions]
+    else:
+        padded = expand_mocodes_vectorized(crime_df["Mocodes"], mo_code_mapping)
+        width = padded.shape[1]
+    if max_mo_codes is None:
+        max_mo_codes = width
+    mo_desc_columns = [f"MO_Desc_{i+1}" for i in range(max_mo_codes)]
+
+    mo_desc_df = pd.DataFrame(padded, columns=mo_desc_columns[:width], index=crime_df.index)
+    mo_desc_df = mo_desc_df.reindex(columns=mo_desc_columns, fill_value="None")
+
+    crime_df = pd.concat([crime_df, mo_desc_df], axis=1)
+    return crime_df, mo_desc_columns
+
+
+# ------------------------ STEP 8: Crime Category Mapping ------------------------ #
+# crime_category_mapping is keyed by description. It is compiled into a dense array over the integer
+# crime codes (one slot per code 0-999, from the descriptions seen with each code in the data), so
+# categorising a column is a single array index per row, and the same array classifies Crm Cd 1-4.
+# A code seen with descriptions in different categories gets AMBIGUOUS_CODE: its rows are categorised
+# by their own description, and in Crm Cd 1-4 (which have none) it is left out of the mask and reported.
+CRIME_CATEGORIES = ['Violent Crime', 'Property Crime', 'Public Order Crime', 'Sexual Offense',
+                    'White Collar Crime', 'Other']
+CRIME_CODE_COLUMNS = ['Crm Cd', 'Crm Cd 1', 'Crm Cd 2', 'Crm Cd 3', 'Crm Cd 4']
+CRIME_CODE_LIMIT = 1000
+NO_CATEGORY = -1
+AMBIGUOUS_CODE = -2
+# Bit i of Crime_Category_Mask is CRIME_CATEGORIES[i]; the trailing 0s are what AMBIGUOUS_CODE and NO_CATEGORY index
+CATEGORY_BITS = np.array([1 << i for i in range(len(CRIME_CATEGORIES))] + [0, 0], dtype=np.uint8)
+
+
+def crime_code_array(codes):
+    """Crime codes as an int16 array; missing, "Unknown" or out-of-range codes become -1."""
+    # Only a few hundred distinct codes: parse those once, then index (much faster than parsing every string)
+    positions, distinct = pd.factorize(pd.Series(codes))
+    numbers = pd.to_numeric(pd.Series(distinct), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    valid = (numbers >= 0) & (numbers < CRIME_CODE_LIMIT) & (numbers == np.round(numbers))
+    distinct_codes = np.append(np.where(valid, numbers, -1).astype(np.int16), np.int16(-1))
+    return distinct_codes[positions]
+
+
+def crime_code_pairs(crime_df):
+    """Every distinct (Crm Cd, Crm Cd Desc) pair in crime_df, in order of first appearance."""
+    pairs = pd.DataFrame({'Crm Cd': crime_code_array(crime_df['Crm Cd']),
+                          'Crm Cd Desc': crime_df['Crm Cd Desc'].to_numpy(dtype=object)})
+    pairs = pairs[(pairs['Crm Cd'] >= 0) & pairs['Crm Cd Desc'].notna() & (pairs['Crm Cd Desc'] != "Unknown")]
+    return pairs.drop_duplicates().reset_index(drop=True)
+
+
+def compile_crime_code_lookup(code_pairs):
+    """Compile crime_category_mapping for the codes in code_pairs (from crime_code_pairs).
+
+    Returns the lookup array (code -> index into CRIME_CATEGORIES, NO_CATEGORY for codes never seen
+    with a description, AMBIGUOUS_CODE for codes whose descriptions fall in different categories;
+    index -1 also gives NO_CATEGORY) and the pairs whose description has no mapping entry, which are
+    categorised as "Other".
+    """
+    code_pairs = code_pairs.drop_duplicates()
+    categories = code_pairs['Crm Cd Desc'].map(crime_category_mapping)
+    category_index = pd.Series(categories.fillna("Other").map(CRIME_CATEGORIES.index).to_numpy())
+    per_code = category_index.groupby(code_pairs['Crm Cd'].to_numpy())
+    code_lookup = np.full(CRIME_CODE_LIMIT + 1, NO_CATEGORY, dtype=np.int8)
+    code_lookup[per_code.first().index] = np.where(per_code.nunique() > 1, AMBIGUOUS_CODE, per_code.first())
+    return code_lookup, code_pairs[categories.isna()].reset_index(drop=True)
+
+
+def map_crime_categories(crime_df, code_lookup=None):
+    """Crime_Category from the integer Crm Cd, and Crime_Category_Mask (one bit per category) over Crm Cd 1-4.
+
+    code_lookup comes from compile_crime_code_lookup; pass one compiled over the whole file when
+    crime_df is a chunk, so every chunk classifies the secondary codes the same way.
+    """
+    if code_lookup is None:
+        code_lookup, _ = compile_crime_code_lookup(crime_code_pairs(crime_df))
+    category_index = code_lookup[crime_code_array(crime_df['Crm Cd'])]
+
+    # Rows without a usable code, or whose code is ambiguous, fall back to their own description
+    no_code = category_index < 0
+    if no_code.any():
+        fallback = pd.Series(crime_df['Crm Cd Desc'].to_numpy(dtype=object)[no_code])
+        fallback = fallback.map(crime_category_mapping).fillna("Other")
+        category_index[no_code] = fallback.map(CRIME_CATEGORIES.index).to_numpy()
+
+    category_mask = CATEGORY_BITS[category_index]
+    for col in CRIME_CODE_COLUMNS[1:]:
+        if col in crime_df.columns:
+            category_mask |= CATEGORY_BITS[code_lookup[crime_code_array(crime_df[col])]]
+
+    crime_df['Crime_Category'] = np.array(CRIME_CATEGORIES, dtype=object)[category_index]
+    crime_df['Crime_Category_Mask'] = category_mask
+    return crime_df
+
+
+def unmapped_crime_codes(crime_df, code_lookup):
+    """What STEP 8 couldn't categorise.
+
+    Returns the incident counts per (Crm Cd, Crm Cd Desc) whose description has no crime_category_mapping
+    entry (these became "Other"), and the counts of codes in Crm Cd 1-4 with no category in code_lookup
+    or with descriptions in different categories (these are left out of Crime_Category_Mask).
+    """
+    descriptions = crime_df['Crm Cd Desc'].astype(object)
+    unmapped = ~descriptions.isin(list(crime_category_mapping))
+    primary = pd.DataFrame({'Crm Cd': crime_df.loc[unmapped, 'Crm Cd'].astype(object).to_numpy(),
+                            'Crm Cd Desc': descriptions[unmapped].to_numpy()})
+    primary_counts = primary.fillna("Unknown").value_counts()
+
+    codes = np.concatenate([crime_code_array(crime_df[col]) for col in CRIME_CODE_COLUMNS[1:]
+                            if col in crime_df.columns] + [np.empty(0, dtype=np.int16)])
+    codes = codes[(codes >= 0) & (code_lookup[codes] < 0)]
+    secondary_counts = pd.Series(codes, dtype='int64').value_counts()
+    return primary_counts, secondary_counts
+
+
+def scan_raw_chunks(raw_chunks):
+    """Cheap first pass for streaming mode: the MO_Desc column count, the row count and the crime code pairs.
+
+    raw_chunks is an iterable of raw DataFrames with at least Mocodes, Crm Cd and Crm Cd Desc
+    (e.g. crime_schema.iter_raw_crime_csv(..., columns=['Mocodes', 'Crm Cd', 'Crm Cd Desc'])).
+    """
+    max_mo_codes = 1
+    total_rows = 0
+    code_pairs = []
+    for chunk in raw_chunks:
+        total_rows += len(chunk)
+        max_mo_codes = max(max_mo_codes, mo_code_width(chunk['Mocodes']))
+        code_pairs.append(crime_code_pairs(chunk))
+    if not code_pairs:
+        return max_mo_codes, total_rows, pd.DataFrame(columns=['Crm Cd', 'Crm Cd Desc'])
+    return max_mo_codes, total_rows, pd.concat(code_pairs, ignore_index=True).drop_duplicates()
+
+
+def clean_chunk(chunk, mo_code_mapping, max_mo_codes, seen_dr_nos=None, engine="vectorized", wide_mo=True,
+                code_lookup=None):
+    """Run STEP 2-8 on one chunk of the raw crime CSV (wide_mo=False skips the MO_Desc_N columns)."""
+    chunk = fill_missing_values(chunk)
+    chunk = drop_duplicate_records(chunk, seen_dr_nos)
+    chunk = parse_dates(chunk)
+    chunk = convert_time_occ(chunk, engine)
+    chunk = clean_demographics(chunk)
+    if wide_mo:
+        chunk, _ = expand_mo_codes(chunk, mo_code_mapping, max_mo_codes, engine)
+    chunk = map_crime_categories(chunk, code_lookup)
+    return chunk
@@ -0,0 +1,164 @@
+# Pre-aggregated count cubes over the cleaned crime data.
+#
+# One cube per chart family (CUBES) holds the number of incidents for every combination of its dimensions:
+#
+#   incident    year, month, day of week, area and crime category
+#   victim      crime category, area and victim age group, sex and descent
+#   hour        hour, day of week, area and crime category
+#   crime_code  Crm Cd and crime category
+#
+# A single cube over every dimension would have about one cell per incident, so slicing it would cost as
+# much as scanning the rows; each narrow cube stays small however many incidents there are. AREA NAME and
+# Crm Cd Desc ride along as labels of AREA and Crm Cd. Victim ages are kept in a separate one-column count
+# table for the age histogram.
+#
+# The cubes are saved under Output/crime_cube together with a fingerprint of the dataset files they were
+# built from, so load_crime_cube only rebuilds them after the cleaning pipeline has written new data.
+# Charts and summaries then come from cube_counts, which sums the cells of the smallest cube holding every
+# dimension asked for instead of scanning rows:
+#
+#   cubes, age_counts, _ = load_crime_cube()
+#   cube_counts(cubes, 'Crime_Category')
+#   cube_counts(cubes, ['Vict Age Group', 'Crime_Category'], where={'AREA NAME': ['Central']})
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from project_paths import CRIME_CUBE_DIR
+from crime_schema import output_dtype
+from crime_dataset import load_crime_data, dataset_fingerprint
+
+CUBE_DIMENSIONS = ['Year', 'Month', 'DayOfWeek', 'Hour', 'AREA', 'AREA NAME', 'Crime_Category',
+                   'Vict Age Group', 'Vict Sex', 'Vict Descent', 'Crm Cd', 'Crm Cd Desc']
+# Cube name -> its dimensions; cube_counts uses the first (smallest) cube that has every dimension it needs
+CUBES = {
+    'crime_code': ['Crm Cd', 'Crm Cd Desc', 'Crime_Category'],
+    'victim': ['Crime_Category', 'AREA', 'AREA NAME', 'Vict Age Group', 'Vict Sex', 'Vict Descent'],
+    'hour': ['Hour', 'DayOfWeek', 'AREA', 'AREA NAME', 'Crime_Category'],
+    'incident': ['Year', 'Month', 'DayOfWeek', 'AREA', 'AREA NAME', 'Crime_Category'],
+}
+# Dataset columns the cube is built from
+SOURCE_COLUMNS = ['DATE OCC', 'TIME OCC', 'AREA', 'AREA NAME', 'Crime_Category', 'Vict Age', 'Vict Age Group',
+                  'Vict Sex', 'Vict Descent', 'Crm Cd', 'Crm Cd Desc']
+LABEL_COLUMNS = ['AREA NAME', 'Crime_Category', 'Vict Age Group', 'Vict Sex', 'Vict Descent', 'Crm Cd Desc']
+CUBE_VERSION = 2  # bump when the cubes, their dimensions or how they are derived change
+
+AGE_COUNTS_PARQUET = os.path.join(CRIME_CUBE_DIR, "victim_age_counts.parquet")
+FINGERPRINT_KEY = b"crime_cube_source"
+
+
+def _hours(time_occ):
+    # TIME OCC is "hh:mm AM/PM" text (a category in typed output); parse each distinct value once
+    codes, uniques = pd.factorize(time_occ.astype(object))
+    hours = pd.to_datetime(pd.Series(uniques, dtype=object), format='%I:%M %p', errors='coerce').dt.hour
+    hours = np.append(hours.to_numpy(dtype=float), np.nan)
+    return pd.Series(hours[codes], index=time_occ.index).astype('Int8')
+
+
+def _labels(series, column):
+    # Typed output already has the right categories; legacy (all-text) output gets them here,
+    # with the "Unknown" filler treated as missing like apply_output_schema does
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.mask(series.astype(object).isin(["Unknown", "None"]))
+    dtype = output_dtype(column, series.dropna().unique() if column == 'Crm Cd Desc' else ()) or 'category'
+    return series.astype(dtype if isinstance(dtype, pd.CategoricalDtype) else 'category')
+
+
+def cube_keys(crime_df):
+    """The cube dimensions for every row of a cleaned frame (typed or legacy-strings output)."""
+    dates = crime_df['DATE OCC']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%m/%d/%Y', errors='coerce')
+    keys = pd.DataFrame({
+        'Year': dates.dt.year.astype('Int16'),
+        'Month': dates.dt.month.astype('Int8'),
+        'DayOfWeek': _labels(dates.dt.day_name(), 'DayOfWeek'),
+        'Hour': _hours(crime_df['TIME OCC']),
+        'AREA': pd.to_numeric(crime_df['AREA'], errors='coerce').astype('Int8'),
+        'Crm Cd': pd.to_numeric(crime_df['Crm Cd'], errors='coerce').astype('Int16'),
+    }, index=crime_df.index)
+    for column in LABEL_COLUMNS:
+        keys[column] = _labels(crime_df[column], column)
+    return keys[CUBE_DIMENSIONS]
+
+
+def cube_parquet(name):
+    return os.path.join(CRIME_CUBE_DIR, f"{name}_cube.parquet")
+
+
+def build_crime_cube(crime_df):
+    """(cubes, age_counts): {name: incident counts per cell of each of CUBES} and counts per victim age."""
+    keys = cube_keys(crime_df)
+    cubes = {name: keys.groupby(dimensions, observed=True, dropna=False, sort=False).size().rename('count')
+             .reset_index() for name, dimensions in CUBES.items()}
+    ages = pd.to_numeric(crime_df['Vict Age'], errors='coerce').astype('Int16')
+    age_counts = ages.value_counts(dropna=False).rename_axis('Vict Age').rename('count').sort_index().reset_index()
+    return cubes, age_counts
+
+
+def save_crime_cube(cubes, age_counts, fingerprint):
+    os.makedirs(CRIME_CUBE_DIR, exist_ok=True)
+    for name, cube in cubes.items():
+        table = pa.Table.from_pandas(cube, preserve_index=False)
+        table = table.replace_schema_metadata({**table.schema.metadata,
+                                               FINGERPRINT_KEY: fingerprint.encode("utf-8")})
+        pq.write_table(table, cube_parquet(name), compression="zstd")
+    age_counts.to_parquet(AGE_COUNTS_PARQUET, index=False)
+
+
+def cube_fingerprint():
+    """Fingerprint of the dataset the saved cubes were built from (None if any cube is missing or they differ)."""
+    paths = [cube_parquet(name) for name in CUBES]
+    if not all(os.path.exists(path) for path in paths + [AGE_COUNTS_PARQUET]):
+        return None
+    fingerprints = {(pq.read_schema(path).metadata or {}).get(FINGERPRINT_KEY) for path in paths}
+    fingerprint = fingerprints.pop() if len(fingerprints) == 1 else None
+    return fingerprint.decode("utf-8") if fingerprint else None
+
+
+def load_crime_cube(crime_df=None, rebuild=False):
+    """(cubes, age_counts, rebuilt) for the current cleaned dataset; cubes is {name: counts} for CUBES.
+
+    Reuses the saved cubes when the dataset hasn't changed since they were built. Otherwise they are
+    rebuilt from crime_df (if the caller already has the cleaned frame in memory) or from the
+    SOURCE_COLUMNS of the dataset, and saved.
+    """
+    fingerprint = f"v{CUBE_VERSION}-{dataset_fingerprint()}"
+    if not rebuild and cube_fingerprint() == fingerprint:
+        cubes = {name: pd.read_parquet(cube_parquet(name)) for name in CUBES}
+        return cubes, pd.read_parquet(AGE_COUNTS_PARQUET), False
+    if crime_df is None:
+        crime_df = load_crime_data(columns=SOURCE_COLUMNS)
+    cubes, age_counts = build_crime_cube(crime_df)
+    save_crime_cube(cubes, age_counts, fingerprint)
+    return cubes, age_counts, True
+
+
+def select_cube(cubes, dimensions):
+    """The first cube in CUBES order that has every one of dimensions."""
+    for name, cube_dimensions in CUBES.items():
+        if set(dimensions) <= set(cube_dimensions):
+            return cubes[name]
+    raise KeyError(f"No count cube has all of {sorted(dimensions)}; the cubes are {CUBES}")
+
+
+def cube_counts(cubes, by, where=None, dropna=True):
+    """Incident counts grouped by one dimension (a Series) or several (a MultiIndex Series).
+
+    cubes  -- the {name: cube} dict of load_crime_cube (or a single cube frame)
+    where  -- only cells matching {dimension: value or list of values}
+    dropna -- leave out missing values of the `by` dimensions, like value_counts()
+    """
+    dimensions = [by] if isinstance(by, str) else list(by)
+    cube = select_cube(cubes, dimensions + list(where or {})) if isinstance(cubes, dict) else cubes
+    if where:
+        keep = np.ones(len(cube), dtype=bool)
+        for column, values in where.items():
+            values = values if isinstance(values, (list, tuple, set, range, np.ndarray, pd.Index)) else [values]
+            keep &= cube[column].isin(list(values)).to_numpy(dtype=bool)
+        cube = cube[keep]
+    counts = cube.groupby(by, observed=True, dropna=dropna)['count'].sum()
+    return counts[counts > 0]
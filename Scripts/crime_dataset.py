@@ -0,0 +1,358 @@
+# Columnar storage for the cleaned crime data.
+# The cleaned frame is written as a Parquet dataset partitioned by year and LAPD area
+# (Output/crime_dataset/year=2023/area=12/...), and load_crime_data reads back only the
+# columns and partitions a script asks for. Falls back to the old pickle if no dataset exists.
+#
+# Every run also writes a record index (DR_NO, hash of the raw CSV row, partition), which lets the
+# incremental mode clean only new/changed rows and rewrite just the partitions they touch.
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from project_paths import (
+    CLEANED_DATASET_DIR, CLEANED_MO_PARQUET, CLEANED_PICKLE, CLEANED_MO_PICKLE, RECORD_INDEX_PARQUET
+)
+from crime_schema import RAW_COLUMN_NAMES, apply_output_schema, dataset_category_dtype, row_category_columns
+from mo_codes import dr_no_keys
+
+PARTITION_COLUMNS = ['year', 'area']
+PARTITIONING = ds.partitioning(pa.schema([('year', pa.int16()), ('area', pa.string())]), flavor="hive")
+COMPRESSION = "zstd"
+# Rows arrive in no particular partition order, so the writer buffers each partition up to this many rows
+# per row group instead of flushing a tiny row group (with its own category dictionaries) per input batch
+MIN_ROWS_PER_GROUP = 1 << 16
+
+
+def partition_keys(crime_df):
+    # year comes from DATE OCC (a datetime, or MM/DD/YYYY text in legacy output), area is the AREA code as text
+    dates = crime_df['DATE OCC']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%m/%d/%Y', errors='coerce')
+    return pd.DataFrame({
+        'year': dates.dt.year.astype('Int16'),
+        'area': crime_df['AREA'].astype(str),
+    }, index=crime_df.index)
+
+
+def _stable_schema(table):
+    # Every chunk of a streamed run must produce the same file schema: categories always use
+    # int32 dictionary indices, and all-missing text columns are typed as strings, not null
+    fields = []
+    for field in table.schema:
+        field_type = field.type
+        if pa.types.is_dictionary(field_type):
+            value_type = pa.string() if pa.types.is_null(field_type.value_type) else field_type.value_type
+            field_type = pa.dictionary(pa.int32(), value_type, field_type.ordered)
+        elif pa.types.is_null(field_type):
+            field_type = pa.string()
+        fields.append(pa.field(field.name, field_type))
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def write_crime_dataset(crime_df, dataset_dir=CLEANED_DATASET_DIR, part_name="part", overwrite=True):
+    """Write crime_df into the partitioned Parquet dataset.
+
+    overwrite=True replaces whatever is there; overwrite=False adds files next to the existing ones
+    (streaming mode writes each chunk with its own part_name).
+    """
+    if overwrite and os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    table = pa.Table.from_pandas(pd.concat([crime_df, partition_keys(crime_df)], axis=1), preserve_index=False)
+    table = _stable_schema(table)
+    ds.write_dataset(
+        table, dataset_dir, format="parquet", partitioning=PARTITIONING,
+        basename_template=f"{part_name}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        min_rows_per_group=MIN_ROWS_PER_GROUP, max_rows_per_group=1 << 20,
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+    )
+
+
+def _set_categories(crime_df, dtypes):
+    # dtypes -- {column: CategoricalDtype}; set_categories also reorders, where astype would see equal dtypes
+    for column, dtype in dtypes.items():
+        crime_df[column] = crime_df[column].cat.set_categories(dtype.categories)
+    return crime_df
+
+
+def _rewrite_partition_file(path, crime_df):
+    pq.write_table(_stable_schema(pa.Table.from_pandas(crime_df, preserve_index=False)), path,
+                   compression=COMPRESSION)
+
+
+def compact_crime_dataset(dataset_dir=CLEANED_DATASET_DIR, categories=None):
+    # Streaming mode leaves one small file per chunk in every partition; merge them one partition at a time.
+    # categories ({column: values of the whole run}) rewrites those category columns with one sorted set of
+    # categories in every partition, as an in-memory run writes them, instead of each chunk's own
+    for partition_dir, _, file_names in os.walk(dataset_dir):
+        parts = sorted(name for name in file_names if name.endswith(".parquet"))
+        if not parts or (len(parts) < 2 and not categories):
+            continue
+        table = pa.concat_tables([pq.read_table(os.path.join(partition_dir, name), partitioning=None) for name in parts])
+        for name in parts:
+            os.remove(os.path.join(partition_dir, name))
+        path = os.path.join(partition_dir, "part-0.parquet")
+        if categories:
+            dtypes = {column: dataset_category_dtype(column, values) for column, values in categories.items()}
+            _rewrite_partition_file(path, _set_categories(table.to_pandas(), dtypes))
+        else:
+            pq.write_table(table, path, compression=COMPRESSION)
+
+
+def dataset_columns(dataset_dir=CLEANED_DATASET_DIR):
+    """Column names available in the cleaned dataset (without the year/area partition keys)."""
+    if not os.path.exists(dataset_dir):
+        return pd.read_pickle(CLEANED_PICKLE).columns.tolist()
+    schema = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING).schema
+    return [name for name in schema.names if name not in PARTITION_COLUMNS]
+
+
+def dataset_fingerprint(dataset_dir=CLEANED_DATASET_DIR):
+    """Hash of the dataset's file names, sizes and modification times (or the pickle's): changes on every write."""
+    if os.path.exists(dataset_dir):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(dataset_dir) for name in names)
+    else:
+        paths = [CLEANED_PICKLE]
+    digest = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, dataset_dir)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def dataset_is_typed(dataset_dir=CLEANED_DATASET_DIR):
+    # False for datasets written with --legacy-strings (every column is text)
+    schema = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING).schema
+    return pa.types.is_integer(schema.field('DR_NO').type)
+
+
+def _partition_filter(years, areas):
+    expression = None
+    if years is not None:
+        expression = ds.field('year').isin(np.asarray(list(years), dtype=np.int16))
+    if areas is not None:
+        area_filter = ds.field('area').isin([str(area) for area in areas])
+        expression = area_filter if expression is None else expression & area_filter
+    return expression
+
+
+def _occurred_mask(dates, occurred):
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%m/%d/%Y', errors='coerce')
+    return ((dates >= occurred[0]) & (dates < occurred[1])).to_numpy(dtype=bool)
+
+
+def load_crime_data(columns=None, years=None, areas=None, occurred=None, dataset_dir=CLEANED_DATASET_DIR):
+    """Load the cleaned crime data.
+
+    columns  -- only read these columns (None = all of them)
+    years    -- only read these DATE OCC years, e.g. [2023, 2024]
+    areas    -- only read these AREA codes, e.g. [1, 12]
+    occurred -- (start, end): only rows with start <= DATE OCC < end, e.g. ('2024-07-01', '2024-08-01')
+    """
+    read_columns = columns
+    if occurred is not None:
+        # Only the partitions of the years in the range are read
+        occurred = (pd.Timestamp(occurred[0]), pd.Timestamp(occurred[1]))
+        span = set(range(occurred[0].year, (occurred[1] - pd.Timedelta(1)).year + 1))
+        years = span if years is None else span & set(years)
+        if columns is not None:
+            read_columns = list(dict.fromkeys(list(columns) + ['DATE OCC']))
+
+    if not os.path.exists(dataset_dir):
+        # Older runs only produced the pickle
+        crime_df = pd.read_pickle(CLEANED_PICKLE)
+        if years is not None or areas is not None:
+            keys = partition_keys(crime_df)
+            keep = pd.Series(True, index=crime_df.index)
+            if years is not None:
+                keep &= keys['year'].isin(list(years))
+            if areas is not None:
+                keep &= keys['area'].isin([str(area) for area in areas])
+            crime_df = crime_df[keep]
+    else:
+        dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+        if read_columns is None:
+            read_columns = [name for name in dataset.schema.names if name not in PARTITION_COLUMNS]
+        expression = _partition_filter(years, areas)
+        if occurred is not None and pa.types.is_timestamp(dataset.schema.field('DATE OCC').type):
+            # Typed datasets filter the dates while scanning; text dates are filtered below
+            dates = (ds.field('DATE OCC') >= pa.scalar(occurred[0])) & (ds.field('DATE OCC') < pa.scalar(occurred[1]))
+            expression = dates if expression is None else expression & dates
+        crime_df = dataset.to_table(columns=list(read_columns), filter=expression).to_pandas()
+
+    if occurred is not None:
+        crime_df = crime_df[_occurred_mask(crime_df['DATE OCC'], occurred)].reset_index(drop=True)
+    return crime_df[list(columns)] if columns is not None else crime_df
+
+
+def iter_crime_data(columns=None, chunk_rows=200_000, dataset_dir=CLEANED_DATASET_DIR):
+    """Yield the cleaned crime data as frames of about chunk_rows rows, so it never has to fit in memory at once."""
+    if not os.path.exists(dataset_dir):
+        crime_df = pd.read_pickle(CLEANED_PICKLE)
+        crime_df = crime_df[columns] if columns is not None else crime_df
+        for start in range(0, len(crime_df), chunk_rows):
+            yield crime_df.iloc[start:start + chunk_rows]
+        return
+
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name not in PARTITION_COLUMNS]
+    # Partition files are small, so batches are collected until there are enough rows for one chunk
+    batches, batch_rows = [], 0
+    for batch in dataset.to_batches(columns=list(columns), batch_size=chunk_rows):
+        batches.append(batch)
+        batch_rows += batch.num_rows
+        if batch_rows >= chunk_rows:
+            yield pa.Table.from_batches(batches).to_pandas()
+            batches, batch_rows = [], 0
+    if batch_rows:
+        yield pa.Table.from_batches(batches).to_pandas()
+
+
+def peek_crime_data(rows=5, dataset_dir=CLEANED_DATASET_DIR):
+    """The first few rows of the cleaned crime data, without reading the rest."""
+    if not os.path.exists(dataset_dir):
+        return pd.read_pickle(CLEANED_PICKLE).head(rows)
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+    columns = [name for name in dataset.schema.names if name not in PARTITION_COLUMNS]
+    return dataset.head(rows, columns=columns).to_pandas()
+
+
+def write_mo_long(mo_long, path=CLEANED_MO_PARQUET):
+    mo_long.to_parquet(path, index=False, compression=COMPRESSION)
+
+
+class MoLongWriter:
+    # Appends the compact MO table chunk by chunk (streaming mode) as row groups of one Parquet file
+    def __init__(self, path=CLEANED_MO_PARQUET):
+        self.path = path
+        self.writer = None
+
+    def write(self, mo_long):
+        table = pa.Table.from_pandas(mo_long, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema, compression=COMPRESSION)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def load_mo_long(dr_nos=None, path=CLEANED_MO_PARQUET):
+    """Load the compact (DR_NO, MO_Position, MO_Code) table, optionally only for some DR_NOs."""
+    if not os.path.exists(path):
+        mo_long = pd.read_pickle(CLEANED_MO_PICKLE)
+    else:
+        mo_long = pd.read_parquet(path)
+    if dr_nos is not None:
+        mo_long = mo_long[mo_long['DR_NO'].isin(dr_no_keys(pd.Series(dr_nos)))]
+    return mo_long.reset_index(drop=True)
+
+
+# ------------------------ Record index (incremental mode) ------------------------ #
+def record_hashes(raw_df):
+    """64-bit hash of every raw CSV row (all RAW_COLUMNS), used to spot records that changed."""
+    return pd.Series(pd.util.hash_pandas_object(raw_df[RAW_COLUMN_NAMES], index=False).to_numpy(),
+                     index=raw_df.index, name='Row_Hash')
+
+
+def build_record_index(crime_df, raw_hashes):
+    # One row per curated record: which raw row it came from (by hash) and which partition it lives in
+    keys = partition_keys(crime_df).reset_index(drop=True)
+    return pd.DataFrame({
+        'DR_NO': dr_no_keys(crime_df['DR_NO']),
+        'Row_Hash': raw_hashes.loc[crime_df.index].to_numpy(np.uint64),
+        'year': keys['year'],
+        'area': keys['area'],
+    })
+
+
+def write_record_index(record_index, path=RECORD_INDEX_PARQUET):
+    record_index.to_parquet(path, index=False, compression=COMPRESSION)
+
+
+def load_record_index(path=RECORD_INDEX_PARQUET):
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def find_delta(raw_df, raw_hashes, record_index):
+    """Split the raw rows into new and changed records compared with the record index.
+
+    Returns (new_mask, changed_mask) aligned with raw_df.
+    """
+    positions = pd.Index(record_index['DR_NO'].to_numpy()).get_indexer(dr_no_keys(raw_df['DR_NO']))
+    is_new = positions < 0
+    known_hashes = record_index['Row_Hash'].to_numpy()[np.where(is_new, 0, positions)]
+    is_changed = ~is_new & (known_hashes != raw_hashes.to_numpy(np.uint64))
+    return pd.Series(is_new, index=raw_df.index), pd.Series(is_changed, index=raw_df.index)
+
+
+def _partition_label(year, area):
+    return (None if pd.isna(year) else int(year), None if pd.isna(area) else str(area))
+
+
+def _file_dictionaries(path, columns):
+    # {column: set of the category dictionaries (as tuples) of its row groups} for one partition file
+    table = pq.read_table(path, columns=columns, partitioning=None)
+    return {column: {tuple(chunk.dictionary.to_pylist()) for chunk in table.column(column).chunks}
+            for column in columns}
+
+
+def merge_into_crime_dataset(delta_df, replaced_partitions, dataset_dir=CLEANED_DATASET_DIR):
+    """Upsert cleaned, typed rows into the dataset, rewriting only the partitions involved.
+
+    replaced_partitions -- (year, area) pairs where older versions of the delta records live
+    Category columns keep one set of categories across the dataset: those of the existing files plus the
+    delta's. If the delta adds categories, the partitions it doesn't touch are rewritten with them too.
+    Returns the number of partitions rewritten.
+    """
+    delta_keys = partition_keys(delta_df)
+    affected = {_partition_label(year, area) for year, area in replaced_partitions}
+    affected |= {_partition_label(year, area) for year, area in zip(delta_keys['year'], delta_keys['area'])}
+
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+    fragments = list(dataset.get_fragments())
+    columns = row_category_columns(delta_df.columns)
+    dictionaries = {fragment.path: _file_dictionaries(fragment.path, columns) for fragment in fragments}
+    dtypes = {}
+    for column in columns:
+        values = set(delta_df[column].astype('category').cat.categories)
+        for found in dictionaries.values():
+            values.update(*found[column])
+        dtypes[column] = dataset_category_dtype(column, values)
+
+    delta_dr_nos = dr_no_keys(delta_df['DR_NO'])
+    kept_rows = []
+    rewritten = set(affected)
+    for fragment in fragments:
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        label = _partition_label(keys.get('year'), keys.get('area'))
+        if label in affected:
+            existing = pq.read_table(fragment.path, partitioning=None).to_pandas()
+            kept_rows.append(existing[~np.isin(dr_no_keys(existing['DR_NO']), delta_dr_nos)])
+            os.remove(fragment.path)
+        elif any(found != {tuple(dtypes[column].categories)} for column, found in dictionaries[fragment.path].items()):
+            existing = pq.read_table(fragment.path, partitioning=None).to_pandas()
+            _rewrite_partition_file(fragment.path, _set_categories(existing, dtypes))
+            rewritten.add(label)
+
+    merged = apply_output_schema(pd.concat(kept_rows + [delta_df], ignore_index=True))
+    write_crime_dataset(_set_categories(merged, dtypes), dataset_dir, overwrite=False)
+    return len(rewritten)
+
+
+def merge_mo_long(delta_mo_long, delta_dr_nos, path=CLEANED_MO_PARQUET):
+    # Small integer table, so it is simply rewritten with the delta records swapped in
+    mo_long = load_mo_long(path=path)
+    mo_long = mo_long[~mo_long['DR_NO'].isin(dr_no_keys(pd.Series(delta_dr_nos)))]
+    write_mo_long(pd.concat([mo_long, delta_mo_long], ignore_index=True), path)
@@ -0,0 +1,193 @@
+# Sparse one-hot features for the crime category model.
+#
+# pd.get_dummies turns the categorical model columns (TIME OCC, Premis Desc, Weapon Desc, MO_Desc_1..10, ...)
+# into thousands of dense columns, which is why the model used to train on a 100,000-row sample. The
+# encoder below produces the same kind of features as a scipy CSR matrix instead: every row stores only
+# its numeric values and the one "on" column per categorical feature, so a million rows take about as
+# much memory as the dense sample did.
+#
+#   encoder = SparseOneHotEncoder(min_count=20).fit(crime_df[features])
+#   X = encoder.transform(crime_df[features])       # CSR, float32; encoder.feature_names labels the columns
+#   save_encoder(encoder, FEATURE_ENCODER_JSON)     # vocabularies, to encode new records the same way later
+#
+# Each categorical column keeps the values seen at least min_count times when fitted; rarer values, and
+# values first seen after fitting, share one "(rare)" column per feature. Missing values leave the row's
+# columns for that feature empty (like get_dummies) and missing numbers become -1 (like fillna(-1)).
+#
+# CategoryCodeEncoder uses the same vocabularies but writes each categorical column as one column of
+# integer codes, for the gradient-boosting backend's native categorical features (19 columns instead of
+# thousands).
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+RARE_LABEL = "(rare)"
+MISSING_NUMBER = -1
+MAX_CATEGORY_CODES = 254  # plus the rare code: the most categories HistGradientBoostingClassifier bins
+ENCODER_VERSION = 1
+
+
+class SparseOneHotEncoder:
+    encoding = "sparse"
+
+    def __init__(self, min_count=20):
+        self.min_count = min_count
+        self.numeric_columns = []
+        self.vocabularies = {}  # categorical column -> kept values (as text), in column order
+        self._lookups = {}
+
+    @property
+    def categorical_columns(self):
+        return list(self.vocabularies)
+
+    @property
+    def feature_names(self):
+        names = list(self.numeric_columns)
+        for column, values in self.vocabularies.items():
+            names += [f"{column}_{value}" for value in values] + [f"{column}_{RARE_LABEL}"]
+        return names
+
+    def fit(self, crime_df):
+        """Learn which columns are numeric and the vocabulary of every other column."""
+        self.numeric_columns, self.vocabularies = [], {}
+        for column in crime_df.columns:
+            series = crime_df[column]
+            if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+                self.numeric_columns.append(column)
+                continue
+            counts = series.value_counts(dropna=True)
+            counts = counts.groupby(counts.index.astype(str)).sum()
+            self.vocabularies[column] = self._vocabulary(counts)
+        self._lookups = {}
+        return self
+
+    def _vocabulary(self, counts):
+        # counts: occurrences per distinct value (as text)
+        return sorted(counts.index[counts >= max(self.min_count, 1)])
+
+    def _value_index(self, series, column):
+        # Position of each row's value in the vocabulary; the rare column comes last, -1 means missing
+        if column not in self._lookups:
+            self._lookups[column] = {value: position for position, value in enumerate(self.vocabularies[column])}
+        lookup, rare = self._lookups[column], len(self.vocabularies[column])
+        codes, uniques = pd.factorize(series)  # each distinct value is looked up once
+        unique_index = np.array([lookup.get(str(value), rare) for value in uniques] + [-1], dtype=np.int32)
+        return unique_index[codes]  # code -1 picks the trailing -1
+
+    def transform(self, crime_df):
+        """CSR matrix (float32) with one row per crime_df row and one column per feature name."""
+        rows = len(crime_df)
+        groups = len(self.numeric_columns) + len(self.vocabularies)
+        columns = np.full((rows, groups), -1, dtype=np.int32)
+        values = np.ones((rows, groups), dtype=np.float32)
+
+        for group, column in enumerate(self.numeric_columns):
+            numbers = pd.to_numeric(crime_df[column], errors='coerce').astype(float).fillna(MISSING_NUMBER)
+            values[:, group] = numbers.to_numpy(np.float32)
+            columns[:, group] = np.where(values[:, group] != 0, group, -1)
+
+        offset = len(self.numeric_columns)
+        for group, column in enumerate(self.vocabularies, start=len(self.numeric_columns)):
+            index = self._value_index(crime_df[column], column)
+            columns[:, group] = np.where(index >= 0, offset + index, -1)
+            offset += len(self.vocabularies[column]) + 1
+
+        # Groups are in column order, so reading the present cells row by row gives sorted CSR indices
+        present = columns >= 0
+        indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(present.sum(axis=1), out=indptr[1:])
+        return sparse.csr_matrix((values[present], columns[present], indptr), shape=(rows, offset))
+
+    def rare_shares(self, crime_df):
+        """Share of each categorical column's non-missing values that land in its rare column."""
+        shares = {}
+        for column, values in self.vocabularies.items():
+            index = self._value_index(crime_df[column], column)
+            present = index >= 0
+            shares[column] = float((index[present] == len(values)).mean()) if present.any() else 0.0
+        return shares
+
+    def fit_transform(self, crime_df):
+        return self.fit(crime_df).transform(crime_df)
+
+    def to_dict(self):
+        return {"version": ENCODER_VERSION, "encoding": self.encoding, "min_count": self.min_count,
+                "numeric_columns": self.numeric_columns, "vocabularies": self.vocabularies}
+
+    @classmethod
+    def from_dict(cls, state):
+        if state.get("version") != ENCODER_VERSION:
+            raise ValueError(f"Feature encoder version {state.get('version')} is not {ENCODER_VERSION}; refit it")
+        encoder = cls(state["min_count"])
+        encoder.numeric_columns = list(state["numeric_columns"])
+        encoder.vocabularies = {column: list(values) for column, values in state["vocabularies"].items()}
+        return encoder
+
+
+class CategoryCodeEncoder(SparseOneHotEncoder):
+    """Integer category codes instead of one-hot columns, for HistGradientBoostingClassifier's native
+    categorical support: one column per feature, so no dummy matrix is built at all.
+
+    Numeric columns are kept as they are, categorical ones become the value's position in the vocabulary
+    (the rare bucket comes last) and missing values stay missing (NaN). Each vocabulary keeps at most
+    max_categories of the most frequent values, because the booster bins a categorical feature into at
+    most 255 categories.
+    """
+    encoding = "ordinal"
+
+    def __init__(self, min_count=20, max_categories=MAX_CATEGORY_CODES):
+        super().__init__(min_count)
+        self.max_categories = max_categories
+
+    @property
+    def feature_names(self):
+        return list(self.numeric_columns) + list(self.vocabularies)
+
+    @property
+    def categorical_mask(self):
+        return [False] * len(self.numeric_columns) + [True] * len(self.vocabularies)
+
+    def _vocabulary(self, counts):
+        counts = counts[counts >= max(self.min_count, 1)].sort_values(ascending=False, kind="stable")
+        return sorted(counts.index[:self.max_categories])
+
+    def transform(self, crime_df):
+        """Dense float32 array with one column per feature name (NaN where the value is missing)."""
+        X = np.empty((len(crime_df), len(self.numeric_columns) + len(self.vocabularies)), dtype=np.float32)
+        for position, column in enumerate(self.numeric_columns):
+            X[:, position] = pd.to_numeric(crime_df[column], errors='coerce').astype(float).to_numpy(np.float32)
+        for position, column in enumerate(self.vocabularies, start=len(self.numeric_columns)):
+            index = self._value_index(crime_df[column], column)
+            X[:, position] = np.where(index >= 0, index, np.nan)
+        return X
+
+    def to_dict(self):
+        return {**super().to_dict(), "max_categories": self.max_categories}
+
+    @classmethod
+    def from_dict(cls, state):
+        encoder = super().from_dict(state)
+        encoder.max_categories = state["max_categories"]
+        return encoder
+
+
+def encoder_from_dict(state):
+    """The encoder saved by to_dict, whichever kind it is (files without an encoding are one-hot)."""
+    if state.get("encoding", SparseOneHotEncoder.encoding) == CategoryCodeEncoder.encoding:
+        return CategoryCodeEncoder.from_dict(state)
+    return SparseOneHotEncoder.from_dict(state)
+
+
+def save_encoder(encoder, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as encoder_out:
+        json.dump(encoder.to_dict(), encoder_out)
+    os.replace(path + ".tmp", path)
+
+
+def load_encoder(path):
+    with open(path, encoding="utf-8") as encoder_in:
+        return encoder_from_dict(json.load(encoder_in))
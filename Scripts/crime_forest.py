@@ -0,0 +1,184 @@
+# Compact, array-based copy of a trained Random Forest for fast loading and batch scoring.
+#
+# A scikit-learn forest is a list of Tree objects. Each tree stores, for every node, the children, the
+# feature, a float64 threshold, the impurity, the sample counts and an n_classes float64 value row. On top
+# of that, predict_proba loops over the trees in Python. CompactForest keeps only what prediction needs,
+# with every tree's nodes packed into one set of contiguous NumPy arrays:
+#
+#   compact = CompactForest.from_forest(rf_model, max_depth=None, min_samples_split=None)
+#   compact.predict_proba(X)                 # same X as the forest (CSR or dense); matches rf_model.predict_proba
+#
+#   feature, threshold    int32 / float32 per split node; features are numbered over used_features only
+#   left, right           int32 per split node: the child's split node, or ~leaf (negative) for a leaf
+#   leaf_values           float32 class probabilities per leaf
+#
+# predict_proba walks every (tree, row) pair down its tree at once, one level per step, over the columns of X
+# the forest actually splits on. Thresholds are rounded down to float32, which keeps every comparison
+# identical to scikit-learn's (it compares float32 features with float64 thresholds).
+#
+# max_depth and min_samples_split prune the forest while exporting: nodes deeper than max_depth, or
+# trained on fewer than min_samples_split bootstrap samples, become leaves with their node's class
+# probabilities. That makes the forest smaller and faster, but its predictions are then no longer identical.
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+BATCH_ROWS = 4096  # rows walked at once; every step holds n_trees x BATCH_ROWS node positions
+
+
+def _float32_floor(values):
+    # Largest float32 <= each float64, so float32 x <= t32 exactly when x <= t
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _flatten_tree(tree, max_depth, min_samples_split):
+    # (kept node ids in preorder, whether each of them splits) for one sklearn tree after pruning
+    children_left, children_right = tree.children_left, tree.children_right
+    kept, splits = [], []
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        split = (children_left[node] != -1
+                 and (max_depth is None or depth < max_depth)
+                 and (min_samples_split is None or tree.n_node_samples[node] >= min_samples_split))
+        kept.append(node)
+        splits.append(split)
+        if split:
+            stack.append((children_right[node], depth + 1))
+            stack.append((children_left[node], depth + 1))
+    return np.array(kept), np.array(splits)
+
+
+class CompactForest:
+    def __init__(self, feature, threshold, left, right, leaf_values, roots, used_features, classes, n_features_in):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.used_features = used_features
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.n_jobs = None  # threads walking row batches, as for the forest (None = 1, -1 = one per CPU)
+        self._walk_arrays = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_walk_arrays"] = None  # rebuilt in a few milliseconds after loading
+        return state
+
+    @classmethod
+    def from_forest(cls, forest, max_depth=None, min_samples_split=None):
+        features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+        split_offset = leaf_offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            kept, splits = _flatten_tree(tree, max_depth, min_samples_split)
+            # Kept nodes renumbered: split nodes 0.. and leaves ~0.. (negative), both in preorder
+            numbers = np.zeros(tree.node_count, dtype=np.int64)
+            numbers[kept[splits]] = split_offset + np.arange(splits.sum())
+            numbers[kept[~splits]] = ~(leaf_offset + np.arange((~splits).sum()))
+            split_nodes = kept[splits]
+            features.append(tree.feature[split_nodes])
+            thresholds.append(tree.threshold[split_nodes])
+            lefts.append(numbers[tree.children_left[split_nodes]])
+            rights.append(numbers[tree.children_right[split_nodes]])
+            values = tree.value[kept[~splits], 0, :]
+            leaf_values.append(values / values.sum(axis=1, keepdims=True))
+            roots.append(numbers[0])
+            split_offset += len(split_nodes)
+            leaf_offset += len(values)
+
+        feature = np.concatenate(features)
+        used_features = np.unique(feature)
+        return cls(feature=np.searchsorted(used_features, feature).astype(np.int32),
+                   threshold=_float32_floor(np.concatenate(thresholds)),
+                   left=np.concatenate(lefts).astype(np.int32), right=np.concatenate(rights).astype(np.int32),
+                   leaf_values=np.concatenate(leaf_values).astype(np.float32),
+                   roots=np.array(roots, dtype=np.int32), used_features=used_features.astype(np.int32),
+                   classes=forest.classes_, n_features_in=forest.n_features_in_)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_leaves(self):
+        return len(self.leaf_values)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.feature, self.threshold, self.left, self.right, self.leaf_values,
+                                               self.roots, self.used_features))
+
+    def _arrays(self):
+        # Index-sized copies for the walk, plus a parking node (after the last split node) that every
+        # finished pair moves to: it compares against +inf and both its children are itself
+        if self._walk_arrays is None:
+            parking = len(self.feature)
+            children = np.empty(2 * parking + 2, dtype=np.intp)
+            children[0:2 * parking:2] = self.left
+            children[1:2 * parking:2] = self.right
+            children[2 * parking:] = parking
+            self._walk_arrays = (np.append(self.feature, 0).astype(np.intp),
+                                 np.append(self.threshold, np.float32(np.inf)), children, parking)
+        return self._walk_arrays
+
+    def _used_columns(self, X):
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, the forest was trained on {self.n_features_in_}")
+        if sparse.issparse(X):
+            return X.tocsr()[:, self.used_features]
+        return np.asarray(X, dtype=np.float32)[:, self.used_features]
+
+    def _walk(self, X_used):
+        # Leaf reached by every (tree, row) pair, tree-major; one tree level per pass over the pairs
+        feature, threshold, children, parking = self._arrays()
+        rows, columns = X_used.shape
+        values = X_used.ravel()
+        leaves = np.repeat(self.roots.astype(np.intp), rows)
+        pairs = np.flatnonzero(leaves >= 0)  # pairs still walking (a pruned tree's root may be a leaf)
+        nodes = leaves[pairs]
+        offsets = pairs % rows * columns
+        level = 0
+        while pairs.size:
+            goes_right = values[offsets + feature[nodes]] > threshold[nodes]
+            nodes = children[2 * nodes + goes_right]
+            finished = nodes < 0
+            if finished.any():
+                leaves[pairs[finished]] = nodes[finished]
+                nodes[finished] = parking
+            level += 1
+            if level % 4 == 0:  # dropping parked pairs costs a pass of its own, so only every few levels
+                walking = nodes != parking
+                pairs, nodes, offsets = pairs[walking], nodes[walking], offsets[walking]
+        return ~leaves
+
+    def _predict_batch(self, batch):
+        batch = batch.toarray() if sparse.issparse(batch) else batch
+        leaves = self._walk(np.ascontiguousarray(batch, dtype=np.float32))
+        values = self.leaf_values[leaves].reshape(self.n_trees, batch.shape[0], -1)
+        return values.mean(axis=0, dtype=np.float64)
+
+    def predict_proba(self, X, batch_rows=BATCH_ROWS):
+        X_used = self._used_columns(X)
+        self._arrays()  # built once, before any threads start
+        batches = [X_used[start:start + batch_rows] for start in range(0, X.shape[0], batch_rows)]
+        if not batches:
+            return np.empty((0, len(self.classes_)))
+        threads = self.n_jobs or 1
+        threads = min((os.cpu_count() or 1) if threads < 0 else threads, len(batches))
+        if threads == 1:
+            return np.vstack([self._predict_batch(batch) for batch in batches])
+        # NumPy releases the GIL while indexing, so batches walk in parallel threads
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return np.vstack(list(executor.map(self._predict_batch, batches)))
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
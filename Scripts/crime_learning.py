@@ -0,0 +1,210 @@
+# Learning curve for the crime category model: how much does more training data buy, and what does it cost?
+#
+# A fixed stratified test set is held out once; the remaining rows are shuffled and every training size
+# is a prefix of that order, so each sample contains the smaller ones. Each size is fitted in a process of
+# its own (encoder and model, as in Predictive Analysis.py), which reports the fit time, the process's peak
+# RSS and its growth during the run, the test rows predicted per second and accuracy, macro-F1 and the F1
+# of every category over the same test set:
+#
+#   curve = learning_curve(model_df, y, classes, [5_000, 20_000, 100_000], "random-forest")
+#   curve                     # rows, fit_s, peak_rss_mb, rss_growth_mb, predict_rows_per_s, macro_f1, f1_<class>, ...
+#   saturation_point(curve)   # the smallest size within tolerance of the best macro-F1
+#
+# Sizes run in parallel while their estimated memory fits a budget (by default 70% of the available
+# memory): the smallest size runs alone first, and every later size is estimated from the largest finished
+# one, scaled linearly by rows. A size that doesn't fit next to the running ones waits for them to finish.
+# Sizes that ran side by side shared the CPUs, so their timings aren't comparable with those that ran alone:
+# every result records how many sizes were running at most during its fit (concurrent), and the saturation
+# point, its neighbours and the largest size are fitted again on their own (retimed) before the curve is
+# returned, so the cost of going past saturation is measured without contention.
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+
+from crime_model import make_feature_encoder, make_classifier
+from step_metrics import memory_usage_mb
+
+MEMORY_BUDGET_SHARE = 0.7  # of the available memory, when no --memory-budget-mb is given
+
+
+def available_memory_mb():
+    """Memory the OS could hand out now, in MB (None where the platform doesn't say)."""
+    try:
+        with open("/proc/meminfo") as meminfo:
+            fields = dict(line.split(":", 1) for line in meminfo if ":" in line)
+        return int(fields["MemAvailable"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 ** 2
+    except ImportError:
+        return None
+
+
+def split_learning_data(y, test_rows, seed=42):
+    """(training pool positions in shuffled order, test positions): a stratified test set of at most
+    test_rows and 30% of the rows; every training sample is a prefix of the pool."""
+    positions = np.arange(len(y))
+    test_size = min(int(test_rows), int(len(y) * 0.3))
+    try:
+        pool, test = train_test_split(positions, test_size=test_size, stratify=y, random_state=seed)
+    except ValueError:  # a category too rare to split proportionally
+        pool, test = train_test_split(positions, test_size=test_size, random_state=seed)
+    return np.random.default_rng(seed).permutation(pool), np.sort(test)
+
+
+def saturation_point(curve, metric="macro_f1", tolerance=0.005):
+    """Row of curve (one per size) with the fewest rows whose metric is within tolerance of the best."""
+    best = curve[metric].max()
+    return curve[curve[metric] >= best - tolerance].sort_values("rows").iloc[0]
+
+
+# ------------------------ Fitting one size ------------------------ #
+_worker_data = {}
+
+
+def _start_learning_worker(frame, y, pool, test, labels):
+    _worker_data.update(frame=frame, y=y, pool=pool, test=test, labels=labels)
+
+
+def _fit_size(rows, model, params, min_count, threads):
+    frame, y, labels = _worker_data["frame"], _worker_data["y"], _worker_data["labels"]
+    train, test = _worker_data["pool"][:rows], _worker_data["test"]
+    start_rss, _ = memory_usage_mb()
+    with threadpool_limits(threads):
+        started = time.perf_counter()
+        encoder = make_feature_encoder(model, min_count=min_count)
+        X_train = encoder.fit_transform(frame.iloc[train])
+        classifier = make_classifier(model, {**({"n_jobs": threads} if model == "random-forest" else {}),
+                                             **params}, encoder)
+        classifier.fit(X_train, y[train])
+        fit_s = time.perf_counter() - started
+
+        X_test = encoder.transform(frame.iloc[test])
+        started = time.perf_counter()
+        y_pred = classifier.predict(X_test)
+        predict_s = time.perf_counter() - started
+    _, peak_rss = memory_usage_mb()
+
+    y_test = y[test]
+    class_f1 = f1_score(y_test, y_pred, labels=labels, average=None, zero_division=0)
+    return {
+        "rows": rows, "fit_s": fit_s, "peak_rss_mb": peak_rss,
+        "rss_growth_mb": None if peak_rss is None or start_rss is None else max(peak_rss - start_rss, 0.0),
+        "predict_rows_per_s": len(test) / predict_s if predict_s > 0 else None,
+        # Gradient boosting only stops early above 10,000 training rows, so smaller sizes fit every round
+        "boosting_rounds": getattr(classifier, "n_iter_", None),
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "macro_f1": float(f1_score(y_test, y_pred, labels=labels, average="macro", zero_division=0)),
+        "class_f1": class_f1.tolist(),
+    }
+
+
+# ------------------------ Scheduling the sizes ------------------------ #
+def _estimate_mb(finished, rows):
+    # Linear in rows from the largest finished size; the fixed overhead makes this err on the high side
+    known = [result for result in finished if result["rss_growth_mb"] is not None]
+    if not known:
+        return None
+    largest = max(known, key=lambda result: result["rows"])
+    return largest["rss_growth_mb"] * rows / largest["rows"]
+
+
+def _fit_sizes(sizes, fit_args, initargs, workers, memory_budget_mb, progress):
+    # Results of _fit_size for the sizes (ascending), with "concurrent": the most sizes running during each fit
+    waiting, running, finished = list(sizes), {}, []
+    while waiting or running:
+        # The smallest size calibrates the estimates on its own; then sizes start while the budget allows
+        while waiting and len(running) < workers and (finished or not running):
+            estimate = _estimate_mb(finished, waiting[0])
+            committed = sum(entry["estimate"] or 0 for entry in running.values())
+            if running and memory_budget_mb and (estimate is None or committed + estimate > memory_budget_mb):
+                break
+            if not running and memory_budget_mb and estimate and estimate > memory_budget_mb:
+                progress(f"   ⚠️ {waiting[0]:,} rows may need ~{estimate:,.0f} MB, over the budget; "
+                         f"running it alone")
+            rows = waiting.pop(0)
+            # A fresh process per size, so its peak RSS is its own
+            executor = ProcessPoolExecutor(max_workers=1, initializer=_start_learning_worker, initargs=initargs)
+            future = executor.submit(_fit_size, rows, *fit_args)
+            running[future] = {"rows": rows, "executor": executor, "estimate": estimate, "concurrent": 1}
+            for entry in running.values():
+                entry["concurrent"] = max(entry["concurrent"], len(running))
+            progress(f"   • {rows:,} rows started"
+                     + (f" (estimated {estimate:,.0f} MB)" if estimate is not None else "")
+                     + (f", {len(running)} sizes running" if len(running) > 1 else ""))
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            entry = running.pop(future)
+            rows = entry["rows"]
+            try:
+                result = future.result()
+            except (BrokenProcessPool, MemoryError) as error:
+                progress(f"   ⚠️ {rows:,} rows failed ({type(error).__name__}); left out of the curve")
+                continue
+            finally:
+                entry["executor"].shutdown()
+            result["concurrent"] = entry["concurrent"]
+            finished.append(result)
+            progress(f"   • {rows:,} rows: macro-F1 {result['macro_f1']:.3f}, fit {result['fit_s']:.1f}s, "
+                     f"peak {result['peak_rss_mb'] or 0:,.0f} MB, "
+                     f"predict {result['predict_rows_per_s'] or 0:,.0f} rows/s"
+                     + (f" (alongside {result['concurrent'] - 1} other size(s))" if result["concurrent"] > 1 else ""))
+    return sorted(finished, key=lambda result: result["rows"])
+
+
+def learning_curve(frame, y, classes, sizes, model, params=None, min_count=20, test_rows=50_000, workers=None,
+                   memory_budget_mb=None, tolerance=0.005, retime=True, seed=42, progress=print):
+    """One row per training size (ascending): rows, fit_s, peak_rss_mb, rss_growth_mb, predict_rows_per_s,
+    boosting_rounds (gradient boosting), concurrent, retimed, accuracy, macro_f1 and f1_<class> for every class.
+
+    frame   -- model feature columns; y -- label codes 0..len(classes)-1 (LabelEncoder over every row)
+    sizes   -- training rows per fit; sizes above the training pool are capped at it
+    workers -- sizes fitted at once (default: one per CPU), sharing the CPUs between them
+    retime  -- fit the saturation point (within tolerance of the best macro-F1), its neighbours and the
+               largest size again on their own if they shared the CPUs with other sizes
+    """
+    pool, test = split_learning_data(y, test_rows, seed)
+    sizes = sorted({min(int(rows), len(pool)) for rows in sizes if rows > 0})
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sizes)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if memory_budget_mb is None:
+        available = available_memory_mb()
+        memory_budget_mb = available * MEMORY_BUDGET_SHARE if available else None
+    progress(f" - {len(pool):,} training rows, {len(test):,} test rows; {len(sizes)} sizes, up to {workers} at "
+             f"once with {threads} thread{'s' if threads != 1 else ''} each"
+             + (f", memory budget {memory_budget_mb:,.0f} MB" if memory_budget_mb else ""))
+
+    fit_args = (model, params or {}, min_count, threads)
+    initargs = (frame, y, pool, test, list(range(len(classes))))
+    finished = _fit_sizes(sizes, fit_args, initargs, workers, memory_budget_mb, progress)
+    for result in finished:
+        result["retimed"] = False
+
+    if retime and finished:
+        # Same seeds and rows, so the refit gives the same model and scores; only the costs change
+        saturated = saturation_point(pd.DataFrame(finished), tolerance=tolerance)["rows"]
+        position = [result["rows"] for result in finished].index(saturated)
+        chosen = {finished[index]["rows"] for index in (position - 1, position, position + 1, len(finished) - 1)
+                  if 0 <= index < len(finished)}
+        shared = [result["rows"] for result in finished if result["rows"] in chosen and result["concurrent"] > 1]
+        if shared:
+            progress(f" - Re-timing {', '.join(f'{rows:,}' for rows in shared)} rows alone (they shared the CPUs)")
+            for retimed in _fit_sizes(shared, fit_args, initargs, 1, None, progress):
+                index = [result["rows"] for result in finished].index(retimed["rows"])
+                finished[index] = {**retimed, "retimed": True}
+
+    records = []
+    for result in finished:
+        class_f1 = result.pop("class_f1")
+        records.append({**result, **{f"f1_{label}": score for label, score in zip(classes, class_f1)}})
+    return pd.DataFrame(records)
@@ -0,0 +1,368 @@
+# Versioned model bundle for the crime category model.
+#
+# random_forest_model.pkl on its own can't score anything new: the columns it was trained on come from
+# the feature encoder (or the get_dummies layout) and its outputs are LabelEncoder codes. The bundle keeps
+# everything needed to go from cleaned records to category predictions in one file:
+#
+#   bundle = ModelBundle(rf_model, features, label_encoder.classes_, encoder=feature_encoder, info={...})
+#   save_model_bundle(bundle)                        # Models/crime_model_bundle.joblib
+#   bundle = load_model_bundle()
+#   scores = bundle.score(cleaned_df)                # Predicted_Category, Predicted_Probability, Prob_<class>
+#
+# The bundle is saved as a plain dict (the model object plus lists and the encoder's JSON state) with
+# BUNDLE_VERSION and a model_id, so loading fails clearly when the layout changes and every prediction
+# file can be traced back to the model that made it.
+#
+# score_raw_chunks scores raw CSV chunks (the Data Dictionary layout) in a process pool: repeated DR_NOs
+# are dropped in the parent (as in streaming cleaning), then each worker loads the bundle once, cleans its
+# chunk the way the pipeline does (STEP 2-8 and the output schema) and scores it. Results come back in
+# input order with at most two chunks per worker in flight, so memory stays flat however large the input is.
+#
+# New months of incidents update a bundle without retraining from scratch: drift_report compares the
+# model on the new rows with its holdout figures (accuracy, macro-F1, per-category recall, how far the
+# category mix and the share of unseen feature values moved), and add_trees warm-starts the forest with a
+# few more trees fitted on the new rows only, so a refresh costs time in proportion to the new data.
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score, f1_score, recall_score
+
+from project_paths import MODEL_BUNDLE_PATH, MO_CODES_CSV
+from crime_cleaning import (
+    clean_chunk, mo_code_width, fill_missing_values, drop_duplicate_records, parse_dates, convert_time_occ,
+    clean_demographics, expand_mo_codes, load_mo_code_mapping
+)
+from crime_dataset import load_crime_data, load_mo_long, dataset_columns
+from crime_features import SparseOneHotEncoder, CategoryCodeEncoder, encoder_from_dict
+from crime_schema import apply_output_schema
+from mo_codes import attach_mo_descriptions
+
+BUNDLE_VERSION = 1
+PREDICTED_COLUMN = 'Predicted_Category'
+PROBABILITY_COLUMN = 'Predicted_Probability'
+PROBABILITY_PREFIX = 'Prob_'
+# Features and target of the crime category model (Predictive Analysis.py, Learning Curve.py)
+MODEL_FEATURES = [
+    'TIME OCC', 'AREA NAME', 'Vict Age', 'Vict Sex', 'Vict Descent', 'Premis Desc', 'Weapon Desc',
+    'DayOfWeek', 'Month', 'MO_Desc_1', 'MO_Desc_2', 'MO_Desc_3', 'MO_Desc_4', 'MO_Desc_5', 'MO_Desc_6',
+    'MO_Desc_7', 'MO_Desc_8', 'MO_Desc_9', 'MO_Desc_10'
+]
+MODEL_TARGET = 'Crime_Category'
+# Model backends: one-hot Random Forest and native-categorical gradient boosting
+MODEL_CHOICES = ["random-forest", "gradient-boosting"]
+DEFAULT_MODEL_PARAMS = {"random-forest": {"n_estimators": 100}, "gradient-boosting": {"max_iter": 200}}
+# Raw Data Dictionary fields a single incident needs for the model features (any of them may be left out)
+INCIDENT_COLUMNS = ['DATE OCC', 'TIME OCC', 'AREA NAME', 'Vict Age', 'Vict Sex', 'Vict Descent', 'Premis Desc',
+                    'Weapon Desc', 'Mocodes']
+
+
+def make_feature_encoder(model, min_count=20):
+    """Unfitted encoder for a backend: one-hot columns for the forest, integer category codes for boosting."""
+    return CategoryCodeEncoder(min_count=min_count) if model == "gradient-boosting" else SparseOneHotEncoder(min_count)
+
+
+def make_classifier(model, params=None, encoder=None):
+    """Unfitted classifier for a backend; params are added to DEFAULT_MODEL_PARAMS[model].
+
+    encoder -- the fitted CategoryCodeEncoder whose categorical columns gradient boosting splits natively
+    """
+    params = {**DEFAULT_MODEL_PARAMS[model], **(params or {})}
+    if model == "gradient-boosting":
+        return HistGradientBoostingClassifier(**params, categorical_features=encoder.categorical_mask, random_state=42)
+    return RandomForestClassifier(**{"n_jobs": -1, **params}, random_state=42)
+
+
+class ModelBundle:
+    def __init__(self, model, features, classes, encoder=None, dense_columns=None, target='Crime_Category',
+                 info=None):
+        """encoder -- fitted SparseOneHotEncoder or CategoryCodeEncoder; dense_columns -- get_dummies column layout
+        (one or the other)"""
+        if (encoder is None) == (dense_columns is None):
+            raise ValueError("A model bundle needs either a feature encoder or the dense column layout")
+        self.model = model
+        self.features = list(features)
+        self.classes = [str(label) for label in classes]
+        self.encoder = encoder
+        self.dense_columns = None if dense_columns is None else list(dense_columns)
+        self.target = target
+        self.info = dict(info or {})
+        self.info.setdefault("model_id", f"{datetime.now():%Y%m%dT%H%M%S}")
+        self.info.setdefault("sklearn_version", sklearn.__version__)
+
+    @property
+    def model_id(self):
+        return self.info["model_id"]
+
+    @property
+    def encoding(self):
+        return "dense" if self.encoder is None else self.encoder.encoding
+
+    @property
+    def mo_width(self):
+        return sum(feature.startswith('MO_Desc_') for feature in self.features)
+
+    def encode(self, crime_df):
+        """Feature matrix for cleaned, typed records, in the columns the model was trained on."""
+        missing = [feature for feature in self.features if feature not in crime_df.columns]
+        if missing:
+            raise KeyError(f"Records are missing model features: {missing}")
+        if self.encoder is not None:
+            return self.encoder.transform(crime_df[self.features])
+        X = pd.get_dummies(crime_df[self.features]).reindex(columns=self.dense_columns, fill_value=0)
+        return X.fillna(-1)
+
+    def predict_proba(self, crime_df):
+        return self.model.predict_proba(self.encode(crime_df))
+
+    def score(self, crime_df):
+        """Predicted category, its probability and one Prob_<class> column per category, indexed like crime_df."""
+        if len(crime_df):
+            probabilities = self.predict_proba(crime_df)
+        else:
+            probabilities = np.empty((0, len(self.classes)))
+        best = probabilities.argmax(axis=1)
+        scores = pd.DataFrame({
+            PREDICTED_COLUMN: np.asarray(self.classes, dtype=object)[best],
+            PROBABILITY_COLUMN: probabilities[np.arange(len(best)), best],
+        }, index=crime_df.index)
+        for position, label in enumerate(self.classes):
+            scores[f"{PROBABILITY_PREFIX}{label}"] = probabilities[:, position]
+        return scores
+
+    def to_dict(self):
+        return {"version": BUNDLE_VERSION, "model": self.model, "features": self.features, "classes": self.classes,
+                "encoder": None if self.encoder is None else self.encoder.to_dict(),
+                "dense_columns": self.dense_columns, "target": self.target, "info": self.info}
+
+    @classmethod
+    def from_dict(cls, state):
+        if state.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Model bundle version {state.get('version')} is not {BUNDLE_VERSION}; "
+                             f"retrain with Predictive Analysis.py")
+        encoder = None if state["encoder"] is None else encoder_from_dict(state["encoder"])
+        return cls(state["model"], state["features"], state["classes"], encoder=encoder,
+                   dense_columns=state["dense_columns"], target=state["target"], info=state["info"])
+
+
+def save_model_bundle(bundle, path=MODEL_BUNDLE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(bundle.to_dict(), path + ".tmp", compress=3)
+    os.replace(path + ".tmp", path)
+
+
+def load_model_bundle(path=MODEL_BUNDLE_PATH, quiet=False):
+    bundle = ModelBundle.from_dict(joblib.load(path))
+    if not quiet and bundle.info.get("sklearn_version") != sklearn.__version__:
+        print(f"⚠️ Model bundle {bundle.model_id} was saved with scikit-learn "
+              f"{bundle.info.get('sklearn_version')}, this is {sklearn.__version__}")
+    return bundle
+
+
+def check_incident(incident):
+    """Raise ValueError unless every INCIDENT_COLUMNS value of an incident is text, a whole number or missing."""
+    for column in INCIDENT_COLUMNS:
+        value = incident.get(column)
+        if (isinstance(value, bool) or not isinstance(value, (str, int, float, type(None)))
+                or (isinstance(value, float) and not value.is_integer())):
+            raise ValueError(f"{column} should be text or a whole number, not {value!r}")
+
+
+def _incident_text(value):
+    # JSON numbers as the CSV has them: 1430.0 -> "1430", not "1430.0" (which TIME OCC and Vict Age don't parse)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return value
+
+
+def clean_incidents(incidents, mo_code_mapping, features):
+    """The model features of incoming incidents (dicts of raw INCIDENT_COLUMNS values, e.g. from JSON).
+
+    Runs the cleaning steps the features come from (STEP 2 and 4-7, then the output schema on the feature
+    columns only); there is no crime code yet, so the category mapping and DR_NO de-duplication are skipped.
+    """
+    # Values as text, the way they read from the CSV
+    incidents = [{column: _incident_text(value) for column, value in incident.items()} for incident in incidents]
+    crime_df = pd.DataFrame.from_records(incidents, columns=INCIDENT_COLUMNS).astype("string").astype(object)
+    # Dates arrive as datetimes from the CSV reader; incidents may send the CSV's format or ISO dates
+    crime_df['DATE OCC'] = pd.to_datetime(crime_df['DATE OCC'], format='mixed', errors='coerce')
+    crime_df['Date Rptd'] = crime_df['DATE OCC']
+    crime_df = fill_missing_values(crime_df)
+    crime_df = parse_dates(crime_df)
+    crime_df = convert_time_occ(crime_df)
+    crime_df = clean_demographics(crime_df)
+    mo_width = sum(feature.startswith('MO_Desc_') for feature in features)
+    crime_df, _ = expand_mo_codes(crime_df, mo_code_mapping, max(mo_width, mo_code_width(crime_df['Mocodes'])))
+    return apply_output_schema(crime_df[list(features)].copy())
+
+
+# ------------------------ Batch scoring ------------------------ #
+def score_raw_chunk(raw_chunk, bundle, mo_code_mapping):
+    """DR_NO plus bundle.score columns for one chunk of raw crime records (duplicate DR_NOs in it dropped)."""
+    # At least the model's MO_Desc columns; records with more MO codes get the extra columns, which aren't used
+    mo_width = max(bundle.mo_width, mo_code_width(raw_chunk['Mocodes']))
+    crime_df = clean_chunk(raw_chunk, mo_code_mapping, mo_width)
+    crime_df = apply_output_schema(crime_df)
+    scores = bundle.score(crime_df)
+    scores.insert(0, 'DR_NO', crime_df['DR_NO'])
+    return scores.reset_index(drop=True)
+
+
+_worker_state = {}
+
+
+def _start_scoring_worker(bundle_path, mo_code_mapping):
+    bundle = load_model_bundle(bundle_path, quiet=True)
+    bundle.model.n_jobs = 1  # the pool already has a process per core
+    _worker_state.update(bundle=bundle, mo_code_mapping=mo_code_mapping)
+
+
+def _score_in_worker(raw_chunk):
+    return score_raw_chunk(raw_chunk, _worker_state["bundle"], _worker_state["mo_code_mapping"])
+
+
+def _unique_records(raw_chunks):
+    # STEP 2 for DR_NO, then STEP 3 against every earlier chunk
+    seen_dr_nos = set()
+    for raw_chunk in raw_chunks:
+        raw_chunk['DR_NO'] = fill_missing_values(raw_chunk[['DR_NO']].copy())['DR_NO']
+        yield drop_duplicate_records(raw_chunk, seen_dr_nos)
+
+
+def score_raw_chunks(raw_chunks, mo_code_mapping, bundle_path=MODEL_BUNDLE_PATH, workers=None):
+    """Yield the scores of each raw chunk, in order, scoring them in a pool of worker processes.
+
+    A DR_NO seen in an earlier chunk is scored once, like the cleaning pipeline keeps it once.
+    """
+    workers = workers or os.cpu_count() or 1
+    raw_chunks = _unique_records(raw_chunks)
+    if workers == 1:
+        bundle = load_model_bundle(bundle_path, quiet=True)
+        for raw_chunk in raw_chunks:
+            yield score_raw_chunk(raw_chunk, bundle, mo_code_mapping)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_scoring_worker,
+                             initargs=(bundle_path, mo_code_mapping)) as executor:
+        pending = deque()
+        for raw_chunk in raw_chunks:
+            pending.append(executor.submit(_score_in_worker, raw_chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ------------------------ Incremental updates ------------------------ #
+def load_model_frame(features, target, **filters):
+    """(DR_NO, features and target from the cleaned dataset, whether MO_Desc was rebuilt); filters go to
+    load_crime_data (years, areas, occurred).
+
+    Pipeline runs with --compact-mo saved no MO_Desc columns; they are rebuilt from the compact MO table.
+    """
+    mo_features = [col for col in features if col.startswith('MO_Desc_')]
+    compact_mo = bool(mo_features) and mo_features[0] not in dataset_columns()
+    load_columns = ['DR_NO'] + [col for col in features if not (compact_mo and col in mo_features)] + [target]
+    crime_df = load_crime_data(columns=load_columns, **filters)
+    if compact_mo:
+        mo_long = load_mo_long(dr_nos=crime_df['DR_NO'] if filters else None)
+        crime_df = attach_mo_descriptions(crime_df, mo_long, load_mo_code_mapping(MO_CODES_CSV), len(mo_features))
+        crime_df = apply_output_schema(crime_df)
+    return crime_df, compact_mo
+
+
+def label_codes(bundle, labels):
+    """Positions of labels in bundle.classes (-1 for categories the model has never seen)."""
+    return pd.Index(bundle.classes).get_indexer(pd.Series(labels).astype(str))
+
+
+def population_stability(expected, actual, floor=1e-4):
+    """Population stability index between two {label: share} mixes (above ~0.25 is usually a real shift)."""
+    labels = sorted(set(expected) | set(actual))
+    expected = np.clip([expected.get(label, 0.0) for label in labels], floor, None)
+    actual = np.clip([actual.get(label, 0.0) for label in labels], floor, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def drift_report(bundle, crime_df):
+    """How the bundle does on newly labelled records compared with its training holdout."""
+    labels = crime_df[bundle.target].astype(str)
+    predicted = bundle.score(crime_df)[PREDICTED_COLUMN]
+    shares = labels.value_counts(normalize=True)
+    report = {
+        "rows": len(crime_df),
+        "accuracy": float(accuracy_score(labels, predicted)),
+        "macro_f1": float(f1_score(labels, predicted, average='macro', zero_division=0)),
+        "holdout_accuracy": bundle.info.get("accuracy"),
+        "holdout_macro_f1": bundle.info.get("macro_f1"),
+        "unknown_categories": sorted(set(labels) - set(bundle.classes)),
+    }
+    present = [label for label in bundle.classes if label in shares.index]
+    recalls = recall_score(labels, predicted, labels=present, average=None, zero_division=0)
+    report["recall"] = {label: float(recall) for label, recall in zip(present, recalls)}
+    if "class_shares" in bundle.info:
+        report["category_psi"] = population_stability(bundle.info["class_shares"], shares.to_dict())
+    if bundle.encoder is not None and "rare_shares" in bundle.info:
+        new_shares = bundle.encoder.rare_shares(crime_df)
+        report["rare_shares"] = {column: {"training": bundle.info["rare_shares"].get(column), "new": share}
+                                 for column, share in new_shares.items()}
+    return report
+
+
+def training_class_weight(bundle):
+    """The forest's class_weight as {class code: weight}, as its training rows gave them; None for no weights.
+
+    'balanced' weights a category by n / (categories x its rows), i.e. 1 / (categories x its share), from the
+    class_shares Predictive Analysis.py saves. 'balanced_subsample' computes that per bootstrap sample; its
+    expected value is the same training-share weight.
+    """
+    class_weight = bundle.model.class_weight
+    if class_weight not in ("balanced", "balanced_subsample"):
+        return class_weight
+    if "class_shares" not in bundle.info:
+        raise ValueError(f"Bundle {bundle.model_id} uses class_weight='{class_weight}' but has no class_shares "
+                         f"to rebuild its weights from; retrain it with Predictive Analysis.py")
+    shares = np.array([bundle.info["class_shares"].get(label, 0.0) for label in bundle.classes])
+    trained = shares > 0
+    weights = np.ones(len(shares))
+    weights[trained] = 1 / (trained.sum() * shares[trained])
+    return {code: float(weight) for code, weight in enumerate(weights)}
+
+
+def add_trees(bundle, X, y, trees, max_trees=None):
+    """Grow bundle.model by `trees` trees fitted on (X, y) only, keeping the trees it already has.
+
+    y holds positions in bundle.classes. Categories missing from the new rows get a zero-weight placeholder
+    row each, so the forest keeps predicting every category. max_trees drops the oldest trees beyond it.
+    A 'balanced' class_weight is fixed to the training rows' weights first (training_class_weight), so
+    the new trees weight the categories like the rest of the forest instead of by the new rows' mix.
+    """
+    model = bundle.model
+    if not isinstance(model, RandomForestClassifier):
+        raise TypeError(f"Only Random Forest bundles can grow trees, not {type(model).__name__}")
+    class_weight = model.class_weight
+    fixed_class_weight = training_class_weight(bundle)
+    absent = np.setdiff1d(np.arange(len(bundle.classes)), y)
+    sample_weight = np.concatenate([np.ones(len(y)), np.zeros(len(absent))])
+    if len(absent):
+        placeholders = np.zeros(len(absent), dtype=int)  # any row will do, its weight is zero
+        if sparse.issparse(X):
+            X = sparse.vstack([X, X[placeholders]], format='csr')
+        else:
+            X = pd.concat([X, X.iloc[placeholders]], ignore_index=True)
+        y = np.concatenate([y, absent])
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, class_weight=fixed_class_weight)
+    try:
+        model.fit(X, y, sample_weight=sample_weight)
+    finally:
+        model.set_params(warm_start=False, class_weight=class_weight)
+    if max_trees and len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.n_estimators = max_trees
+    return model
@@ -0,0 +1,50 @@
+# Multi-core cleaning for the crime pipeline.
+# DR_NO de-duplication needs to see every row, so it runs here in the parent process. Everything
+# else in STEP 2-8 works row by row, so the de-duplicated rows are split into one shard per worker
+# and cleaned in a process pool. The shards are put back together in their original order, so the
+# result is the same as a serial clean_chunk call.
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from crime_cleaning import (
+    fill_missing_values, drop_duplicate_records, clean_chunk, crime_code_pairs, compile_crime_code_lookup
+)
+from mo_codes import build_mo_long
+
+
+def start_worker_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _clean_shard(shard, mo_code_mapping, max_mo_codes, engine, wide_mo, code_lookup):
+    shard = clean_chunk(shard, mo_code_mapping, max_mo_codes, engine=engine, wide_mo=wide_mo, code_lookup=code_lookup)
+    return shard, build_mo_long(shard, mo_code_mapping)
+
+
+def clean_in_parallel(chunk, mo_code_mapping, max_mo_codes, executor, workers, seen_dr_nos=None,
+                      engine="vectorized", wide_mo=True, code_lookup=None):
+    """Parallel version of clean_chunk. Returns the cleaned chunk and its compact MO table.
+
+    max_mo_codes must be given (e.g. mo_code_width of the whole file), otherwise every shard
+    would size its MO_Desc columns on its own rows. The same goes for code_lookup, which is
+    compiled from the whole chunk here when not given.
+    """
+    # STEP 2 for DR_NO only (the workers repeat it as a no-op), then the global STEP 3
+    chunk['DR_NO'] = fill_missing_values(chunk[['DR_NO']])['DR_NO']
+    chunk = drop_duplicate_records(chunk, seen_dr_nos)
+    if code_lookup is None:
+        code_lookup, _ = compile_crime_code_lookup(crime_code_pairs(chunk))
+
+    bounds = np.linspace(0, len(chunk), workers + 1).astype(int)
+    shards = [chunk.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    if not shards:
+        shards = [chunk]
+    results = list(executor.map(_clean_shard, shards, [mo_code_mapping] * len(shards),
+                                [max_mo_codes] * len(shards), [engine] * len(shards), [wide_mo] * len(shards),
+                                [code_lookup] * len(shards)))
+
+    cleaned = pd.concat([shard for shard, _ in results])
+    mo_long = pd.concat([shard_mo for _, shard_mo in results], ignore_index=True)
+    return cleaned, mo_long
@@ -0,0 +1,408 @@
+# Streaming, sketch-based profile of the cleaned crime data (the EDA overview).
+#
+# One chunked pass keeps a small, mergeable summary per column instead of holding the frame in memory:
+#   - row, null and "Unknown" counts (exact)
+#   - approximate distinct count (HyperLogLog, ~1% error)
+#   - heavy hitters: the most frequent values with lower-bound counts (Misra-Gries, TOP_K counters)
+#   - count/mean/std/min/max for numbers and min/max for dates (exact)
+#   - a quantile digest (merging t-digest) for QUANTILE_COLUMNS
+#
+# Every sketch merges with another of the same column, so profiles of separate chunks, partitions or runs
+# combine into the profile of all of them (merge_profiles). Profiles are saved as JSON with both the
+# sketch state (to merge later) and a readable summary per column:
+#
+#   profile, _ = load_crime_profile()     # reuses Output/crime_profile.json until the dataset changes
+#   profile.summary()                     # describe(include='all')-style frame
+#   merge_profiles([profile, load_profile(other_json)])
+import base64
+import json
+import math
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from project_paths import CRIME_PROFILE_JSON
+from crime_schema import MISSING_MARKERS
+from crime_dataset import iter_crime_data, dataset_fingerprint
+
+PROFILE_VERSION = 1
+HLL_PRECISION = 14       # 2^14 registers per column, ~0.8% standard error
+TOP_K = 256              # heavy-hitter counters per text column (exact counts up to this many distinct values)
+DIGEST_COMPRESSION = 200  # about this many centroids per quantile digest
+QUANTILE_COLUMNS = ['Vict Age', 'LAT', 'LON']
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def _pack(array):
+    return base64.b64encode(zlib.compress(np.ascontiguousarray(array).tobytes())).decode("ascii")
+
+
+def _unpack(text, dtype):
+    return np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=dtype).copy()
+
+
+# ------------------------ Sketches ------------------------ #
+class DistinctSketch:
+    """HyperLogLog distinct count over 64-bit value hashes."""
+
+    def __init__(self, registers=None):
+        self.registers = np.zeros(1 << HLL_PRECISION, np.uint8) if registers is None else registers
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return
+        index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+        rest = hashes << np.uint64(HLL_PRECISION)
+        # Rank = position of the first 1 bit in the remaining bits
+        rank = np.full(len(rest), 64 - HLL_PRECISION + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = 64 - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def to_dict(self):
+        return _pack(self.registers)
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(_unpack(state, np.uint8))
+
+
+class HeavyHitters:
+    """Misra-Gries summary: every value seen more than total/(k+1) times is kept, counts are lower bounds."""
+
+    def __init__(self, counts=None, error=0, k=TOP_K):
+        self.counts = pd.Series(counts or {}, dtype=np.int64)
+        self.error = int(error)  # any count can be short by at most this much
+        self.k = k
+
+    def _reduce(self, counts):
+        # Subtract the (k+1)-th largest count from every counter and drop those that reach zero
+        if len(counts) <= self.k:
+            return counts
+        values = counts.to_numpy()
+        cut = int(np.partition(values, len(values) - self.k - 1)[len(values) - self.k - 1])
+        self.error += cut
+        return counts[values > cut] - cut
+
+    def update(self, value_counts):
+        # Reducing the (possibly huge) chunk counts first keeps the merge itself down to 2k values
+        reduced = self._reduce(value_counts.astype(np.int64))
+        self.counts = self._reduce(self.counts.add(reduced, fill_value=0).astype(np.int64))
+
+    def merge(self, other):
+        self.update(other.counts)
+        self.error += other.error
+
+    def top(self, n=5):
+        return self.counts.sort_values(ascending=False, kind="stable").head(n)
+
+    def to_dict(self):
+        return {"counts": {str(value): int(count) for value, count in self.counts.items()}, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state["counts"], state["error"])
+
+
+class QuantileDigest:
+    """Merging t-digest: weighted centroids, finer towards both tails."""
+
+    def __init__(self, means=None, weights=None, compression=DIGEST_COMPRESSION):
+        self.means = np.empty(0) if means is None else np.asarray(means, dtype=np.float64)
+        self.weights = np.empty(0) if weights is None else np.asarray(weights, dtype=np.float64)
+        self.compression = compression
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Centroids are grouped by the arcsine scale function, so each group covers a smaller
+        # share of the data near q=0 and q=1 than in the middle
+        q = (np.cumsum(weights) - weights / 2) / total
+        groups = np.floor(self.compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)).astype(np.int64)
+        group_weights = np.bincount(groups, weights)
+        keep = group_weights > 0
+        self.means = np.bincount(groups, weights * means)[keep] / group_weights[keep]
+        self.weights = group_weights[keep]
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values):
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        if len(other.means):
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+
+    def quantile(self, q, minimum, maximum):
+        if not len(self.means):
+            return None
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * total, np.concatenate([[0], centers, [total]]),
+                               np.concatenate([[minimum], self.means, [maximum]])))
+
+    def to_dict(self):
+        return {"means": self.means.round(6).tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(state["means"], state["weights"])
+
+
+# ------------------------ Per-column profile ------------------------ #
+def column_kind(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return "number"
+    return "text"
+
+
+def _hashes(values, kind):
+    # Same value -> same 64-bit hash in every chunk and run (pandas' hash uses a fixed key);
+    # text values arrive as str
+    if kind == "number":
+        return pd.util.hash_array(np.asarray(values, dtype=np.float64))
+    if kind == "datetime":
+        return pd.util.hash_array(np.asarray(values, dtype="datetime64[ns]").view(np.int64))
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class ColumnProfile:
+    def __init__(self, name, kind, dtype):
+        self.name = name
+        self.kind = kind
+        self.dtype = dtype
+        self.rows = 0
+        self.nulls = 0
+        self.unknown = 0
+        self.distinct = DistinctSketch()
+        self.top = HeavyHitters() if kind == "text" else None
+        self.digest = QuantileDigest() if kind == "number" and name in QUANTILE_COLUMNS else None
+        # Exact moments (Chan et al. parallel form) and range
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, series):
+        self.rows += len(series)
+        missing = series.isna().to_numpy(dtype=bool)
+        self.nulls += int(missing.sum())
+        values = series[~missing]
+        if not len(values):
+            return
+
+        if self.kind == "text":
+            value_counts = values.value_counts(sort=False)
+            value_counts = value_counts[value_counts > 0]
+            value_counts.index = value_counts.index.astype(str)
+            self.unknown += int(value_counts.to_numpy()[np.isin(value_counts.index.to_numpy(), MISSING_MARKERS)].sum())
+            self.top.update(value_counts)
+            self.distinct.update(_hashes(value_counts.index, self.kind))
+            return
+
+        numbers = values.to_numpy(dtype="datetime64[ns]" if self.kind == "datetime" else np.float64)
+        self.distinct.update(_hashes(pd.unique(numbers), self.kind))
+        as_float = numbers.view(np.int64).astype(np.float64) if self.kind == "datetime" else numbers
+        low, high = float(as_float.min()), float(as_float.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.kind == "number":
+            self._add_moments(len(as_float), float(as_float.mean()), float(((as_float - as_float.mean()) ** 2).sum()))
+            if self.digest is not None:
+                self.digest.update(as_float)
+
+    def _add_moments(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def merge(self, other):
+        if other.kind != self.kind:
+            raise ValueError(f"Can't merge profiles of {self.name}: {self.kind} vs {other.kind}")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.unknown += other.unknown
+        self.distinct.merge(other.distinct)
+        if self.top is not None:
+            self.top.merge(other.top)
+        if self.digest is not None and other.digest is not None:
+            self.digest.merge(other.digest)
+        if other.count:
+            self._add_moments(other.count, other.mean, other.m2)
+        for bound, pick in [("min", min), ("max", max)]:
+            theirs = getattr(other, bound)
+            if theirs is not None:
+                mine = getattr(self, bound)
+                setattr(self, bound, theirs if mine is None else pick(mine, theirs))
+
+    def _display(self, value):
+        if value is None:
+            return None
+        return pd.Timestamp(int(value)) if self.kind == "datetime" else value
+
+    def summary(self):
+        """Readable estimates for this column (None where a statistic doesn't apply)."""
+        summary = {
+            "dtype": self.dtype, "count": self.rows - self.nulls, "nulls": self.nulls, "unknown": self.unknown,
+            "null_rate": self.nulls / self.rows if self.rows else None,
+            "unknown_rate": self.unknown / self.rows if self.rows else None,
+            "distinct": self.distinct.estimate(), "top": None, "top_freq": None,
+            "mean": None, "std": None, "min": self._display(self.min),
+        }
+        if self.top is not None and len(self.top.counts):
+            top = self.top.top(1)
+            summary["top"], summary["top_freq"] = top.index[0], int(top.iloc[0])
+        if self.kind == "number" and self.count:
+            summary["mean"] = self.mean
+            summary["std"] = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+        for q in QUANTILES:
+            summary[f"{q:.0%}"] = None if self.digest is None else self.digest.quantile(q, self.min, self.max)
+        summary["max"] = self._display(self.max)
+        return summary
+
+    def to_dict(self):
+        return {
+            "kind": self.kind, "dtype": self.dtype, "rows": self.rows, "nulls": self.nulls, "unknown": self.unknown,
+            "count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+            "distinct": self.distinct.to_dict(),
+            "top": None if self.top is None else self.top.to_dict(),
+            "digest": None if self.digest is None else self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, name, state):
+        column = cls(name, state["kind"], state["dtype"])
+        for field in ["rows", "nulls", "unknown", "count", "mean", "m2", "min", "max"]:
+            setattr(column, field, state[field])
+        column.distinct = DistinctSketch.from_dict(state["distinct"])
+        column.top = None if state["top"] is None else HeavyHitters.from_dict(state["top"])
+        column.digest = None if state["digest"] is None else QuantileDigest.from_dict(state["digest"])
+        return column
+
+
+# ------------------------ Dataset profile ------------------------ #
+class CrimeProfile:
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.columns = {}
+        self.source = None  # dataset_fingerprint of what was profiled, when it was a whole dataset
+
+    def update(self, chunk_df):
+        for name in chunk_df.columns:
+            series = chunk_df[name]
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name, column_kind(series), str(series.dtype))
+                # A column that first shows up now was missing (all null) in the earlier rows
+                self.columns[name].rows = self.columns[name].nulls = self.rows
+            self.columns[name].update(series)
+        for name, column in self.columns.items():
+            if name not in chunk_df.columns:
+                column.rows += len(chunk_df)
+                column.nulls += len(chunk_df)
+        self.rows += len(chunk_df)
+        self.chunks += 1
+
+    def merge(self, other):
+        for name, theirs in other.columns.items():
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name, theirs.kind, theirs.dtype)
+                self.columns[name].rows = self.columns[name].nulls = self.rows
+            self.columns[name].merge(theirs)
+        for name, column in self.columns.items():
+            if name not in other.columns:
+                column.rows += other.rows
+                column.nulls += other.rows
+        self.rows += other.rows
+        self.chunks += other.chunks
+        self.source = None
+
+    def summary(self):
+        """One row per column: dtype, counts, null/"Unknown" rates, ~distinct, top value, mean/std, quantiles."""
+        return pd.DataFrame({name: column.summary() for name, column in self.columns.items()}).T
+
+    def top_values(self, name, n=5):
+        """Most frequent values of a text column with lower-bound counts (exact when nothing was dropped)."""
+        return self.columns[name].top.top(n)
+
+    def to_dict(self):
+        return {
+            "version": PROFILE_VERSION, "source": self.source, "rows": self.rows, "chunks": self.chunks,
+            "summary": json.loads(self.summary().to_json(orient="index", date_format="iso")),
+            "columns": {name: column.to_dict() for name, column in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        if state.get("version") != PROFILE_VERSION:
+            raise ValueError(f"Profile version {state.get('version')} is not {PROFILE_VERSION}")
+        profile = cls()
+        profile.rows, profile.chunks, profile.source = state["rows"], state["chunks"], state.get("source")
+        profile.columns = {name: ColumnProfile.from_dict(name, column) for name, column in state["columns"].items()}
+        return profile
+
+
+def profile_chunks(chunks):
+    """Profile an iterable of frames (e.g. iter_crime_data or CSV chunks) in one pass."""
+    profile = CrimeProfile()
+    for chunk_df in chunks:
+        profile.update(chunk_df)
+    return profile
+
+
+def profile_crime_dataset(chunk_rows=200_000):
+    profile = profile_chunks(iter_crime_data(chunk_rows=chunk_rows))
+    profile.source = dataset_fingerprint()
+    return profile
+
+
+def load_crime_profile(chunk_rows=200_000, rebuild=False):
+    """(profile, rebuilt): the saved profile if the cleaned dataset hasn't changed since, else a fresh one."""
+    if not rebuild and os.path.exists(CRIME_PROFILE_JSON):
+        profile = load_profile()
+        if profile.source == dataset_fingerprint():
+            return profile, False
+    profile = profile_crime_dataset(chunk_rows)
+    save_profile(profile)
+    return profile, True
+
+
+def merge_profiles(profiles):
+    merged = CrimeProfile()
+    for profile in profiles:
+        merged.merge(profile)
+    return merged
+
+
+def save_profile(profile, path=CRIME_PROFILE_JSON):
+    with open(path, "w", encoding="utf-8") as profile_out:
+        json.dump(profile.to_dict(), profile_out, indent=1)
+
+
+def load_profile(path=CRIME_PROFILE_JSON):
+    with open(path, encoding="utf-8") as profile_in:
+        return CrimeProfile.from_dict(json.load(profile_in))
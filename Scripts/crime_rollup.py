@@ -0,0 +1,277 @@
+# Temporal rollup index of incident counts.
+#
+# Counts per (time bucket, AREA, Crime_Category) at five grains -- hour, day, week (starting Monday),
+# month and year -- built from DATE OCC and TIME OCC once and saved under Output/crime_rollup with the
+# fingerprint of the dataset they came from. AREA NAME rides along as the label of AREA.
+#
+# Counts are additive, so the index is built chunk by chunk and kept current with update(added, removed):
+# the incremental cleaning run adds its new and changed records and takes away the versions they replace
+# instead of rebuilding. After any other cleaning run load_crime_rollup rebuilds it.
+#
+# count() answers "incidents of category X in division Y between A and B" by covering [A, B) with the
+# fewest whole buckets (whole years, then months, days and hours at the edges), so it reads a few dozen
+# buckets per area and category however long the range is:
+#
+#   rollup, _ = load_crime_rollup()
+#   rollup.count('2023-01-01', '2024-07-01', area='Central', category='Violent Crime')
+#   rollup.series('month', area=1)
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from project_paths import CRIME_ROLLUP_DIR
+from crime_dataset import iter_crime_data, dataset_fingerprint
+from crime_cube import _hours, _labels
+
+GRAINS = ['hour', 'day', 'week', 'month', 'year']
+# Grains that nest inside each other, coarsest first (weeks cross month and year boundaries)
+COVER_GRAINS = ['year', 'month', 'day', 'hour']
+KEY_COLUMNS = ['AREA', 'AREA NAME', 'Crime_Category']
+LABEL_COLUMNS = ['AREA NAME', 'Crime_Category']
+# Dataset columns the rollup is built from
+SOURCE_COLUMNS = ['DATE OCC', 'TIME OCC', 'AREA', 'AREA NAME', 'Crime_Category']
+ROLLUP_VERSION = 1  # bump when the grains or how buckets are derived change
+
+FINGERPRINT_KEY = b"crime_rollup_source"
+
+
+def _grain_path(grain):
+    return os.path.join(CRIME_ROLLUP_DIR, f"{grain}.parquet")
+
+
+# ------------------------ Buckets ------------------------ #
+def bucket_floor(timestamp, grain):
+    """Start of the grain bucket a single timestamp falls in."""
+    timestamp = pd.Timestamp(timestamp)
+    if grain == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0, nanosecond=0)
+    day = timestamp.normalize()
+    if grain == 'day':
+        return day
+    if grain == 'week':
+        return day - pd.Timedelta(days=day.dayofweek)
+    if grain == 'month':
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def next_bucket(bucket, grain):
+    if grain == 'hour':
+        return bucket + pd.Timedelta(hours=1)
+    if grain == 'day':
+        return bucket + pd.Timedelta(days=1)
+    if grain == 'week':
+        return bucket + pd.Timedelta(days=7)
+    if grain == 'month':
+        return bucket + pd.DateOffset(months=1)
+    return bucket + pd.DateOffset(years=1)
+
+
+def _bucket_ceil(timestamp, grain):
+    floor = bucket_floor(timestamp, grain)
+    return floor if floor == timestamp else next_bucket(floor, grain)
+
+
+def _day_buckets(days, grain):
+    # days are midnight timestamps; whole-day offsets keep this vectorized
+    if grain == 'day':
+        return days
+    if grain == 'week':
+        offset = days.dt.dayofweek
+    elif grain == 'month':
+        offset = days.dt.day - 1
+    else:
+        offset = days.dt.dayofyear - 1
+    return days - pd.to_timedelta(offset, unit='D')
+
+
+def cover_range(start, end, grains=COVER_GRAINS):
+    """[(grain, first bucket, end of last bucket)] covering [start, end) with the fewest whole buckets.
+
+    Ranges that don't start or end on the hour are rounded out to whole hours.
+    """
+    start, end = bucket_floor(start, 'hour'), _bucket_ceil(end, 'hour')
+    if start >= end:
+        return []
+    grain = grains[0]
+    if len(grains) == 1:
+        return [(grain, start, end)]
+    first, last = _bucket_ceil(start, grain), bucket_floor(end, grain)
+    if first >= last:
+        return cover_range(start, end, grains[1:])
+    return cover_range(start, first, grains[1:]) + [(grain, first, last)] + cover_range(last, end, grains[1:])
+
+
+# ------------------------ Building the counts ------------------------ #
+def _incident_keys(crime_df):
+    dates = crime_df['DATE OCC']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%m/%d/%Y', errors='coerce')
+    days = dates.dt.normalize()
+    keys = pd.DataFrame({
+        'day': days,
+        # Rows without a TIME OCC are left out of the hour grain only
+        'hour': days + pd.to_timedelta(_hours(crime_df['TIME OCC']).astype(float), unit='h'),
+        'AREA': pd.to_numeric(crime_df['AREA'], errors='coerce').astype('Int8'),
+    }, index=crime_df.index)
+    for column in LABEL_COLUMNS:
+        keys[column] = _labels(crime_df[column], column)
+    return keys
+
+
+def _grain_counts(keys, grain):
+    starts = keys['hour'] if grain == 'hour' else _day_buckets(keys['day'], grain)
+    frame = keys[KEY_COLUMNS].assign(start=starts)
+    frame = frame[frame['start'].notna()]
+    return (frame.groupby(['start'] + KEY_COLUMNS, observed=True, dropna=False, sort=False)
+            .size().rename('count').reset_index())
+
+
+def _combine(parts):
+    combined = pd.concat([part for part in parts if not part.empty] or parts[:1], ignore_index=True)
+    for column in LABEL_COLUMNS:
+        combined[column] = _labels(combined[column], column)
+    combined = (combined.groupby(['start'] + KEY_COLUMNS, observed=True, dropna=False, sort=False)['count']
+                .sum().reset_index())
+    combined = combined[combined['count'] != 0]
+    return combined.sort_values('start', kind='stable').reset_index(drop=True)
+
+
+def _empty_table():
+    return _combine([pd.DataFrame({'start': pd.Series(dtype='datetime64[ns]'),
+                                   'AREA': pd.Series(dtype='Int8'),
+                                   'AREA NAME': pd.Series(dtype=object),
+                                   'Crime_Category': pd.Series(dtype=object),
+                                   'count': pd.Series(dtype='int64')})])
+
+
+class CrimeRollup:
+    def __init__(self, tables=None, source=None):
+        """tables -- {grain: DataFrame of start, AREA, AREA NAME, Crime_Category, count sorted by start}"""
+        self.tables = tables if tables is not None else {grain: _empty_table() for grain in GRAINS}
+        self.source = source  # fingerprint of the dataset the counts describe
+        self._starts = {}
+
+    def update(self, added=None, removed=None):
+        """Add the incidents in `added` and take away those in `removed` (frames with SOURCE_COLUMNS)."""
+        parts = {grain: [self.tables[grain]] for grain in GRAINS}
+        for crime_df, sign in ((added, 1), (removed, -1)):
+            if crime_df is None or crime_df.empty:
+                continue
+            keys = _incident_keys(crime_df)
+            for grain in GRAINS:
+                counts = _grain_counts(keys, grain)
+                counts['count'] *= sign
+                parts[grain].append(counts)
+        for grain in GRAINS:
+            if len(parts[grain]) > 1:
+                self.tables[grain] = _combine(parts[grain])
+        self._starts = {}
+        return self
+
+    def _slice(self, grain, first, stop):
+        # Rows of buckets first <= start < stop, found by binary search on the sorted bucket starts
+        if grain not in self._starts:
+            self._starts[grain] = self.tables[grain]['start'].to_numpy()
+        starts = self._starts[grain]
+        lo = np.searchsorted(starts, np.datetime64(first, 'ns'))
+        hi = np.searchsorted(starts, np.datetime64(stop, 'ns'))
+        return self.tables[grain].iloc[lo:hi]
+
+    @staticmethod
+    def _select(table, area=None, category=None):
+        keep = np.ones(len(table), dtype=bool)
+        if area is not None:
+            areas = area if isinstance(area, (list, tuple, set)) else [area]
+            codes = [value for value in areas if not isinstance(value, str)]
+            names = [value for value in areas if isinstance(value, str)]
+            keep &= (table['AREA'].isin(codes) | table['AREA NAME'].isin(names)).to_numpy(dtype=bool)
+        if category is not None:
+            categories = category if isinstance(category, (list, tuple, set)) else [category]
+            keep &= table['Crime_Category'].isin(list(categories)).to_numpy(dtype=bool)
+        return table[keep]
+
+    def time_range(self):
+        """(first, end) of the years with data, or (None, None) for an empty rollup."""
+        years = self.tables['year']['start']
+        if years.empty:
+            return None, None
+        return years.iloc[0], next_bucket(years.iloc[-1], 'year')
+
+    def count(self, start=None, end=None, area=None, category=None):
+        """Incidents with start <= occurrence < end (None = open-ended).
+
+        area     -- AREA code(s) and/or AREA NAME(s)
+        category -- Crime_Category value(s)
+        A range that ends at a date (not a time) leaves that day out: pass the day after the last one.
+        """
+        first, stop = self.time_range()
+        if first is None:
+            return 0
+        start = first if start is None else max(pd.Timestamp(start), first)
+        end = stop if end is None else min(pd.Timestamp(end), stop)
+        return int(sum(self._select(self._slice(grain, lo, hi), area, category)['count'].sum()
+                       for grain, lo, hi in cover_range(start, end)))
+
+    def series(self, grain, start=None, end=None, area=None, category=None):
+        """Counts per grain bucket (indexed by bucket start) for the selected areas and categories."""
+        table = self.tables[grain]
+        if start is not None or end is not None:
+            first, stop = self.time_range()
+            table = self._slice(grain, bucket_floor(start, grain) if start is not None else first,
+                                pd.Timestamp(end) if end is not None else stop)
+        counts = self._select(table, area, category).groupby('start')['count'].sum()
+        return counts[counts > 0].rename_axis(grain)
+
+
+# ------------------------ Building, saving and loading ------------------------ #
+def build_crime_rollup(chunk_rows=200_000):
+    """Rollup of the whole cleaned dataset, built one chunk of SOURCE_COLUMNS at a time."""
+    rollup = CrimeRollup()
+    for chunk in iter_crime_data(columns=SOURCE_COLUMNS, chunk_rows=chunk_rows):
+        rollup.update(added=chunk)
+    return rollup
+
+
+def save_crime_rollup(rollup):
+    """Save the rollup as the index of the dataset as it is now."""
+    rollup.source = f"v{ROLLUP_VERSION}-{dataset_fingerprint()}"
+    os.makedirs(CRIME_ROLLUP_DIR, exist_ok=True)
+    for grain in GRAINS:
+        table = pa.Table.from_pandas(rollup.tables[grain], preserve_index=False)
+        table = table.replace_schema_metadata({**table.schema.metadata,
+                                               FINGERPRINT_KEY: rollup.source.encode("utf-8")})
+        pq.write_table(table, _grain_path(grain), compression="zstd")
+
+
+def rollup_fingerprint():
+    """Fingerprint of the dataset the saved rollup was built from (None if there is no complete rollup)."""
+    fingerprints = set()
+    for grain in GRAINS:
+        if not os.path.exists(_grain_path(grain)):
+            return None
+        fingerprints.add((pq.read_schema(_grain_path(grain)).metadata or {}).get(FINGERPRINT_KEY))
+    fingerprint = fingerprints.pop() if len(fingerprints) == 1 else None
+    return fingerprint.decode("utf-8") if fingerprint else None
+
+
+def saved_crime_rollup():
+    """The saved rollup if it describes the dataset as it is now, else None."""
+    fingerprint = f"v{ROLLUP_VERSION}-{dataset_fingerprint()}"
+    if rollup_fingerprint() != fingerprint:
+        return None
+    tables = {grain: pd.read_parquet(_grain_path(grain)) for grain in GRAINS}
+    return CrimeRollup(tables, source=fingerprint)
+
+
+def load_crime_rollup(chunk_rows=200_000, rebuild=False):
+    """(rollup, rebuilt): the saved rollup while the dataset is unchanged, otherwise a rebuilt and saved one."""
+    rollup = None if rebuild else saved_crime_rollup()
+    if rollup is not None:
+        return rollup, False
+    rollup = build_crime_rollup(chunk_rows)
+    save_crime_rollup(rollup)
+    return rollup, True
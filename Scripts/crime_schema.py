@@ -0,0 +1,297 @@
+# Column types for the crime data, on the way in and on the way out.
+#
+# RAW_COLUMNS is the machine-readable version of Data Dictionary.py: the 28 columns of the LAPD
+# extract, in order, with the type each one is read as. read_raw_crime_csv / iter_raw_crime_csv use
+# it to drive a multithreaded Arrow CSV parse (no type inference) and fail fast with a
+# SchemaDriftError when a new extract no longer matches.
+#
+# The cleaning steps work on text (every value is a string, missing values are "Unknown").
+# apply_output_schema turns that into a typed frame for export: numbers become nullable
+# integers/floats, dates become datetimes, low-cardinality text becomes pandas categories,
+# and the "Unknown"/"None" fillers become real missing values (pd.NA / NaN / NaT).
+# Category columns whose values are known up front get a fixed CategoricalDtype, so a frame typed
+# one chunk at a time (--chunk-size) gets the same categories, in the same order, as the whole frame.
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pandas.api.types import CategoricalDtype
+
+from crime_cleaning import age_labels, crime_category_mapping, TIME_OCC_TABLE, CRIME_CATEGORIES
+
+
+class SchemaDriftError(ValueError):
+    """The crime CSV does not match RAW_COLUMNS (missing/extra columns or values of the wrong type)."""
+
+
+# (column, Socrata field name, Data Dictionary type, dtype it is read as)
+RAW_COLUMNS = [
+    ('DR_NO', 'dr_no', 'Text', 'Int64'),
+    ('Date Rptd', 'date_rptd', 'Floating Timestamp', 'datetime'),
+    ('DATE OCC', 'date_occ', 'Floating Timestamp', 'datetime'),
+    ('TIME OCC', 'time_occ', 'Text', 'Int16'),
+    ('AREA', 'area', 'Text', 'Int8'),
+    ('AREA NAME', 'area_name', 'Text', 'string'),
+    ('Rpt Dist No', 'rpt_dist_no', 'Text', 'Int16'),
+    ('Part 1-2', 'part_1_2', 'Number', 'Int8'),
+    ('Crm Cd', 'crm_cd', 'Text', 'Int16'),
+    ('Crm Cd Desc', 'crm_cd_desc', 'Text', 'string'),
+    ('Mocodes', 'mocodes', 'Text', 'string'),
+    ('Vict Age', 'vict_age', 'Text', 'Int16'),
+    ('Vict Sex', 'vict_sex', 'Text', 'string'),
+    ('Vict Descent', 'vict_descent', 'Text', 'string'),
+    ('Premis Cd', 'premis_cd', 'Number', 'Int16'),
+    ('Premis Desc', 'premis_desc', 'Text', 'string'),
+    ('Weapon Used Cd', 'weapon_used_cd', 'Text', 'Int16'),
+    ('Weapon Desc', 'weapon_desc', 'Text', 'string'),
+    ('Status', 'status', 'Text', 'string'),
+    ('Status Desc', 'status_desc', 'Text', 'string'),
+    ('Crm Cd 1', 'crm_cd_1', 'Text', 'Int16'),
+    ('Crm Cd 2', 'crm_cd_2', 'Text', 'Int16'),
+    ('Crm Cd 3', 'crm_cd_3', 'Text', 'Int16'),
+    ('Crm Cd 4', 'crm_cd_4', 'Text', 'Int16'),
+    ('LOCATION', 'location', 'Text', 'string'),
+    ('Cross Street', 'cross_street', 'Text', 'string'),
+    ('LAT', 'lat', 'Number', 'float64'),
+    ('LON', 'lon', 'Number', 'float64'),
+]
+RAW_COLUMN_NAMES = [column for column, _, _, _ in RAW_COLUMNS]
+RAW_DTYPES = {column: dtype for column, _, _, dtype in RAW_COLUMNS}
+
+# e.g. "03/19/2021 12:00:00 AM"
+RAW_DATE_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+# Same strings pandas.read_csv treats as missing by default
+RAW_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                 '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+# Whole-number columns are parsed as float64 (so both "602" and "602.0" are accepted) and then
+# checked and narrowed to the nullable integer dtype
+_ARROW_READ_TYPES = {'string': pa.string(), 'datetime': pa.timestamp('s'), 'float64': pa.float64()}
+
+MISSING_MARKERS = ["Unknown"]
+MO_MISSING_MARKERS = ["Unknown", "None"]
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+# Every valid 12-hour TIME OCC label, in clock order
+TIME_LABELS = [label for label in TIME_OCC_TABLE if label != "Unknown"]
+# Every Crm Cd Desc crime_category_mapping knows, alphabetically
+CRIME_DESCRIPTIONS = sorted(crime_category_mapping)
+
+
+def crime_description_dtype(descriptions=()):
+    """Categories of Crm Cd Desc: CRIME_DESCRIPTIONS, then any other descriptions given (alphabetically)."""
+    known = set(CRIME_DESCRIPTIONS)
+    return CategoricalDtype(CRIME_DESCRIPTIONS + sorted({str(desc) for desc in descriptions} - known))
+
+
+OUTPUT_SCHEMA = {
+    'DR_NO': 'Int64',
+    'Date Rptd': 'datetime64[ns]',
+    'DATE OCC': 'datetime64[ns]',
+    'TIME OCC': CategoricalDtype(TIME_LABELS, ordered=True),
+    'AREA': 'Int8',
+    'AREA NAME': 'category',
+    'Rpt Dist No': 'Int16',
+    'Part 1-2': 'Int8',
+    'Crm Cd': 'Int16',
+    'Crm Cd Desc': crime_description_dtype(),
+    'Mocodes': 'object',
+    'Vict Age': 'Int16',
+    'Vict Sex': 'category',
+    'Vict Descent': 'category',
+    'Premis Cd': 'Int16',
+    'Premis Desc': 'category',
+    'Weapon Used Cd': 'Int16',
+    'Weapon Desc': 'category',
+    'Status': 'category',
+    'Status Desc': 'category',
+    'Crm Cd 1': 'Int16',
+    'Crm Cd 2': 'Int16',
+    'Crm Cd 3': 'Int16',
+    'Crm Cd 4': 'Int16',
+    'LOCATION': 'object',
+    'Cross Street': 'object',
+    'LAT': 'float64',
+    'LON': 'float64',
+    'DayOfWeek': CategoricalDtype(DAY_NAMES, ordered=True),
+    'Month': CategoricalDtype(MONTH_NAMES, ordered=True),
+    'Vict Age Group': CategoricalDtype(age_labels, ordered=True),
+    'Crime_Category': CategoricalDtype(CRIME_CATEGORIES),
+    'Crime_Category_Mask': 'uint8',
+}
+MO_DESC_DTYPE = 'category'
+
+
+def output_dtype(column, values=()):
+    """Output dtype of column; values are the column's values, for Crm Cd Desc descriptions without a mapping."""
+    if column.startswith('MO_Desc_'):
+        return MO_DESC_DTYPE
+    if column == 'Crm Cd Desc':
+        return crime_description_dtype(values)
+    return OUTPUT_SCHEMA.get(column)
+
+
+def data_category_columns(columns):
+    """The columns typed as categories whose categories come from the data (no fixed CategoricalDtype)."""
+    return [column for column in columns
+            if isinstance(output_dtype(column), str) and output_dtype(column) == 'category']
+
+
+def row_category_columns(columns):
+    """Category columns whose categories depend on the rows: data_category_columns and Crm Cd Desc
+    (its descriptions without a mapping)."""
+    return data_category_columns(columns) + [column for column in columns if column == 'Crm Cd Desc']
+
+
+def dataset_category_dtype(column, values):
+    """CategoricalDtype of one of those columns, given every value it takes across the dataset."""
+    dtype = output_dtype(column, values)
+    return dtype if isinstance(dtype, CategoricalDtype) else CategoricalDtype(sorted(set(values)))
+
+
+def _has_dtype(series, dtype):
+    # Unordered categoricals compare equal whatever the order of their categories; here the order matters
+    if isinstance(dtype, CategoricalDtype):
+        return (isinstance(series.dtype, CategoricalDtype) and series.dtype.ordered == dtype.ordered
+                and series.dtype.categories.equals(dtype.categories))
+    return series.dtype == dtype
+
+
+def _without_markers(series, markers):
+    if isinstance(series.dtype, CategoricalDtype):
+        series = series.astype(object)
+    if series.dtype == object:
+        series = series.mask(series.isin(markers))
+    return series
+
+
+def apply_output_schema(crime_df, crime_descriptions=()):
+    """Convert a cleaned (all-text) crime frame to the typed output schema.
+
+    Columns not in OUTPUT_SCHEMA are left alone. Safe to call on a frame that is already typed.
+    crime_descriptions -- Crm Cd Desc values without a crime_category_mapping entry in the whole dataset,
+                          so every chunk of a streamed run gets the same categories for them
+    """
+    for col in crime_df.columns:
+        markers = MO_MISSING_MARKERS if col.startswith('MO_Desc_') else MISSING_MARKERS
+        values = ()
+        if col == 'Crm Cd Desc':
+            values = [*crime_descriptions, *_without_markers(crime_df[col], markers).dropna().unique()]
+        dtype = output_dtype(col, values)
+        if dtype is None or (dtype != 'object' and _has_dtype(crime_df[col], dtype)):
+            continue
+        series = _without_markers(crime_df[col], markers)
+
+        if dtype == 'object':
+            crime_df[col] = series
+        elif dtype == 'datetime64[ns]':
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                series = pd.to_datetime(series, format='%m/%d/%Y', errors='coerce')
+            crime_df[col] = series.astype(dtype)
+        elif isinstance(dtype, str) and (dtype.startswith('Int') or dtype.startswith('float')):
+            numbers = pd.to_numeric(series, errors='coerce')
+            if dtype.startswith('Int'):
+                # Values the integer type can't hold (e.g. a Vict Age of 100000) become missing, like unparsable ones
+                limits = np.iinfo(dtype.lower())
+                numbers = numbers.round().where(numbers.between(limits.min, limits.max))
+            crime_df[col] = numbers.astype(dtype)
+        else:
+            crime_df[col] = series.astype(dtype)
+    return crime_df
+
+
+def memory_mb(crime_df):
+    return crime_df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def read_raw_header(csv_path):
+    with open(csv_path, encoding='utf-8-sig', newline='') as csv_file:
+        return next(csv.reader(csv_file), [])
+
+
+def check_raw_header(csv_path):
+    """Fail fast if the CSV header no longer matches RAW_COLUMNS."""
+    found = read_raw_header(csv_path)
+    missing = [column for column in RAW_COLUMN_NAMES if column not in found]
+    unexpected = [column for column in found if column not in RAW_COLUMN_NAMES]
+    problems = []
+    if missing:
+        problems.append(f"   • missing columns: {missing}")
+    if unexpected:
+        problems.append(f"   • unexpected columns: {unexpected}")
+    if problems:
+        raise SchemaDriftError(f"{csv_path} does not match the Data Dictionary schema:\n" + "\n".join(problems))
+
+
+def _convert_options(columns):
+    return pa_csv.ConvertOptions(
+        column_types={column: _ARROW_READ_TYPES.get(RAW_DTYPES[column], pa.float64()) for column in columns},
+        include_columns=columns,
+        timestamp_parsers=[RAW_DATE_FORMAT],
+        null_values=RAW_NA_VALUES,
+        strings_can_be_null=True,
+    )
+
+
+def _raw_table_to_pandas(table):
+    crime_df = table.to_pandas()
+    for column in crime_df.columns:
+        dtype = RAW_DTYPES[column]
+        if dtype.startswith('Int'):
+            try:
+                crime_df[column] = crime_df[column].astype(dtype)
+            except (TypeError, ValueError, OverflowError):
+                values = crime_df[column].dropna()
+                info = np.iinfo(dtype.lower())
+                bad = values[(values != values.round()) | (values < info.min) | (values > info.max)]
+                raise SchemaDriftError(f"Column '{column}' should hold whole numbers that fit {dtype}; "
+                                       f"found e.g. {bad.head(5).tolist()}") from None
+    return crime_df
+
+
+def _read_errors_as_drift(error, columns):
+    # Arrow reports "In CSV column #N: ..." with N counted over the columns being read; name it
+    match = re.search(r"column #(\d+)", str(error))
+    where = f" (column '{columns[int(match.group(1))]}')" if match and int(match.group(1)) < len(columns) else ""
+    return SchemaDriftError(f"Crime CSV does not match the Data Dictionary schema{where}: {error}")
+
+
+def read_raw_crime_csv(csv_path, columns=None):
+    """Read the LAPD crime CSV with the RAW_COLUMNS types (multithreaded Arrow parser)."""
+    check_raw_header(csv_path)
+    columns = list(columns or RAW_COLUMN_NAMES)
+    try:
+        table = pa_csv.read_csv(csv_path, read_options=pa_csv.ReadOptions(use_threads=True),
+                                convert_options=_convert_options(columns))
+    except pa.ArrowInvalid as error:
+        raise _read_errors_as_drift(error, columns) from None
+    return _raw_table_to_pandas(table)
+
+
+def iter_raw_crime_csv(csv_path, chunk_size, columns=None):
+    """Stream the crime CSV as DataFrames of chunk_size rows, typed the same way as read_raw_crime_csv."""
+    check_raw_header(csv_path)
+    columns = list(columns or RAW_COLUMN_NAMES)
+    try:
+        reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(use_threads=True),
+                                 convert_options=_convert_options(columns))
+        pending = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            while pending_rows >= chunk_size:
+                table = pa.Table.from_batches(pending)
+                yield _raw_table_to_pandas(table.slice(0, chunk_size))
+                pending = table.slice(chunk_size).to_batches()
+                pending_rows -= chunk_size
+        if pending_rows:
+            yield _raw_table_to_pandas(pa.Table.from_batches(pending))
+    except pa.ArrowInvalid as error:
+        raise _read_errors_as_drift(error, columns) from None
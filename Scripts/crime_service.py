@@ -0,0 +1,234 @@
+# Local HTTP prediction service for the crime category model.
+#
+# "Prediction Service.py" loads the model bundle once and serves it with the standard library's threaded
+# HTTP server:
+#
+#   POST /predict   one incident ({"TIME OCC": "1530", "AREA NAME": "Central", ...}), a list of them, or
+#                   {"incidents": [...]}; the answer has one prediction per incident (or one for one)
+#   GET  /health    model id and status
+#   GET  /metrics   request, incident and batch counters, p50/p90/p99 latency and throughput
+#
+# Incidents use the raw Data Dictionary fields in crime_model.INCIDENT_COLUMNS, as text or whole JSON numbers
+# (e.g. "TIME OCC": 1430); any other value is a 400. Each request thread hands its incidents to a
+# MicroBatcher and waits; the batcher's single thread takes everything that arrives
+# within max_wait (stopping early once it holds max_batch incidents), cleans and scores it as one
+# DataFrame and hands every request its rows back. Under load that turns many one-row predict calls
+# into a few vectorized ones. If a batch fails, its requests are scored again one by one, so bad input
+# fails only the request that sent it.
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from crime_model import check_incident, clean_incidents, PREDICTED_COLUMN, PROBABILITY_COLUMN, PROBABILITY_PREFIX
+
+LATENCY_WINDOW = 10_000  # latencies kept for the percentiles (the most recent requests)
+
+
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.incidents = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record_request(self, seconds, incidents, ok=True):
+        with self.lock:
+            self.requests += 1
+            self.incidents += incidents
+            self.errors += not ok
+            self.latencies.append(seconds)
+
+    def record_batch(self, incidents):
+        with self.lock:
+            self.batches += 1
+            self.batch_sizes.append(incidents)
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.perf_counter() - self.started
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+            summary = {
+                "uptime_s": round(uptime, 1),
+                "requests": self.requests,
+                "incidents": self.incidents,
+                "errors": self.errors,
+                "batches": self.batches,
+                "requests_per_s": round(self.requests / uptime, 1) if uptime else 0.0,
+                "incidents_per_s": round(self.incidents / uptime, 1) if uptime else 0.0,
+            }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            summary.update(latency_ms={"p50": round(p50, 2), "p90": round(p90, 2), "p99": round(p99, 2),
+                                       "max": round(latencies.max(), 2), "window": len(latencies)})
+        if len(batch_sizes):
+            summary.update(mean_batch=round(float(batch_sizes.mean()), 1), max_batch=int(batch_sizes.max()))
+        return summary
+
+
+class MicroBatcher:
+    def __init__(self, bundle, mo_code_mapping, stats, max_batch=64, max_wait=0.005):
+        self.bundle = bundle
+        self.mo_code_mapping = mo_code_mapping
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+    def predict(self, incidents):
+        """Predictions for a list of incidents, scored together with whatever else arrives meanwhile."""
+        future = Future()
+        self.pending.put((incidents, future))
+        return future.result()
+
+    def _collect(self):
+        # Block for the first request, then take more until the batch is full or max_wait has passed
+        requests = [self.pending.get()]
+        size = len(requests[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect()
+            incidents = [incident for request_incidents, _ in requests for incident in request_incidents]
+            try:
+                predictions = self.score(incidents)
+            except Exception as error:
+                if len(requests) > 1:
+                    self._score_alone(requests)
+                else:  # one bad request fails itself, not the service
+                    requests[0][1].set_exception(error)
+                continue
+            self.stats.record_batch(len(incidents))
+            start = 0
+            for request_incidents, future in requests:
+                future.set_result(predictions[start:start + len(request_incidents)])
+                start += len(request_incidents)
+
+    def _score_alone(self, requests):
+        # A batch that failed is scored again request by request, so only the request with bad input fails
+        for request_incidents, future in requests:
+            try:
+                predictions = self.score(request_incidents)
+            except Exception as error:
+                future.set_exception(error)
+                continue
+            self.stats.record_batch(len(request_incidents))
+            future.set_result(predictions)
+
+    def score(self, incidents):
+        if not incidents:
+            return []
+        crime_df = clean_incidents(incidents, self.mo_code_mapping, self.bundle.features)
+        scores = self.bundle.score(crime_df)
+        probability_columns = [f"{PROBABILITY_PREFIX}{label}" for label in self.bundle.classes]
+        categories = scores[PREDICTED_COLUMN].tolist()
+        best = scores[PROBABILITY_COLUMN].round(4).tolist()
+        probabilities = scores[probability_columns].round(4).to_numpy().tolist()
+        return [{"category": category, "probability": probability,
+                 "probabilities": dict(zip(self.bundle.classes, row))}
+                for category, probability, row in zip(categories, best, probabilities)]
+
+
+def _parse_incidents(payload):
+    # (incidents, single): a lone incident object gets a lone prediction back
+    if isinstance(payload, dict) and "incidents" in payload:
+        payload = payload["incidents"]
+    elif isinstance(payload, dict):
+        check_incident(payload)
+        return [payload], True
+    if not isinstance(payload, list) or not all(isinstance(incident, dict) for incident in payload):
+        raise ValueError("Send an incident object, a list of them or {\"incidents\": [...]}")
+    for incident in payload:
+        check_incident(incident)
+    return payload, False
+
+
+def make_handler(bundle, batcher, stats, max_request_incidents):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so clients don't reconnect for every request
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "model_id": bundle.model_id})
+            elif self.path == "/metrics":
+                self._send_json(200, {"model_id": bundle.model_id, **stats.snapshot()})
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            started = time.perf_counter()
+            incidents = []
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                incidents, single = _parse_incidents(json.loads(self.rfile.read(length) or b"null"))
+                if len(incidents) > max_request_incidents:
+                    raise ValueError(f"At most {max_request_incidents:,} incidents per request")
+            except ValueError as error:  # includes bad JSON
+                stats.record_request(time.perf_counter() - started, len(incidents), ok=False)
+                self._send_json(400, {"error": str(error)})
+                return
+            try:
+                predictions = batcher.predict(incidents)
+            except Exception as error:
+                stats.record_request(time.perf_counter() - started, len(incidents), ok=False)
+                self._send_json(500, {"error": f"{type(error).__name__}: {error}"})
+                return
+            stats.record_request(time.perf_counter() - started, len(incidents))
+            if single:
+                self._send_json(200, {"model_id": bundle.model_id, "prediction": predictions[0]})
+            else:
+                self._send_json(200, {"model_id": bundle.model_id, "predictions": predictions})
+
+        def log_message(self, format, *args):
+            pass  # one line per request would cost more than the prediction; see /metrics
+
+    return PredictionHandler
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's default backlog of 5 drops connections from bursts of clients
+
+
+def start_prediction_server(bundle, mo_code_mapping, host="127.0.0.1", port=8765, max_batch=64, max_wait=0.005,
+                            max_request_incidents=10_000):
+    """(server, stats); call server.serve_forever() to run it."""
+    stats = LatencyStats()
+    batcher = MicroBatcher(bundle, mo_code_mapping, stats, max_batch, max_wait)
+    server = PredictionServer((host, port), make_handler(bundle, batcher, stats, max_request_incidents))
+    return server, stats
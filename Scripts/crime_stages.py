@@ -0,0 +1,201 @@
+# The cleaning pipeline as a small DAG of named stages with an on-disk cache.
+# Each stage's output is pickled under Output/stage_cache, keyed by a hash of:
+#   - the source code of the functions it runs,
+#   - its parameters (engine, ...) and the module-level tables it reads (mappings, age bins, ...),
+#   - the keys of the stages it reads from (the raw CSV and MO code file are keyed by their contents).
+# A run recomputes only stages whose key changed (and anything downstream of them); everything
+# else is loaded from the cache. The date, time, demographic, MO and category steps each read the
+# de-duplicated base table and produce their own columns, so editing e.g. crime_category_mapping
+# or the age bins reruns just those stages (for categories: the code lookup too) plus the final assembly.
+import glob
+import hashlib
+import inspect
+import os
+import time
+
+import pandas as pd
+
+from project_paths import CRIME_CSV, MO_CODES_CSV, STAGE_CACHE_DIR
+from crime_cleaning import (
+    descent_mapping, age_bins, age_labels, crime_category_mapping, load_mo_code_mapping, fill_missing_values,
+    drop_duplicate_records, parse_dates, convert_time_occ, clean_demographics, expand_mo_codes,
+    map_crime_categories, military_to_am_pm, military_to_am_pm_vectorized, expand_mocodes_to_descriptions,
+    expand_mocodes_vectorized, split_mocodes, CRIME_CATEGORIES, CRIME_CODE_COLUMNS, crime_code_array,
+    crime_code_pairs, compile_crime_code_lookup
+)
+from crime_schema import (
+    RAW_COLUMNS, OUTPUT_SCHEMA, CRIME_DESCRIPTIONS, MO_DESC_DTYPE, MISSING_MARKERS, MO_MISSING_MARKERS,
+    read_raw_crime_csv, apply_output_schema, output_dtype, crime_description_dtype, _has_dtype, _without_markers,
+    _convert_options, _raw_table_to_pandas
+)
+from crime_dataset import record_hashes
+from mo_codes import build_mo_long
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), params=None, code=(), data=None):
+        """func is called with the outputs of `inputs` (in order) followed by **params.
+
+        code lists the helper functions func relies on, and data any module-level tables or file
+        digests it reads; both are part of the cache key but are not passed to func.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.code = [func] + list(code)
+        self.data = data or {}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_digest(functions):
+    return [inspect.getsource(function) for function in functions]
+
+
+class StageGraph:
+    def __init__(self, stages, cache_dir=STAGE_CACHE_DIR):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = cache_dir
+        self.keys = {}
+        for stage in stages:
+            # Stages are listed in dependency order, so input keys are already known
+            key_parts = [stage.name, _code_digest(stage.code), repr(sorted(stage.params.items())),
+                         repr(sorted(stage.data.items())), [self.keys[name] for name in stage.inputs]]
+            self.keys[stage.name] = hashlib.sha256(repr(key_parts).encode('utf-8')).hexdigest()
+        self.values = {}
+        self.report = []
+
+    def _cache_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.keys[name][:16]}.pkl")
+
+    def get(self, name):
+        """Output of stage `name`, from memory, the disk cache, or by running it."""
+        if name in self.values:
+            return self.values[name]
+        stage = self.stages[name]
+        path = self._cache_path(name)
+        start = time.perf_counter()
+        if os.path.exists(path):
+            value = pd.read_pickle(path)
+            self.report.append((name, "cached", time.perf_counter() - start))
+        else:
+            args = [self.get(input_name) for input_name in stage.inputs]
+            start = time.perf_counter()
+            value = stage.func(*args, **stage.params)
+            self.report.append((name, "ran", time.perf_counter() - start))
+            self._store(name, value)
+        self.values[name] = value
+        return value
+
+    def _store(self, name, value):
+        # One checkpoint per stage: drop the stale ones, then write the new one atomically
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for old_path in glob.glob(os.path.join(self.cache_dir, f"{glob.escape(name)}-*.pkl")):
+            os.remove(old_path)
+        path = self._cache_path(name)
+        pd.to_pickle(value, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+
+# ------------------------ Stage functions ------------------------ #
+def base_table(raw):
+    # STEP 2-3: fill missing values, drop duplicate DR_NOs
+    return drop_duplicate_records(fill_missing_values(raw.copy()))
+
+
+def typed(part, legacy_strings, crime_descriptions=()):
+    # STEP 9 for one stage's columns, so a rerun of one stage doesn't retype the whole table
+    return part if legacy_strings else apply_output_schema(part, crime_descriptions)
+
+
+def date_columns(base, legacy_strings):
+    dates = parse_dates(base[['DATE OCC', 'Date Rptd']].copy())
+    return typed(dates[['Date Rptd', 'DATE OCC', 'DayOfWeek', 'Month']], legacy_strings)
+
+
+def time_columns(base, engine, legacy_strings):
+    return typed(convert_time_occ(base[['TIME OCC']].copy(), engine), legacy_strings)
+
+
+def demographic_columns(base, legacy_strings):
+    return typed(clean_demographics(base[['Vict Age', 'Vict Sex', 'Vict Descent']].copy()), legacy_strings)
+
+
+def mo_columns(base, mo_code_mapping, engine, compact_mo, legacy_strings):
+    mo_long = build_mo_long(base, mo_code_mapping)
+    if compact_mo:
+        return pd.DataFrame(index=base.index), mo_long
+    mo_df, mo_desc_columns = expand_mo_codes(base[['Mocodes']].copy(), mo_code_mapping, engine=engine)
+    return typed(mo_df[mo_desc_columns], legacy_strings), mo_long
+
+
+def crime_code_lookup(raw):
+    # Compiled from the raw rows (duplicates included), like the in-memory pipeline
+    return compile_crime_code_lookup(crime_code_pairs(raw))
+
+
+def category_columns(base, code_lookup, legacy_strings):
+    categories = map_crime_categories(base[CRIME_CODE_COLUMNS + ['Crm Cd Desc']].copy(), code_lookup[0])
+    return typed(categories[['Crime_Category', 'Crime_Category_Mask']], legacy_strings)
+
+
+def base_columns(base, code_lookup, legacy_strings):
+    # Crm Cd Desc gets the descriptions without a mapping of the whole extract, like the other modes
+    return typed(base.copy(), legacy_strings, crime_descriptions=code_lookup[1]['Crm Cd Desc'])
+
+
+def assemble(base, dates, times, demographics, mo, categories):
+    # Same column order as the serial pipeline: the raw columns, then each step's new columns
+    crime_df = base.copy()
+    for part in [dates, times, demographics, mo[0], categories]:
+        for col in part.columns:
+            crime_df[col] = part[col]
+    return crime_df, mo[1]
+
+
+# Everything in crime_schema that decides the output dtypes
+SCHEMA_CODE = [apply_output_schema, output_dtype, crime_description_dtype, _has_dtype, _without_markers]
+
+
+def cleaning_stages(engine="vectorized", compact_mo=False, legacy_strings=False):
+    """The cleaning pipeline (STEP 1-9) as stages; 'output' gives (crime_df, mo_long), 'hashes' the raw row hashes
+    and 'code_lookup' the compiled crime code lookup with its unmapped codes."""
+    def with_schema(params=None, code=(), data=None):
+        # Stages that produce output columns also apply the typed schema to them
+        schema_data = {'schema': OUTPUT_SCHEMA, 'crime_descriptions': CRIME_DESCRIPTIONS,
+                       'mo_desc_dtype': MO_DESC_DTYPE, 'missing_markers': [MISSING_MARKERS, MO_MISSING_MARKERS]}
+        return {'params': {'legacy_strings': legacy_strings, **(params or {})},
+                'code': [typed, *SCHEMA_CODE, *code], 'data': {**schema_data, **(data or {})}}
+
+    return [
+        Stage('raw', read_raw_crime_csv, params={'csv_path': CRIME_CSV}, code=[_convert_options, _raw_table_to_pandas],
+              data={'csv': file_digest(CRIME_CSV), 'raw_columns': RAW_COLUMNS}),
+        Stage('hashes', record_hashes, ['raw']),
+        Stage('mo_mapping', load_mo_code_mapping, params={'mo_codes_path': MO_CODES_CSV},
+              data={'mo_codes': file_digest(MO_CODES_CSV)}),
+        Stage('base', base_table, ['raw'], code=[fill_missing_values, drop_duplicate_records]),
+        Stage('dates', date_columns, ['base'], **with_schema(code=[parse_dates])),
+        Stage('times', time_columns, ['base'],
+              **with_schema({'engine': engine}, [convert_time_occ, military_to_am_pm, military_to_am_pm_vectorized])),
+        Stage('demographics', demographic_columns, ['base'],
+              **with_schema(code=[clean_demographics],
+                            data={'descent_mapping': descent_mapping, 'age_bins': age_bins, 'age_labels': age_labels})),
+        Stage('mo', mo_columns, ['base', 'mo_mapping'],
+              **with_schema({'engine': engine, 'compact_mo': compact_mo},
+                            [expand_mo_codes, expand_mocodes_to_descriptions, expand_mocodes_vectorized,
+                             split_mocodes, build_mo_long])),
+        Stage('code_lookup', crime_code_lookup, ['raw'],
+              code=[crime_code_array, crime_code_pairs, compile_crime_code_lookup],
+              data={'crime_category_mapping': crime_category_mapping, 'crime_categories': CRIME_CATEGORIES}),
+        Stage('categories', category_columns, ['base', 'code_lookup'],
+              **with_schema(code=[map_crime_categories, crime_code_array], data={'crime_categories': CRIME_CATEGORIES})),
+        Stage('base_columns', base_columns, ['base', 'code_lookup'], **with_schema()),
+        Stage('output', assemble, ['base_columns', 'dates', 'times', 'demographics', 'mo', 'categories']),
+    ]
@@ -0,0 +1,215 @@
+# Successive-halving hyperparameter search for the crime category Random Forest.
+#
+# Every config in the grid starts on a small stratified sample with a few trees. Each rung scores the
+# surviving configs with stratified k-fold cross-validation (macro-F1), keeps the best 1/factor of them
+# and multiplies both the sample size and the tree count by factor for the next rung. The search stops
+# once a rung's ranking leaves a single config (cross-validating one candidate can't eliminate anything)
+# or the sample is the whole training set and the forest is at max_trees; the caller then fits the winner
+# once on all training rows:
+#
+#   leaderboard = successive_halving(X_train, y_train, classes, parameter_grid(), FitCache(path))
+#   best = leaderboard.iloc[0]      # rung, config, rows, trees, macro_f1, fit_s, predict_ms_per_1k, recall_*
+#
+# The (config, fold) fits of a rung run in a process pool that receives the training matrix once per
+# worker. Each finished fit is appended to a JSON-lines cache keyed by a digest of the data, the config,
+# the rung's rows and trees, the fold and the seed, so a repeated or interrupted search only runs the fits
+# it hasn't done yet (fit times and latencies in the leaderboard are the ones measured when a fit first ran).
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score, recall_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+TUNING_VERSION = 1  # bump when how fits are sampled, split or scored changes
+
+# Knobs that trade variance against the rare categories' recall; n_estimators is the halving resource
+PARAM_GRID = {
+    'max_features': ['sqrt', 'log2'],
+    'min_samples_leaf': [1, 3, 10],
+    'class_weight': [None, 'balanced', 'balanced_subsample'],
+}
+
+
+def parameter_grid(grid=PARAM_GRID):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def config_name(params):
+    return ", ".join(f"{name}={value}" for name, value in params.items())
+
+
+def data_digest(X, y):
+    """Hash of a feature matrix (dense or CSR) and its labels, so cached fits only match the same data."""
+    digest = hashlib.sha256(f"{X.shape}".encode("utf-8"))
+    if sparse.issparse(X):
+        X = X.tocsr()
+        parts = [X.data, X.indices, X.indptr]
+    else:
+        parts = [np.asarray(X, dtype=np.float32)]
+    for part in parts + [np.asarray(y)]:
+        digest.update(np.ascontiguousarray(part).view(np.uint8))
+    return digest.hexdigest()
+
+
+class FitCache:
+    def __init__(self, path):
+        """path -- JSON-lines file of finished fits (created on the first put)"""
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as cache_in:
+                for line in cache_in:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.results[record["key"]] = record["result"]
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results[key] = result
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as cache_out:
+            cache_out.write(json.dumps({"key": key, "result": result}) + "\n")
+
+
+def fit_key(data_key, params, rows, trees, fold, folds, seed):
+    text = json.dumps([TUNING_VERSION, sklearn.__version__, data_key, params, rows, trees, fold, folds, seed],
+                      sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def halving_schedule(candidates, total_rows, min_rows, min_trees, max_trees, factor):
+    """[(rung, configs scored, rows, trees)] for a search starting with `candidates` configs.
+
+    The last rung is the one whose ranking leaves one config (or that reaches total_rows and max_trees);
+    a lone candidate is only scored when the grid has a single config.
+    """
+    schedule = []
+    rung = 0
+    while True:
+        rows = min(total_rows, min_rows * factor ** rung)
+        trees = min(max_trees, min_trees * factor ** rung)
+        schedule.append((rung, candidates, rows, trees))
+        candidates = max(1, math.ceil(candidates / factor))
+        if candidates == 1 or (rows == total_rows and trees == max_trees):
+            return schedule
+        rung += 1
+
+
+def _stratified_sample(y, rows, seed):
+    if rows >= len(y):
+        return np.arange(len(y))
+    try:
+        sample, _ = train_test_split(np.arange(len(y)), train_size=rows, stratify=y, random_state=seed)
+    except ValueError:  # a category too rare to split proportionally
+        sample, _ = train_test_split(np.arange(len(y)), train_size=rows, random_state=seed)
+    return np.sort(sample)
+
+
+# ------------------------ Fitting one (config, fold) ------------------------ #
+_worker_data = {}
+
+
+def _start_tuning_worker(X, y, labels):
+    _worker_data.update(X=X, y=y, labels=labels)
+
+
+def _fit_fold(params, trees, train_index, test_index, seed):
+    X, y, labels = _worker_data["X"], _worker_data["y"], _worker_data["labels"]
+    model = RandomForestClassifier(n_estimators=trees, random_state=seed, n_jobs=1, **params)
+    started = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    fit_s = time.perf_counter() - started
+    X_test = X[test_index]
+    started = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - started
+    y_test = y[test_index]
+    return {
+        "macro_f1": float(f1_score(y_test, y_pred, labels=labels, average='macro', zero_division=0)),
+        "recall": recall_score(y_test, y_pred, labels=labels, average=None, zero_division=0).tolist(),
+        "fit_s": fit_s,
+        "predict_ms_per_1k": predict_s / max(len(test_index), 1) * 1_000_000,
+    }
+
+
+def _run_fits(tasks, X, y, labels, workers):
+    # tasks: [(params, trees, train_index, test_index, seed)]; results in task order
+    if workers == 1 or len(tasks) <= 1:
+        _start_tuning_worker(X, y, labels)
+        return [_fit_fold(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_start_tuning_worker,
+                             initargs=(X, y, labels)) as executor:
+        futures = [executor.submit(_fit_fold, *task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+# ------------------------ The search ------------------------ #
+def successive_halving(X, y, classes, configs, cache, min_rows=2000, min_trees=25, max_trees=200, factor=3,
+                       folds=3, workers=None, seed=42, progress=print):
+    """Leaderboard DataFrame, one row per (rung, config), best config of the last rung first.
+
+    X, y    -- training features and label codes 0..len(classes)-1 (keep the test split out)
+    configs -- RandomForestClassifier keyword dicts, e.g. parameter_grid()
+    """
+    workers = workers or os.cpu_count() or 1
+    if not sparse.issparse(X):
+        X = np.asarray(X, dtype=np.float32)  # get_dummies frames, indexed by row position below
+    y = np.asarray(y)
+    labels = list(range(len(classes)))
+    data_key = data_digest(X, y)
+    survivors = list(range(len(configs)))
+    schedule = halving_schedule(len(configs), len(y), min_rows, min_trees, max_trees, factor)
+    rung_frames = []
+
+    for rung, _, rows, trees in schedule:
+        sample = _stratified_sample(y, rows, seed + rung)
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+        splits = [(sample[train], sample[test]) for train, test in splitter.split(sample, y[sample])]
+
+        keys = {(config, fold): fit_key(data_key, configs[config], rows, trees, fold, folds, seed)
+                for config in survivors for fold in range(folds)}
+        missing = [pair for pair in keys if cache.get(keys[pair]) is None]
+        progress(f" - Rung {rung}: {len(survivors)} config{'s' if len(survivors) != 1 else ''} × {folds} folds "
+                 f"on {rows:,} rows with {trees} trees ({len(keys) - len(missing)} fits cached, {len(missing)} to run)")
+        started = time.perf_counter()
+        results = _run_fits([(configs[config], trees, *splits[fold], seed) for config, fold in missing],
+                            X, y, labels, workers)
+        for pair, result in zip(missing, results):
+            cache.put(keys[pair], result)
+        if missing:
+            progress(f"   • {len(missing)} fits in {time.perf_counter() - started:.1f}s")
+
+        records = []
+        for config in survivors:
+            fold_results = [cache.get(keys[(config, fold)]) for fold in range(folds)]
+            f1_scores = [result["macro_f1"] for result in fold_results]
+            record = {"rung": rung, "config": config_name(configs[config]), "rows": rows, "trees": trees,
+                      "macro_f1": float(np.mean(f1_scores)), "macro_f1_std": float(np.std(f1_scores)),
+                      "fit_s": float(np.mean([result["fit_s"] for result in fold_results])),
+                      "predict_ms_per_1k": float(np.mean([result["predict_ms_per_1k"] for result in fold_results]))}
+            recalls = np.mean([result["recall"] for result in fold_results], axis=0)
+            record.update({f"recall_{label}": float(recall) for label, recall in zip(classes, recalls)})
+            record["params"] = json.dumps(configs[config])
+            records.append(record)
+        rung_frame = pd.DataFrame(records).sort_values("macro_f1", ascending=False, kind="stable")
+        rung_frames.append(rung_frame)
+
+        # Rung records are in survivor order, so the sort order maps straight back to config indices
+        ranked = [survivors[position] for position in rung_frame.index]
+        survivors = ranked[:max(1, math.ceil(len(ranked) / factor))]
+
+    leaderboard = pd.concat(rung_frames[::-1], ignore_index=True)
+    return leaderboard
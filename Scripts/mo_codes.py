@@ -0,0 +1,92 @@
+# Compact MO code storage for the cleaned crime data.
+# Instead of MO_Desc_1..N string columns padded with "None", each incident's codes are kept as a
+# long table with one row per code:  DR_NO (int64) | MO_Position (int8, 1-based) | MO_Code (int16)
+# MO_Code is the numeric code from Mo_Codes.csv, or -1 when the code is not in the dictionary.
+# The wide MO_Desc view (or a sparse incidence matrix) can be rebuilt from it whenever a script needs it.
+import numpy as np
+import pandas as pd
+
+from crime_cleaning import split_mocodes
+
+UNKNOWN_MO_CODE = -1
+
+
+def dr_no_keys(dr_no):
+    # DR_NO is text in the cleaned frame; the long table stores it as int64 (-1 if it isn't a number)
+    return pd.to_numeric(dr_no, errors='coerce').fillna(-1).astype(np.int64).to_numpy()
+
+
+def build_mo_long(crime_df, mo_code_mapping):
+    """Long (DR_NO, MO_Position, MO_Code) table for every code in crime_df['Mocodes']."""
+    row_codes, unique_count, token_rows, positions, token_codes, unique_tokens = split_mocodes(crime_df['Mocodes'])
+
+    # Numeric MO code of each distinct token, -1 when it isn't in Mo_Codes.csv
+    padded_tokens = pd.Series(unique_tokens, dtype=object).str.zfill(4)
+    in_dictionary = padded_tokens.isin(mo_code_mapping.keys()).to_numpy()
+    token_values = np.full(len(unique_tokens), UNKNOWN_MO_CODE, dtype=np.int16)
+    token_values[in_dictionary] = padded_tokens[in_dictionary].astype(np.int16).to_numpy()
+
+    # Codes per distinct Mocodes string, then gathered out to every incident that uses it
+    codes_per_unique = np.append(np.bincount(token_rows, minlength=unique_count), 0)
+    first_token = np.cumsum(codes_per_unique) - codes_per_unique
+    codes_per_incident = codes_per_unique[row_codes]
+    incident_rows = np.repeat(np.arange(len(row_codes)), codes_per_incident)
+    within_incident = np.arange(len(incident_rows)) - np.repeat(np.cumsum(codes_per_incident) - codes_per_incident,
+                                                                codes_per_incident)
+    token_index = np.repeat(first_token[row_codes], codes_per_incident) + within_incident
+
+    return pd.DataFrame({
+        'DR_NO': dr_no_keys(crime_df['DR_NO'])[incident_rows],
+        'MO_Position': (positions[token_index] + 1).astype(np.int8),
+        'MO_Code': token_values[token_codes[token_index]],
+    })
+
+
+def mo_code_descriptions(mo_code_mapping):
+    # Lookup array indexed by numeric MO code -> description ("None" for anything unmapped)
+    descriptions = np.full(10000, "None", dtype=object)
+    for code, description in mo_code_mapping.items():
+        if code.isdigit() and int(code) < len(descriptions) and not pd.isna(description):
+            descriptions[int(code)] = description
+    return descriptions
+
+
+def mo_wide_view(mo_long, dr_no, mo_code_mapping, width=None):
+    """Rebuild the MO_Desc_1..N columns for the incidents in dr_no (same order and index)."""
+    keys = dr_no_keys(dr_no)
+    rows = pd.Index(keys).get_indexer(mo_long['DR_NO'].to_numpy())
+    found = rows >= 0
+    positions = mo_long['MO_Position'].to_numpy()[found].astype(np.int64) - 1
+    if width is None:
+        width = max(int(positions.max()) + 1 if len(positions) else 0, 1)
+    in_view = positions < width
+
+    descriptions = mo_code_descriptions(mo_code_mapping)
+    codes = mo_long['MO_Code'].to_numpy()[found][in_view]
+    wide = np.full((len(keys), width), "None", dtype=object)
+    wide[rows[found][in_view], positions[in_view]] = np.where(codes >= 0, descriptions[np.clip(codes, 0, None)], "None")
+
+    index = dr_no.index if isinstance(dr_no, pd.Series) else None
+    return pd.DataFrame(wide, columns=[f"MO_Desc_{i+1}" for i in range(width)], index=index)
+
+
+def attach_mo_descriptions(crime_df, mo_long, mo_code_mapping, width=None):
+    # Adds the wide MO_Desc_N columns back onto a frame that was saved without them
+    mo_desc_df = mo_wide_view(mo_long, crime_df['DR_NO'], mo_code_mapping, width)
+    return pd.concat([crime_df, mo_desc_df], axis=1)
+
+
+def mo_incidence_matrix(mo_long, dr_no, mo_code_mapping):
+    """Binary CSR matrix (incidents x MO codes) plus the list of codes for its columns."""
+    from scipy import sparse
+
+    all_codes = np.array(sorted(int(code) for code in mo_code_mapping if code.isdigit()), dtype=np.int64)
+    rows = pd.Index(dr_no_keys(dr_no)).get_indexer(mo_long['DR_NO'].to_numpy())
+    columns = np.searchsorted(all_codes, mo_long['MO_Code'].to_numpy())
+    valid = (rows >= 0) & (mo_long['MO_Code'].to_numpy() >= 0)
+
+    matrix = sparse.csr_matrix((np.ones(valid.sum(), dtype=np.int8), (rows[valid], columns[valid])),
+                               shape=(len(dr_no), len(all_codes)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, all_codes
@@ -0,0 +1,34 @@
+# Shared file locations for the Capstone scripts.
+# Everything hangs off PROJECT_DIR, which defaults to the original project folder
+# and can be pointed somewhere else with the CAPSTONE_PROJECT_DIR environment variable.
+import os
+
+PROJECT_DIR = os.environ.get("CAPSTONE_PROJECT_DIR", r"C:\Users\Josiah Randleman\Documents\_Capstone Project")
+
+DATASET_DIR = os.path.join(PROJECT_DIR, "Dataset")
+OUTPUT_DIR = os.path.join(PROJECT_DIR, "Output")
+CHARTS_DIR = os.path.join(OUTPUT_DIR, "Charts")
+MODELS_DIR = os.path.join(PROJECT_DIR, "Models")
+
+CRIME_CSV = os.path.join(DATASET_DIR, "Crime_Data_from_2020_to_Present.csv")
+MO_CODES_CSV = os.path.join(PROJECT_DIR, "MO Codes", "Mo_Codes.csv")
+DIVISIONS_GEOJSON = os.path.join(PROJECT_DIR, "LAPD Divisions", "LAPD_Division_5922489107755548254.geojson")
+
+CLEANED_PICKLE = os.path.join(OUTPUT_DIR, "crime_df_cleaned.pkl")
+CLEANED_MO_PICKLE = os.path.join(OUTPUT_DIR, "crime_mo_codes.pkl")
+CLEANED_DATASET_DIR = os.path.join(OUTPUT_DIR, "crime_dataset")
+CLEANED_MO_PARQUET = os.path.join(OUTPUT_DIR, "crime_mo_codes.parquet")
+RECORD_INDEX_PARQUET = os.path.join(OUTPUT_DIR, "crime_record_index.parquet")
+CRIME_PROFILE_JSON = os.path.join(OUTPUT_DIR, "crime_profile.json")
+CRIME_CUBE_DIR = os.path.join(OUTPUT_DIR, "crime_cube")
+CRIME_ROLLUP_DIR = os.path.join(OUTPUT_DIR, "crime_rollup")
+STAGE_CACHE_DIR = os.path.join(OUTPUT_DIR, "stage_cache")
+METRICS_DIR = os.path.join(OUTPUT_DIR, "metrics")
+BENCHMARK_DIR = os.path.join(OUTPUT_DIR, "benchmarks")
+FEATURE_ENCODER_JSON = os.path.join(MODELS_DIR, "feature_encoder.json")
+MODEL_BUNDLE_PATH = os.path.join(MODELS_DIR, "crime_model_bundle.joblib")
+PREDICTIONS_DIR = os.path.join(OUTPUT_DIR, "predictions")
+TUNING_DIR = os.path.join(MODELS_DIR, "tuning")
+MODEL_UPDATES_LOG = os.path.join(MODELS_DIR, "model_updates.jsonl")
+COMPACT_MODEL_BUNDLE_PATH = os.path.join(MODELS_DIR, "crime_model_compact.joblib")
+LEARNING_CURVE_DIR = os.path.join(BENCHMARK_DIR, "learning_curve")
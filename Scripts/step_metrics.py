@@ -0,0 +1,172 @@
+# Per-step timing and memory instrumentation for the Capstone scripts.
+#
+#   metrics = StepMetrics("EDA Pipeline")
+#   metrics.step("STEP 1: Load Cleaned Dataset")   # prints the banner, closes the previous step, starts this one
+#   metrics.rows(len(crime_df))                     # optional: rows handled in the current step (or step(..., rows=n))
+#   metrics.finish()                                # closes the last step and prints a timing summary
+#
+# Every finished step is appended as one JSON line (wall time, CPU time, current/peak RSS, rows) to
+# Output/metrics/step_metrics.jsonl, or to the file named by CAPSTONE_METRICS_FILE.
+#
+# Profiling is opt-in per step: set CAPSTONE_PROFILE_STEP to part of a step name (e.g. "STEP 7") and
+# CAPSTONE_PROFILE to cprofile, tracemalloc or both. Profiles are written to Output/metrics/profiles.
+import atexit
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from project_paths import METRICS_DIR
+
+METRICS_FILE = os.environ.get("CAPSTONE_METRICS_FILE", os.path.join(METRICS_DIR, "step_metrics.jsonl"))
+PROFILE_DIR = os.path.join(METRICS_DIR, "profiles")
+PROFILE_STEP = os.environ.get("CAPSTONE_PROFILE_STEP")
+PROFILE_MODE = os.environ.get("CAPSTONE_PROFILE", "cprofile").lower()
+PROFILE_TOP = 30
+
+
+def memory_usage_mb():
+    """(current RSS, peak RSS) of this process in MB; None where the platform doesn't say."""
+    try:
+        with open("/proc/self/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)
+        return info.rss / 1024 ** 2, peak / 1024 ** 2 if peak else None
+    except ImportError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        return None, peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None, None
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+
+
+class StepMetrics:
+    def __init__(self, script, metrics_file=METRICS_FILE):
+        self.script = script
+        self.metrics_file = metrics_file
+        self.run_id = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+        self.records = []
+        self.current = None
+        atexit.register(self.finish, quiet=True)
+
+    def step(self, name, rows=None, banner=True):
+        self.close()
+        if banner:
+            print(f"\n=== {name} ===")
+        _, peak_rss = memory_usage_mb()
+        self.current = {
+            "name": name,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+            "peak_rss_before": peak_rss,
+            "rows": None if rows is None else int(rows),
+            "profiler": None,
+            "tracing": False,
+        }
+        if PROFILE_STEP and PROFILE_STEP.lower() in name.lower():
+            self._start_profiling()
+
+    def rows(self, row_count):
+        if self.current is not None:
+            self.current["rows"] = int(row_count)
+
+    def close(self):
+        """End the current step (if any) and write its JSON line."""
+        step = self.current
+        if step is None:
+            return
+        self.current = None
+        wall = time.perf_counter() - step["wall"]
+        cpu = time.process_time() - step["cpu"]
+        traced_peak = self._stop_profiling(step)
+        rss, peak_rss = memory_usage_mb()
+
+        record = {
+            "script": self.script,
+            "run_id": self.run_id,
+            "step": step["name"],
+            "started": step["started"],
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rss_mb": None if rss is None else round(rss, 1),
+            "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+            "peak_rss_growth_mb": None if peak_rss is None or step["peak_rss_before"] is None
+            else round(peak_rss - step["peak_rss_before"], 1),
+            "rows": step["rows"],
+        }
+        if traced_peak is not None:
+            record["traced_peak_mb"] = round(traced_peak / 1024 ** 2, 1)
+        self.records.append(record)
+
+        os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+        with open(self.metrics_file, "a", encoding="utf-8") as metrics_out:
+            metrics_out.write(json.dumps(record) + "\n")
+
+    def finish(self, quiet=False):
+        self.close()
+        if quiet or not self.records:
+            return
+        print("\n=== Step Timings ===")
+        for record in self.records:
+            peak = "" if record["peak_rss_mb"] is None else f", peak RSS {record['peak_rss_mb']:,.0f} MB"
+            rows = "" if record["rows"] is None else f", {record['rows']:,} rows"
+            print(f" • {record['step']}: {record['wall_s']:.2f}s wall, {record['cpu_s']:.2f}s CPU{peak}{rows}")
+        print(f" - Metrics appended to: {self.metrics_file}")
+        self.records = []
+
+    # ------------------------ Opt-in profiling ------------------------ #
+    def _start_profiling(self):
+        if PROFILE_MODE in ("tracemalloc", "both"):
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.current["tracing"] = True
+        if PROFILE_MODE in ("cprofile", "both"):
+            self.current["profiler"] = cProfile.Profile()
+            self.current["profiler"].enable()
+
+    def _stop_profiling(self, step):
+        if step["profiler"] is None and not step["tracing"]:
+            return None
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base_path = os.path.join(PROFILE_DIR, f"{_slug(self.script)}-{_slug(step['name'])}-{self.run_id}")
+
+        if step["profiler"] is not None:
+            step["profiler"].disable()
+            step["profiler"].dump_stats(base_path + ".prof")
+            text = io.StringIO()
+            pstats.Stats(step["profiler"], stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            with open(base_path + ".cprofile.txt", "w", encoding="utf-8") as profile_out:
+                profile_out.write(text.getvalue())
+            print(f" - cProfile for '{step['name']}' written to: {base_path}.prof")
+
+        traced_peak = None
+        if step["tracing"]:
+            snapshot = tracemalloc.take_snapshot()
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(base_path + ".tracemalloc.txt", "w", encoding="utf-8") as trace_out:
+                trace_out.write(f"Peak traced memory: {traced_peak / 1024 ** 2:,.1f} MB\n\n")
+                for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+                    trace_out.write(f"{stat}\n")
+            print(f" - tracemalloc for '{step['name']}' written to: {base_path}.tracemalloc.txt")
+        return traced_peak
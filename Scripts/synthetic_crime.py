@@ -0,0 +1,425 @@
+# Synthetic LAPD-shaped crime data, for benchmarking the scripts at sizes past the real extract.
+#
+#   write_synthetic_csv(csv_path, rows=5_000_000, seed=0)      # or iterate generate_crime_chunks(...)
+#
+# Rows have the 28 RAW_COLUMNS of Data Dictionary.py and roughly the shape of the 2020-2024 extract:
+#   - AREA / AREA NAME pairs at each division's share of incidents; DR_NO = report year + area + serial,
+#   - Crm Cd / Crm Cd Desc pairs at their approximate frequencies, a few with no crime_category_mapping
+#     entry, and secondary codes (mostly 998) in Crm Cd 2-4,
+#   - Mocodes strings of 1-10 codes from Mo_Codes.csv, a few codes far more common than the rest,
+#   - LAT/LON inside the division's polygon in the LAPD Divisions GeoJSON (plus the extract's 0/0 points),
+#   - missing values at per-column rates and a share of repeated DR_NOs, some repeated across chunks.
+# Rows are made BLOCK_ROWS at a time with numpy, each block from a generator seeded by (seed, block
+# number), so a seed and row count always give the same file.
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from project_paths import PROJECT_DIR, CRIME_CSV, MO_CODES_CSV, DIVISIONS_GEOJSON
+from crime_cleaning import load_mo_code_mapping, crime_category_mapping
+from crime_schema import RAW_COLUMN_NAMES, RAW_DATE_FORMAT
+
+BLOCK_ROWS = 250_000
+POINTS_PER_AREA = 4_000
+MOCODES_PER_BLOCK = 40_000
+DUPLICATE_CARRYOVER = 2_000
+FIRST_DATE = '2020-01-01'
+LAST_DATE = '2024-12-31'
+
+# (AREA, AREA NAME, approximate % of incidents)
+AREAS = [
+    (1, 'Central', 6.9), (2, 'Rampart', 4.6), (3, 'Southwest', 5.6), (4, 'Hollenbeck', 3.6), (5, 'Harbor', 4.1),
+    (6, 'Hollywood', 5.3), (7, 'Wilshire', 4.7), (8, 'West LA', 4.5), (9, 'Van Nuys', 4.3), (10, 'West Valley', 4.2),
+    (11, 'Northeast', 4.3), (12, '77th Street', 6.3), (13, 'Newton', 4.9), (14, 'Pacific', 5.9),
+    (15, 'N Hollywood', 4.9), (16, 'Foothill', 3.3), (17, 'Devonshire', 4.0), (18, 'Southeast', 5.0),
+    (19, 'Mission', 3.9), (20, 'Olympic', 5.0), (21, 'Topanga', 4.1),
+]
+
+# (Crm Cd, Crm Cd Desc, approximate % of incidents)
+CRIME_TYPES = [
+    (510, 'VEHICLE - STOLEN', 11.3), (624, 'BATTERY - SIMPLE ASSAULT', 7.7), (354, 'THEFT OF IDENTITY', 6.4),
+    (330, 'BURGLARY FROM VEHICLE', 6.2), (740, 'VANDALISM - FELONY ($400 & OVER, ALL CHURCH VANDALISMS)', 6.1),
+    (310, 'BURGLARY', 5.9), (230, 'ASSAULT WITH DEADLY WEAPON, AGGRAVATED ASSAULT', 5.3),
+    (440, 'THEFT PLAIN - PETTY ($950 & UNDER)', 5.0), (626, 'INTIMATE PARTNER - SIMPLE ASSAULT', 4.7),
+    (420, 'THEFT FROM MOTOR VEHICLE - PETTY ($950 & UNDER)', 3.9),
+    (331, 'THEFT FROM MOTOR VEHICLE - GRAND ($950.01 AND OVER)', 3.5),
+    (341, 'THEFT-GRAND ($950.01 & OVER)EXCPT,GUNS,FOWL,LIVESTK,PROD', 3.3), (210, 'ROBBERY', 3.2),
+    (442, 'SHOPLIFTING - PETTY THEFT ($950 & UNDER)', 2.7), (745, 'VANDALISM - MISDEAMEANOR ($399 OR UNDER)', 2.6),
+    (930, 'CRIMINAL THREATS - NO WEAPON DISPLAYED', 2.1), (761, 'BRANDISH WEAPON', 1.5), (888, 'TRESPASSING', 1.4),
+    (236, 'INTIMATE PARTNER - AGGRAVATED ASSAULT', 1.3), (901, 'VIOLATION OF RESTRAINING ORDER', 1.2),
+    (900, 'VIOLATION OF COURT ORDER', 1.0), (946, 'OTHER MISCELLANEOUS CRIME', 0.9), (480, 'BIKE - STOLEN', 0.8),
+    (662, 'BUNCO, GRAND THEFT', 0.8), (343, 'SHOPLIFTING-GRAND THEFT ($950.01 & OVER)', 0.8),
+    (668, 'EMBEZZLEMENT, GRAND THEFT ($950.01 & OVER)', 0.6), (320, 'BURGLARY, ATTEMPTED', 0.6),
+    (350, 'THEFT, PERSON', 0.6), (649, 'DOCUMENT FORGERY / STOLEN FELONY', 0.5), (625, 'OTHER ASSAULT', 0.5),
+    (220, 'ATTEMPTED ROBBERY', 0.5), (121, 'RAPE, FORCIBLE', 0.4), (860, 'BATTERY WITH SEXUAL CONTACT', 0.4),
+    (653, 'CREDIT CARDS, FRAUD USE ($950.01 & OVER)', 0.3), (654, 'CREDIT CARDS, FRAUD USE ($950 & UNDER', 0.3),
+    (886, 'DISTURBING THE PEACE', 0.3), (753, 'DISCHARGE FIREARMS/SHOTS FIRED', 0.3),
+    (928, 'THREATENING PHONE CALLS/LETTERS', 0.3), (763, 'STALKING', 0.2), (623, 'BATTERY POLICE (SIMPLE)', 0.2),
+    (251, 'SHOTS FIRED AT INHABITED DWELLING', 0.2), (237, 'CHILD NEGLECT (SEE 300 W.I.C.)', 0.2),
+    (627, 'CHILD ABUSE (PHYSICAL) - SIMPLE ASSAULT', 0.2), (850, 'INDECENT EXPOSURE', 0.2),
+    (812, 'CRM AGNST CHLD (13 OR UNDER) (14-15 & SUSP 10 YRS OLDER)', 0.2),
+    (845, 'SEX OFFENDER REGISTRANT OUT OF COMPLIANCE', 0.2), (664, 'BUNCO, PETTY THEFT', 0.2), (940, 'EXTORTION', 0.2),
+    (520, 'VEHICLE - ATTEMPT STOLEN', 0.2), (410, 'BURGLARY FROM VEHICLE, ATTEMPTED', 0.2), (648, 'ARSON', 0.2),
+    (815, 'SEXUAL PENETRATION W/FOREIGN OBJECT', 0.1), (110, 'CRIMINAL HOMICIDE', 0.1), (910, 'KIDNAPPING', 0.1),
+    (231, 'ASSAULT WITH DEADLY WEAPON ON POLICE OFFICER', 0.1),
+    (235, 'CHILD ABUSE (PHYSICAL) - AGGRAVATED ASSAULT', 0.1), (762, 'LEWD CONDUCT', 0.1),
+    (813, 'CHILD ANNOYING (17YRS & UNDER)', 0.1), (760, 'LEWD/LASCIVIOUS ACTS WITH CHILD', 0.1),
+    (352, 'PICKPOCKET', 0.1), (956, 'LETTERS, LEWD  -  TELEPHONE CALLS, LEWD', 0.1), (943, 'CRUELTY TO ANIMALS', 0.05),
+    (441, 'THEFT PLAIN - ATTEMPT', 0.05), (421, 'THEFT FROM MOTOR VEHICLE - ATTEMPT', 0.05),
+    (661, 'UNAUTHORIZED COMPUTER ACCESS', 0.05), (670, 'EMBEZZLEMENT, PETTY THEFT ($950 & UNDER)', 0.05),
+    (647, 'THROWING OBJECT AT MOVING VEHICLE', 0.05), (250, 'SHOTS FIRED AT MOVING VEHICLE, TRAIN OR AIRCRAFT', 0.05),
+    (902, 'VIOLATION OF TEMPORARY RESTRAINING ORDER', 0.05),
+    (821, 'SODOMY/SEXUAL CONTACT B/W PENIS OF ONE PERS TO ANUS OTH', 0.04),
+    (950, 'DEFRAUDING INNKEEPER/THEFT OF SERVICES, $950 & UNDER', 0.04), (122, 'RAPE, ATTEMPTED', 0.03),
+    (820, 'ORAL COPULATION', 0.03), (810, 'SEX,UNLAWFUL(INC MUTUAL CONSENT, PENETRATION W/ FRGN OBJ', 0.03),
+    (351, 'PURSE SNATCHING', 0.03), (443, 'SHOPLIFTING - ATTEMPT', 0.03),
+    (345, 'DISHONEST EMPLOYEE - GRAND THEFT', 0.03),
+    (903, 'CONTEMPT OF COURT', 0.03), (622, 'BATTERY ON A FIREFIGHTER', 0.02), (666, 'BUNCO, ATTEMPT', 0.02),
+    (660, 'COUNTERFEIT', 0.02), (651, 'DOCUMENT WORTHLESS ($200.01 & OVER)', 0.02),
+    (444, 'DISHONEST EMPLOYEE - PETTY THEFT', 0.02), (756, 'WEAPONS POSSESSION/BOMBING', 0.02),
+    (932, 'PEEPING TOM', 0.02), (922, 'CHILD STEALING', 0.02), (814, 'CHILD PORNOGRAPHY', 0.02),
+    (652, 'DOCUMENT WORTHLESS ($200 & UNDER)', 0.01),
+    (951, 'DEFRAUDING INNKEEPER/THEFT OF SERVICES, OVER $950.01', 0.01),
+    (347, 'GRAND THEFT / INSURANCE FRAUD', 0.01), (949, 'ILLEGAL DUMPING', 0.01), (890, 'FAILURE TO YIELD', 0.01),
+    (933, 'PROWLER', 0.01), (880, 'DISRUPT SCHOOL', 0.01),
+    (904, 'FIREARMS EMERGENCY PROTECTIVE ORDER (FIREARMS EPO)', 0.01),
+    (906, 'FIREARMS RESTRAINING ORDER (FIREARMS RO)', 0.01), (920, 'KIDNAPPING - GRAND ATTEMPT', 0.01),
+    (870, 'CHILD ABANDONMENT', 0.01), (806, 'PANDERING', 0.01), (805, 'PIMPING', 0.01),
+    (822, 'HUMAN TRAFFICKING - COMMERCIAL SEX ACTS', 0.01), (485, 'BIKE - ATTEMPTED STOLEN', 0.01),
+    (433, 'DRIVING WITHOUT OWNER CONSENT (DWOC)', 0.01), (434, 'FALSE IMPRISONMENT', 0.01),
+    (437, 'RESISTING ARREST', 0.01), (830, 'INCEST (SEXUAL ACTS BETWEEN BLOOD RELATIVES)', 0.005),
+    (921, 'HUMAN TRAFFICKING - INVOLUNTARY SERVITUDE', 0.005), (944, 'CONSPIRACY', 0.005),
+    (954, 'CONTRIBUTING', 0.005), (487, 'BOAT - STOLEN', 0.005), (471, 'TILL TAP - PETTY ($950 & UNDER)', 0.005),
+    (474, 'THEFT, COIN MACHINE - PETTY ($950 & UNDER)', 0.005), (942, 'BRIBERY', 0.002), (948, 'BIGAMY', 0.002),
+    (865, 'DRUGS, TO A MINOR', 0.002), (931, 'REPLICA FIREARMS(SALE,DISPLAY,MANUFACTURE OR DISTRIBUTE)', 0.002),
+    (353, 'DRUNK ROLL', 0.002), (470, 'TILL TAP - GRAND THEFT ($950.01 & OVER)', 0.002),
+    (473, 'THEFT, COIN MACHINE - GRAND ($950.01 & OVER)', 0.002), (475, 'THEFT, COIN MACHINE - ATTEMPT', 0.002),
+    (452, 'PICKPOCKET, ATTEMPT', 0.002), (451, 'PURSE SNATCHING - ATTEMPT', 0.002), (926, 'TRAIN WRECKING', 0.001),
+    (840, 'BEASTIALITY, CRIME AGAINST NATURE SEXUAL ASSLT WITH ANIM', 0.001), (884, 'FAILURE TO DISPERSE', 0.001),
+]
+NO_SECONDARY_CODE = 998
+# Crimes with no individual victim: Vict Age 0, no sex or descent
+VICTIMLESS_CODES = [510, 520, 433, 487, 740, 745, 949]
+# Chance that a weapon is recorded, by crime category
+WEAPON_RATES = {'Violent Crime': 0.85, 'Sexual Offense': 0.35, 'Public Order Crime': 0.3}
+OTHER_WEAPON_RATE = 0.03
+
+PREMISES = [
+    (101, 'STREET', 25), (501, 'SINGLE FAMILY DWELLING', 17), (502, 'MULTI-UNIT DWELLING (APARTMENT, DUPLEX, ETC)', 12),
+    (108, 'PARKING LOT', 7), (102, 'SIDEWALK', 4), (203, 'OTHER BUSINESS', 4), (122, 'VEHICLE, PASSENGER/TRUCK', 3),
+    (210, 'RESTAURANT/FAST FOOD', 2), (404, 'DEPARTMENT STORE', 1.5), (707, 'GARAGE/CARPORT', 1.3),
+    (503, 'HOTEL', 1), (121, 'YARD (RESIDENTIAL/BUSINESS)', 1), (726, 'POLICE FACILITY', 1),
+    (405, 'CLOTHING STORE', 0.9), (123, 'PARKING UNDERGROUND/BUILDING', 0.9), (103, 'ALLEY', 0.8),
+    (504, 'OTHER RESIDENCE', 0.8), (207, 'BAR/LOUNGE/NIGHTCLUB', 0.5), (104, 'DRIVEWAY', 0.5),
+    (402, 'MARKET', 0.5), (719, 'MTA BUS', 0.3),
+]
+WEAPONS = [
+    (400, 'STRONG-ARM (HANDS, FIST, FEET OR BODILY FORCE)', 55), (500, 'UNKNOWN WEAPON/OTHER WEAPON', 10),
+    (511, 'VERBAL THREAT', 7), (102, 'HAND GUN', 6), (109, 'SEMI-AUTOMATIC PISTOL', 2.5),
+    (200, 'KNIFE WITH BLADE 6INCHES OR LESS', 2), (207, 'OTHER KNIFE', 1.5), (106, 'UNKNOWN FIREARM', 1.5),
+    (307, 'VEHICLE', 1), (308, 'STICK', 0.8), (512, 'MACE/PEPPER SPRAY', 0.7), (204, 'FOLDING KNIFE', 0.6),
+    (312, 'PIPE/METAL PIPE', 0.5), (216, 'UNKNOWN TYPE CUTTING INSTRUMENT', 0.5), (304, 'CLUB/BAT', 0.5),
+    (101, 'REVOLVER', 0.3), (113, 'SIMULATED GUN', 0.3),
+]
+STATUSES = [('IC', 'Invest Cont', 78), ('AO', 'Adult Other', 11), ('AA', 'Adult Arrest', 9.3),
+            ('JA', 'Juv Arrest', 0.4), ('JO', 'Juv Other', 0.3)]
+VICT_SEXES = [('M', 48), ('F', 43), ('X', 9), ('H', 0.01)]
+VICT_DESCENTS = [('H', 36), ('W', 24), ('B', 17), ('X', 10), ('O', 9), ('A', 2.5), ('K', 0.6), ('F', 0.5),
+                 ('C', 0.5), ('J', 0.2), ('V', 0.1), ('I', 0.1), ('Z', 0.1), ('P', 0.05), ('U', 0.02),
+                 ('G', 0.01), ('S', 0.01), ('L', 0.01), ('D', 0.01), ('-', 0.001)]
+# Share of incidents per hour of TIME OCC (noon is over-reported, as in the extract)
+HOUR_WEIGHTS = [3.2, 2.3, 2.0, 1.6, 1.3, 1.1, 1.6, 2.1, 3.1, 3.4, 3.6, 3.7,
+                7.5, 4.5, 4.6, 4.9, 4.9, 5.2, 5.6, 5.2, 5.0, 4.6, 4.2, 3.7]
+STREETS = ['MAIN ST', 'BROADWAY', 'FIGUEROA ST', 'VERMONT AV', 'WESTERN AV', 'SUNSET BL', 'HOLLYWOOD BL',
+           'WILSHIRE BL', 'OLYMPIC BL', 'PICO BL', 'VENICE BL', 'SANTA MONICA BL', 'CRENSHAW BL', 'LA BREA AV',
+           'FAIRFAX AV', 'SEPULVEDA BL', 'VAN NUYS BL', 'VENTURA BL', 'SHERMAN WY', 'VICTORY BL', 'ROSCOE BL',
+           'RESEDA BL', 'TOPANGA CANYON BL', 'GAFFEY ST', 'PACIFIC AV', 'CESAR E CHAVEZ AV', 'SOTO ST',
+           'FLORENCE AV', 'MANCHESTER AV', 'CENTURY BL', 'SLAUSON AV', 'JEFFERSON BL', 'ADAMS BL', '7TH ST',
+           '6TH ST', '3RD ST', 'ALAMEDA ST', 'CENTRAL AV', 'HOOVER ST', 'NORMANDIE AV']
+
+# Chance that a value is missing, on top of the structural gaps (no weapon, no victim, ...)
+MISSING_RATES = {'Mocodes': 0.14, 'Cross Street': 0.85, 'Premis Desc': 0.0005, 'Premis Cd': 0.00002,
+                 'Vict Sex': 0.01, 'Vict Descent': 0.01}
+ZERO_LOCATION_RATE = 0.002
+SECONDARY_CODE_RATES = {'Crm Cd 2': 0.07, 'Crm Cd 3': 0.0025, 'Crm Cd 4': 0.00007}
+# Share of secondary codes that are 998 rather than a real crime code
+NO_SECONDARY_SHARE = 0.6
+FIRST_OF_MONTH_RATE = 0.03
+SAME_DAY_REPORT_RATE = 0.45
+
+
+def _weights(table):
+    weights = np.array([row[-1] for row in table], dtype='float64')
+    return weights / weights.sum()
+
+
+def _division_rings(divisions_path):
+    """{AREA code: list of (n, 2) lon/lat rings} from the LAPD Divisions GeoJSON (PREC is the AREA code)."""
+    with open(divisions_path, encoding='utf-8') as geojson_file:
+        features = json.load(geojson_file)['features']
+    rings = {}
+    for feature in features:
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        rings[int(feature['properties']['PREC'])] = [np.asarray(ring, dtype='float64')[:, :2]
+                                                      for polygon in polygons for ring in polygon]
+    return rings
+
+
+def _inside_rings(lon, lat, rings):
+    # Even-odd ray casting, so holes and multi-part divisions come out right
+    inside = np.zeros(len(lon), dtype=bool)
+    for ring in rings:
+        x1, y1, x2, y2 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+        for start in range(0, len(lon), 1000):
+            px, py = lon[start:start + 1000, None], lat[start:start + 1000, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crosses = ((y1 > py) != (y2 > py)) & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+            inside[start:start + 1000] ^= crosses.sum(axis=1) % 2 == 1
+    return inside
+
+
+def _division_points(rings, count, rng):
+    """count random LAT/LON points (4 decimals, like the extract) inside one division."""
+    corners = np.concatenate(rings)
+    (lon_min, lat_min), (lon_max, lat_max) = corners.min(axis=0), corners.max(axis=0)
+    lon_found, lat_found = [], []
+    found = 0
+    while found < count:
+        lon = rng.uniform(lon_min, lon_max, count * 2)
+        lat = rng.uniform(lat_min, lat_max, count * 2)
+        inside = _inside_rings(lon, lat, rings)
+        lon_found.append(lon[inside])
+        lat_found.append(lat[inside])
+        found += inside.sum()
+    return np.concatenate(lat_found)[:count].round(4), np.concatenate(lon_found)[:count].round(4)
+
+
+class _Reference:
+    # Lookup tables shared by every block: MO code popularity and each division's points and addresses
+    def __init__(self, seed, mo_codes_path, divisions_path):
+        rng = np.random.default_rng([seed, 0xC0DE])
+        self.mo_codes = np.array(sorted(load_mo_code_mapping(mo_codes_path)), dtype=object)
+        popularity = 1.0 / (rng.permutation(len(self.mo_codes)) + 5.0)
+        self.mo_weights = popularity / popularity.sum()
+
+        rings = _division_rings(divisions_path)
+        self.area_codes = np.array([code for code, _, _ in AREAS])
+        self.area_names = np.array([name for _, name, _ in AREAS], dtype=object)
+        self.area_weights = _weights(AREAS)
+        lats, lons, locations = [], [], []
+        for code in self.area_codes:
+            lat, lon = _division_points(rings[code], POINTS_PER_AREA, rng)
+            numbers = rng.integers(1, 200, POINTS_PER_AREA) * 100
+            streets = np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), POINTS_PER_AREA)]
+            lats.append(lat)
+            lons.append(lon)
+            locations.append(pd.Series(numbers.astype(str), dtype=object) + ' ' + streets)
+        self.lat = np.stack(lats)
+        self.lon = np.stack(lons)
+        self.locations = np.stack([location.to_numpy() for location in locations])
+
+        self.crime_codes = np.array([code for code, _, _ in CRIME_TYPES])
+        self.crime_descs = np.array([desc for _, desc, _ in CRIME_TYPES], dtype=object)
+        self.crime_weights = _weights(CRIME_TYPES)
+        categories = pd.Series(self.crime_descs).map(crime_category_mapping)
+        self.weapon_rates = categories.map(WEAPON_RATES).fillna(OTHER_WEAPON_RATE).to_numpy()
+        self.victimless = np.isin(self.crime_codes, VICTIMLESS_CODES)
+
+        self.days = pd.date_range(FIRST_DATE, pd.Timestamp(LAST_DATE) + pd.Timedelta(days=400))
+        self.day_strings = np.array(self.days.strftime(RAW_DATE_FORMAT), dtype=object)
+        self.occ_days = (pd.Timestamp(LAST_DATE) - pd.Timestamp(FIRST_DATE)).days + 1
+
+
+def _pick(table, rng, size, column=0):
+    values = np.array([row[column] for row in table], dtype=object)
+    return values[rng.choice(len(table), size, p=_weights(table))]
+
+
+def _with_missing(values, rate, rng):
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < rate] = None
+    return values
+
+
+def _mocodes(ref, rng, size):
+    # Mocodes strings are drawn from a pool built per block, like the repeated combinations in the extract
+    pool_size = min(size, MOCODES_PER_BLOCK)
+    counts = np.minimum(rng.geometric(0.35, pool_size), 10)
+    codes = ref.mo_codes[rng.choice(len(ref.mo_codes), counts.sum(), p=ref.mo_weights)]
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    pool = np.array([" ".join(codes[start:stop]) for start, stop in zip(bounds[:-1], bounds[1:])], dtype=object)
+    return _with_missing(pool[rng.integers(0, pool_size, size)], MISSING_RATES['Mocodes'], rng)
+
+
+def _secondary_codes(ref, rng, size, rate):
+    codes = pd.array(np.full(size, NO_SECONDARY_CODE), dtype='Int16')
+    present = rng.random(size) < rate
+    real = present & (rng.random(size) >= NO_SECONDARY_SHARE)
+    codes[real] = ref.crime_codes[rng.choice(len(ref.crime_codes), real.sum(), p=ref.crime_weights)]
+    codes[~present] = pd.NA
+    return codes
+
+
+def _unique_block(ref, rng, size, serials, serial_digits):
+    """size new incidents. serials counts DR_NOs used so far per (report year, AREA) and is updated."""
+    area_index = rng.choice(len(ref.area_codes), size, p=ref.area_weights)
+    area = ref.area_codes[area_index]
+    crime = rng.choice(len(ref.crime_codes), size, p=ref.crime_weights)
+    crm_cd = ref.crime_codes[crime]
+
+    # Dates: uniform over the period with a bump on the 1st of the month; most are reported within days
+    occ = rng.integers(0, ref.occ_days, size)
+    first_of_month = rng.random(size) < FIRST_OF_MONTH_RATE
+    occ[first_of_month] -= ref.days[occ[first_of_month]].day.to_numpy() - 1
+    lag = np.where(rng.random(size) < SAME_DAY_REPORT_RATE, 0, rng.geometric(0.12, size) - 1)
+    rptd = occ + np.minimum(lag, len(ref.days) - 1 - ref.occ_days)
+
+    # DR_NO: 2-digit report year, 2-digit area, then a serial number within that year and area
+    year = ref.days[rptd].year.to_numpy() % 100
+    group = year * 100 + area
+    order = np.argsort(group, kind='stable')
+    sorted_groups = group[order]
+    group_start = np.searchsorted(sorted_groups, sorted_groups)
+    serial = np.empty(size, dtype='int64')
+    serial[order] = serials[sorted_groups] + np.arange(size) - group_start + 1
+    np.add.at(serials, group, 1)
+    if serials.max() >= 10 ** serial_digits:
+        raise ValueError(f"More than {10 ** serial_digits - 1:,} incidents for one year and area")
+    dr_no = group.astype('int64') * 10 ** serial_digits + serial
+
+    hour = rng.choice(24, size, p=np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS))
+    minute = np.where(rng.random(size) < 0.35, 0, rng.integers(0, 60, size))
+
+    victimless = ref.victimless[crime]
+    vict_age = np.clip(rng.normal(39, 16, size).round(), 2, 99).astype('int16')
+    vict_age[rng.random(size) < 0.05] = 0
+    negative = rng.random(size) < 0.0005
+    vict_age[negative] = -rng.integers(1, 5, negative.sum())
+    vict_age[victimless] = 0
+    vict_sex = _with_missing(_pick(VICT_SEXES, rng, size), MISSING_RATES['Vict Sex'], rng)
+    vict_descent = _with_missing(_pick(VICT_DESCENTS, rng, size), MISSING_RATES['Vict Descent'], rng)
+    vict_sex[victimless] = None
+    vict_descent[victimless] = None
+
+    premis = rng.choice(len(PREMISES), size, p=_weights(PREMISES))
+    premis_cd = pd.array(np.array([row[0] for row in PREMISES])[premis], dtype='Int16')
+    premis_cd[rng.random(size) < MISSING_RATES['Premis Cd']] = pd.NA
+    premis_desc = _with_missing(np.array([row[1] for row in PREMISES], dtype=object)[premis],
+                                MISSING_RATES['Premis Desc'], rng)
+
+    armed = rng.random(size) < ref.weapon_rates[crime]
+    weapon = rng.choice(len(WEAPONS), size, p=_weights(WEAPONS))
+    weapon_cd = pd.array(np.array([row[0] for row in WEAPONS])[weapon], dtype='Int16')
+    weapon_cd[~armed] = pd.NA
+    weapon_desc = np.array([row[1] for row in WEAPONS], dtype=object)[weapon]
+    weapon_desc[~armed] = None
+
+    status = rng.choice(len(STATUSES), size, p=_weights(STATUSES))
+    point = rng.integers(0, POINTS_PER_AREA, size)
+    lat, lon = ref.lat[area_index, point], ref.lon[area_index, point]
+    zero = rng.random(size) < ZERO_LOCATION_RATE
+    lat[zero] = 0.0
+    lon[zero] = 0.0
+
+    return pd.DataFrame({
+        'DR_NO': dr_no,
+        'Date Rptd': ref.day_strings[rptd],
+        'DATE OCC': ref.day_strings[occ],
+        'TIME OCC': (hour * 100 + minute).astype('int16'),
+        'AREA': area,
+        'AREA NAME': ref.area_names[area_index],
+        'Rpt Dist No': area * 100 + rng.integers(1, 100, size),
+        'Part 1-2': np.where(crm_cd < 600, 1, 2),
+        'Crm Cd': crm_cd,
+        'Crm Cd Desc': ref.crime_descs[crime],
+        'Mocodes': _mocodes(ref, rng, size),
+        'Vict Age': vict_age,
+        'Vict Sex': vict_sex,
+        'Vict Descent': vict_descent,
+        'Premis Cd': premis_cd,
+        'Premis Desc': premis_desc,
+        'Weapon Used Cd': weapon_cd,
+        'Weapon Desc': weapon_desc,
+        'Status': np.array([row[0] for row in STATUSES], dtype=object)[status],
+        'Status Desc': np.array([row[1] for row in STATUSES], dtype=object)[status],
+        'Crm Cd 1': crm_cd,
+        'Crm Cd 2': _secondary_codes(ref, rng, size, SECONDARY_CODE_RATES['Crm Cd 2']),
+        'Crm Cd 3': _secondary_codes(ref, rng, size, SECONDARY_CODE_RATES['Crm Cd 3']),
+        'Crm Cd 4': _secondary_codes(ref, rng, size, SECONDARY_CODE_RATES['Crm Cd 4']),
+        'LOCATION': ref.locations[area_index, point],
+        'Cross Street': _with_missing(np.array(STREETS, dtype=object)[rng.integers(0, len(STREETS), size)],
+                                      MISSING_RATES['Cross Street'], rng),
+        'LAT': lat,
+        'LON': lon,
+    }, columns=RAW_COLUMN_NAMES)
+
+
+def generate_crime_chunks(rows, seed=0, duplicate_rate=0.005, mo_codes_path=MO_CODES_CSV,
+                          divisions_path=DIVISIONS_GEOJSON):
+    """Yield DataFrames of up to BLOCK_ROWS raw-CSV-shaped rows, rows in total (duplicates included).
+
+    duplicate_rate of the rows repeat an earlier DR_NO, about half of them from the previous block.
+    """
+    ref = _Reference(seed, mo_codes_path, divisions_path)
+    serials = np.zeros(100 * 100, dtype='int64')
+    # 5-digit serials like the extract, with room to spare for the busiest area in a year
+    years = (pd.Timestamp(LAST_DATE).year - pd.Timestamp(FIRST_DATE).year) + 1
+    serial_digits = max(5, len(str(int(rows * ref.area_weights.max() / years * 2))))
+    carryover = None
+    for block_number, start in enumerate(range(0, rows, BLOCK_ROWS), start=1):
+        rng = np.random.default_rng([seed, block_number])
+        size = min(BLOCK_ROWS, rows - start)
+        duplicates = min(rng.binomial(size, duplicate_rate), size - 1)
+        block = _unique_block(ref, rng, size - duplicates, serials, serial_digits)
+
+        if duplicates:
+            sources = [block] if carryover is None else [block, carryover]
+            source = pd.concat(sources, ignore_index=True)
+            repeated = source.iloc[rng.integers(0, len(source), duplicates)]
+            block = pd.concat([block, repeated], ignore_index=True)
+            block = block.iloc[rng.permutation(len(block))].reset_index(drop=True)
+        carryover = block.iloc[rng.integers(0, len(block), min(DUPLICATE_CARRYOVER, len(block)))]
+        yield block
+
+
+def write_synthetic_csv(csv_path, rows, seed=0, duplicate_rate=0.005, mo_codes_path=MO_CODES_CSV,
+                        divisions_path=DIVISIONS_GEOJSON, progress=None):
+    """Write rows synthetic incidents to csv_path (same layout as the LAPD extract). Returns the row count."""
+    written = 0
+    with pa.OSFile(csv_path, 'wb') as csv_file:
+        for block in generate_crime_chunks(rows, seed, duplicate_rate, mo_codes_path, divisions_path):
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            pa_csv.write_csv(table, csv_file, pa_csv.WriteOptions(include_header=written == 0))
+            written += len(block)
+            if progress is not None:
+                progress(written)
+    return written
+
+
+def project_layout(project_dir):
+    """Where CRIME_CSV, MO_CODES_CSV and DIVISIONS_GEOJSON go in project_dir (same layout as PROJECT_DIR)."""
+    return {path: os.path.join(project_dir, os.path.relpath(path, PROJECT_DIR))
+            for path in [CRIME_CSV, MO_CODES_CSV, DIVISIONS_GEOJSON]}
+
+
+def copy_reference_files(project_dir):
+    """Copy the MO codes and LAPD Divisions files into project_dir; returns the crime CSV path there."""
+    layout = project_layout(project_dir)
+    for source in [MO_CODES_CSV, DIVISIONS_GEOJSON]:
+        os.makedirs(os.path.dirname(layout[source]), exist_ok=True)
+        shutil.copyfile(source, layout[source])
+    os.makedirs(os.path.dirname(layout[CRIME_CSV]), exist_ok=True)
+    return layout[CRIME_CSV]
+
+
+def write_synthetic_project(project_dir, rows, seed=0, duplicate_rate=0.005, progress=None):
+    """A project folder CAPSTONE_PROJECT_DIR can point at: a synthetic crime CSV plus the reference files."""
+    csv_path = copy_reference_files(project_dir)
+    write_synthetic_csv(csv_path, rows, seed, duplicate_rate, progress=progress)
+    return csv_path
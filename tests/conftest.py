@@ -0,0 +1,5 @@
+# The Scripts folder is run as scripts, not installed: its modules import each other by plain name
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts"))
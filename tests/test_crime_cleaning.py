@@ -0,0 +1,45 @@
+import ast
+import collections
+import inspect
+
+import pandas as pd
+
+import crime_cleaning
+
+
+def _literal_dict_keys(module, name):
+    # Keys as written in the source: a dict literal silently keeps only the last of any repeated key
+    for node in ast.walk(ast.parse(inspect.getsource(module))):
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == name for target in node.targets):
+            return [ast.literal_eval(key) for key in node.value.keys]
+    raise AssertionError(f"{name} is not assigned in {module.__name__}")
+
+
+def test_crime_category_mapping_has_one_entry_per_description():
+    keys = _literal_dict_keys(crime_cleaning, "crime_category_mapping")
+    repeated = [key for key, count in collections.Counter(keys).items() if count > 1]
+    assert repeated == []
+    assert len(keys) == len(crime_cleaning.crime_category_mapping)
+
+
+def test_crime_category_mapping_uses_known_categories():
+    assert set(crime_cleaning.crime_category_mapping.values()) <= set(crime_cleaning.CRIME_CATEGORIES)
+
+
+
+def test_codes_seen_with_descriptions_in_different_categories_use_each_rows_description():
+    violent, sexual, aggravated = "BATTERY - SIMPLE ASSAULT", "RAPE, FORCIBLE", "INTIMATE PARTNER - AGGRAVATED ASSAULT"
+    pairs = [("624", violent), ("624", sexual), ("230", violent), ("230", aggravated)]
+    for order in (pairs, pairs[::-1]):
+        crime_df = pd.DataFrame({'Crm Cd': [code for code, _ in order], 'Crm Cd Desc': [desc for _, desc in order],
+                                 'Crm Cd 1': [code for code, _ in order]})
+        code_lookup, _ = crime_cleaning.compile_crime_code_lookup(crime_cleaning.crime_code_pairs(crime_df))
+        crime_df = crime_cleaning.map_crime_categories(crime_df, code_lookup)
+
+        categories = crime_df['Crm Cd Desc'].map(crime_cleaning.crime_category_mapping)
+        assert crime_df['Crime_Category'].tolist() == categories.tolist()
+        assert code_lookup[624] == crime_cleaning.AMBIGUOUS_CODE
+        assert code_lookup[230] == crime_cleaning.CRIME_CATEGORIES.index("Violent Crime")
+        # An ambiguous code in Crm Cd 1 adds no bit: only the row's own category is in its mask
+        bits = categories.map(lambda category: 1 << crime_cleaning.CRIME_CATEGORIES.index(category))
+        assert crime_df['Crime_Category_Mask'].tolist() == bits.tolist()
@@ -0,0 +1,35 @@
+import glob
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from crime_dataset import merge_into_crime_dataset, write_crime_dataset
+from crime_schema import CRIME_DESCRIPTIONS, apply_output_schema
+
+
+def _incidents(dr_nos, areas, premises, descriptions):
+    return apply_output_schema(pd.DataFrame({
+        'DR_NO': [str(dr_no) for dr_no in dr_nos],
+        'DATE OCC': ['01/15/2024'] * len(dr_nos),
+        'AREA': [str(area) for area in areas],
+        'Premis Desc': premises,
+        'Crm Cd Desc': descriptions,
+    }))
+
+
+def test_incremental_merge_keeps_one_set_of_categories_across_partitions(tmp_path):
+    dataset_dir = str(tmp_path / "crime_dataset")
+    write_crime_dataset(_incidents([1, 2, 3], [1, 2, 3], ['STREET', 'PARKING LOT', 'STREET'],
+                                   CRIME_DESCRIPTIONS[:3]), dataset_dir)
+
+    # A changed record in area 1 and a new one in area 2, with a premise and a description the dataset hasn't seen
+    delta = _incidents([1, 4], [1, 2], ['ALLEY', 'STREET'], ['NEW CRIME CODE', CRIME_DESCRIPTIONS[0]])
+    rewritten = merge_into_crime_dataset(delta, [(2024, '1')], dataset_dir)
+
+    files = sorted(glob.glob(f"{dataset_dir}/*/*/*.parquet"))
+    dtypes = [pq.read_table(path, partitioning=None).to_pandas()[['Premis Desc', 'Crm Cd Desc']].dtypes
+              for path in files]
+    assert rewritten == 3  # area 3 only gains the new categories
+    for found in dtypes:
+        assert list(found['Premis Desc'].categories) == ['ALLEY', 'PARKING LOT', 'STREET']
+        assert list(found['Crm Cd Desc'].categories) == CRIME_DESCRIPTIONS + ['NEW CRIME CODE']
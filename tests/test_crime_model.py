@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from crime_model import ModelBundle, add_trees, training_class_weight
+
+CLASSES = ["Other", "Property Crime", "Violent Crime"]
+FEATURES = ["a", "b", "c", "d"]
+
+
+def _per_class_weights(tree, y):
+    # Weight per training row of each class, from the root node's weighted class totals (no bootstrap)
+    totals = tree.tree_.value[0, 0] * tree.tree_.weighted_n_node_samples[0] / tree.tree_.value[0, 0].sum()
+    return totals / np.bincount(y, minlength=len(totals))
+
+
+@pytest.mark.parametrize("class_weight", ["balanced", "balanced_subsample"])
+def test_added_trees_keep_the_training_class_weights(class_weight):
+    rng = np.random.default_rng(0)
+    y_train = np.repeat([0, 1, 2], [600, 300, 100])
+    X_train = rng.normal(size=(len(y_train), 4)) + y_train[:, None]
+    forest = RandomForestClassifier(n_estimators=5, max_depth=2, bootstrap=False, class_weight=class_weight,
+                                    random_state=0).fit(X_train, y_train)
+    shares = np.bincount(y_train) / len(y_train)
+    bundle = ModelBundle(forest, FEATURES, CLASSES, dense_columns=FEATURES,
+                         info={"class_shares": dict(zip(CLASSES, shares.tolist()))})
+
+    # A month with a very different category mix
+    y_month = np.repeat([0, 1, 2], [20, 40, 140])
+    X_month = rng.normal(size=(len(y_month), 4)) + y_month[:, None]
+    add_trees(bundle, X_month, y_month, trees=3)
+
+    original = _per_class_weights(forest.estimators_[0], y_train)
+    added = _per_class_weights(forest.estimators_[-1], y_month)
+    np.testing.assert_allclose(added, original)
+    assert len(forest.estimators_) == 8
+    assert forest.class_weight == class_weight
+
+
+def test_training_class_weight_matches_balanced():
+    bundle = ModelBundle(RandomForestClassifier(class_weight="balanced"), FEATURES, CLASSES, dense_columns=FEATURES,
+                         info={"class_shares": {"Other": 0.6, "Property Crime": 0.3, "Violent Crime": 0.1}})
+    weights = training_class_weight(bundle)
+    np.testing.assert_allclose([weights[code] for code in range(3)], [1 / 1.8, 1 / 0.9, 1 / 0.3])
+
+
+def test_training_class_weight_needs_class_shares():
+    bundle = ModelBundle(RandomForestClassifier(class_weight="balanced"), FEATURES, CLASSES, dense_columns=FEATURES)
+    with pytest.raises(ValueError):
+        training_class_weight(bundle)
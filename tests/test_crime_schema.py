@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from crime_schema import CRIME_DESCRIPTIONS, apply_output_schema
+
+
+def _descriptions(values):
+    return pd.DataFrame({"Crm Cd Desc": pd.Series(values, dtype=object)})
+
+
+def test_chunks_get_the_same_crime_description_categories_as_the_whole_frame():
+    rng = np.random.default_rng(0)
+    values = rng.choice(CRIME_DESCRIPTIONS[:40] + ["Unknown", "NEW CRIME CODE"], size=1_000).tolist()
+    whole = apply_output_schema(_descriptions(values), crime_descriptions=["NEW CRIME CODE"])
+    chunks = [apply_output_schema(_descriptions(values[start:start + 100]), crime_descriptions=["NEW CRIME CODE"])
+              for start in range(0, len(values), 100)]
+
+    for chunk in chunks:
+        assert list(chunk["Crm Cd Desc"].cat.categories) == list(whole["Crm Cd Desc"].cat.categories)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), whole)
+
+
+def test_descriptions_without_a_mapping_are_kept():
+    typed = apply_output_schema(_descriptions(["NEW CRIME CODE", CRIME_DESCRIPTIONS[0], "Unknown"]))
+    assert typed["Crm Cd Desc"].tolist()[:2] == ["NEW CRIME CODE", CRIME_DESCRIPTIONS[0]]
+    assert typed["Crm Cd Desc"].isna().tolist() == [False, False, True]
+    assert list(typed["Crm Cd Desc"].cat.categories) == CRIME_DESCRIPTIONS + ["NEW CRIME CODE"]
@@ -0,0 +1,64 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from crime_model import MODEL_FEATURES, ModelBundle, clean_incidents, make_feature_encoder
+from crime_service import start_prediction_server
+
+MO_CODES = {"0344": "Removes vict property", "1822": "Stranger", "0416": "Hit-Hit w/ weapon"}
+CLASSES = ["Property Crime", "Violent Crime"]
+
+
+def _incident(rng):
+    return {"DATE OCC": f"0{rng.integers(1, 10)}/1{rng.integers(0, 10)}/2023 12:00:00 AM",
+            "TIME OCC": str(rng.integers(0, 2400)).zfill(4), "AREA NAME": rng.choice(["Central", "Hollywood"]),
+            "Vict Age": str(rng.integers(1, 90)), "Vict Sex": rng.choice(["M", "F"]), "Vict Descent": "H",
+            "Premis Desc": "STREET", "Weapon Desc": None, "Mocodes": " ".join(rng.choice(list(MO_CODES), 2))}
+
+
+@pytest.fixture(scope="module")
+def server():
+    rng = np.random.default_rng(0)
+    incidents = [_incident(rng) for _ in range(200)]
+    features = clean_incidents(incidents, MO_CODES, MODEL_FEATURES)
+    encoder = make_feature_encoder("random-forest", min_count=1)
+    X = encoder.fit_transform(features)
+    y = pd.to_numeric(features["Vict Age"]).to_numpy() > 40
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y.astype(int))
+    bundle = ModelBundle(model, MODEL_FEATURES, CLASSES, encoder=encoder)
+
+    server, _ = start_prediction_server(bundle, MO_CODES, port=0, max_wait=0.001)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def _post(server, body):
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.request("POST", "/predict", json.dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_numeric_json_fields_are_cleaned_like_text(server):
+    text = {"DATE OCC": "03/19/2023 12:00:00 AM", "TIME OCC": "1430", "AREA NAME": "Central", "Vict Age": "35",
+            "Vict Sex": "F", "Vict Descent": "H", "Premis Desc": "STREET", "Mocodes": "0344"}
+    numeric = {**text, "TIME OCC": 1430.0, "Vict Age": 35.0, "Mocodes": 344}
+    cleaned = clean_incidents([text, numeric], MO_CODES, MODEL_FEATURES)
+    pd.testing.assert_frame_equal(cleaned.iloc[[1]].reset_index(drop=True), cleaned.iloc[[0]].reset_index(drop=True))
+
+    status, answer = _post(server, [text, numeric, {**text, "TIME OCC": 1430, "Vict Age": 35}])
+    assert status == 200
+    assert all(prediction == answer["predictions"][0] for prediction in answer["predictions"])
+
+
+@pytest.mark.parametrize("value", [35.5, True, [35]])
+def test_values_that_are_not_text_or_whole_numbers_are_rejected(server, value):
+    status, answer = _post(server, {"TIME OCC": "1430", "Vict Age": value})
+    assert status == 400
+    assert "Vict Age" in answer["error"]